@@ -32,6 +32,53 @@ function safeJson(value: unknown) {
   return null;
 }
 
+// Words exported with --words-format compact (scripts/ayah_words_json.py) are
+// stored columnar: {"v":1,"n":<count>,"c":[one entry per key],"b":[indexes]}.
+// A column is an array with one value per word, or a single shared value;
+// "b" lists words without the lemma/root keys.
+const WORD_KEYS = [
+  'id',
+  'aya',
+  'sura',
+  'position',
+  'verse_key',
+  'text',
+  'simple',
+  'juz',
+  'hezb',
+  'rub',
+  'page',
+  'class_name',
+  'line',
+  'code',
+  'code_v3',
+  'char_type',
+  'audio',
+  'translation',
+  'lemma',
+  'root',
+];
+const COMPACT_WORDS_VERSION = 1;
+
+function expandWords(value: unknown): any[] {
+  const parsed = safeJson(value) as any;
+  if (Array.isArray(parsed)) return parsed;
+  if (!parsed || parsed.v !== COMPACT_WORDS_VERSION || !Array.isArray(parsed.c)) return [];
+  const count = Number(parsed.n) || 0;
+  const baseOnly = new Set<number>(Array.isArray(parsed.b) ? parsed.b : []);
+  const words: Record<string, unknown>[] = [];
+  for (let i = 0; i < count; i++) {
+    const keyCount = baseOnly.has(i) ? WORD_KEYS.length - 2 : WORD_KEYS.length;
+    const word: Record<string, unknown> = {};
+    for (let k = 0; k < keyCount; k++) {
+      const column = parsed.c[k];
+      word[WORD_KEYS[k]] = Array.isArray(column) ? column[i] : column;
+    }
+    words.push(word);
+  }
+  return words;
+}
+
 type SurahRow = {
   surah: number;
   name_ar: string;
@@ -349,7 +396,7 @@ export const onRequestGet: PagesFunction<Env> = async (ctx) => {
         t?.translation_usmani ??
         null;
 
-      const words = (safeJson(v.words) as any[]) ?? [];
+      const words = expandWords(v.words);
 
       return {
         id: v.id,
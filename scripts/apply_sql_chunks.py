@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Apply a directory of exported SQL chunk files to D1 (via wrangler) or a local SQLite copy."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import shlex
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from export_manifest import file_sha256, load_manifest, promote_manifests, save_manifest
+
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+# A file that opens its own transaction (e.g. export_word_updates_sql.py
+# --transaction), possibly after comments.
+OWN_TRANSACTION_RE = re.compile(r"\A(?:\s+|--[^\n]*|/\*.*?\*/)*BEGIN\b", re.IGNORECASE | re.DOTALL)
+# Errors that fail the same way on every attempt: bad SQL, schema mismatches
+# and constraint violations. Other wrangler failures (network trouble, rate
+# limits, a busy database) are retried.
+PERMANENT_SQL_ERROR_RE = re.compile(
+    r"SQLITE_(?!BUSY|LOCKED)[A-Z_]+|syntax error|no such (?:table|column|function)|constraint failed"
+    r"|datatype mismatch|has no column named|incomplete input",
+    re.IGNORECASE,
+)
+# SQLite errors worth retrying: another connection holds the lock.
+TRANSIENT_SQLITE_ERROR_RE = re.compile(r"database (?:table )?is locked|database is busy", re.IGNORECASE)
+
+
+class ExecutorError(RuntimeError):
+    """A chunk failed to apply; the message carries the executor's error output.
+
+    Only ``transient`` failures are retried.
+    """
+
+    def __init__(self, message: str, transient: bool = False) -> None:
+        super().__init__(message)
+        self.transient = transient
+        self.attempts = 1
+
+
+class WranglerExecutor:
+    """Run each file with `wrangler d1 execute <database> --file <chunk>`."""
+
+    def __init__(self, database: str, remote: bool = False, wrangler: str = "wrangler") -> None:
+        self.database = database
+        self.remote = remote
+        self.command = shlex.split(wrangler)
+
+    @property
+    def target(self) -> str:
+        return f"d1-{self.database}-{'remote' if self.remote else 'local'}"
+
+    def command_for(self, path: Path) -> List[str]:
+        cmd = [*self.command, "d1", "execute", self.database]
+        if self.remote:
+            cmd.append("--remote")
+        cmd.extend(["--file", str(path)])
+        return cmd
+
+    def apply(self, path: Path) -> None:
+        try:
+            result = subprocess.run(self.command_for(path), capture_output=True, text=True)
+        except OSError as exc:
+            raise ExecutorError(f"could not run {self.command[0]}: {exc}") from exc
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            raise ExecutorError(
+                f"wrangler exited with {result.returncode}: {output[-500:]}",
+                transient=not PERMANENT_SQL_ERROR_RE.search(output),
+            )
+
+
+class SqliteExecutor:
+    """Run each file against a local SQLite database inside one transaction.
+
+    Files that already start with BEGIN run as they are. A failed chunk is
+    rolled back, so a retry or a resumed run starts from the same state.
+    Every call opens its own connection, which lets several workers share
+    the executor; SQLite serialises their writes.
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 60.0) -> None:
+        self.db_path = db_path
+        self.timeout = timeout
+
+    @property
+    def target(self) -> str:
+        return f"sqlite-{self.db_path.stem}"
+
+    def apply(self, path: Path) -> None:
+        sql = path.read_text(encoding="utf-8")
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        try:
+            if OWN_TRANSACTION_RE.match(sql):
+                conn.executescript(sql)
+            else:
+                conn.executescript(f"BEGIN;\n{sql}\n;COMMIT;")
+        except sqlite3.Error as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise ExecutorError(f"sqlite3: {exc}", transient=bool(TRANSIENT_SQLITE_ERROR_RE.search(str(exc)))) from exc
+        finally:
+            conn.close()
+
+
+def add_executor_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the options that pick where SQL files are applied."""
+    parser.add_argument("--database", default="knowledgemap", help="D1 database name for wrangler.")
+    parser.add_argument("--remote", action="store_true", help="Use --remote for wrangler execution.")
+    parser.add_argument(
+        "--wrangler",
+        default="wrangler",
+        help='Command used to run wrangler, e.g. "npx wrangler" (default: wrangler).',
+    )
+    parser.add_argument(
+        "--local-db",
+        type=Path,
+        default=None,
+        help="Apply to this local SQLite database (e.g. database/d1.db) instead of running wrangler.",
+    )
+
+
+def build_executor(args: argparse.Namespace):
+    if args.local_db is not None:
+        if not args.local_db.exists():
+            raise SystemExit(f"Local database not found: {args.local_db}")
+        return SqliteExecutor(args.local_db)
+    return WranglerExecutor(args.database, remote=args.remote, wrangler=args.wrangler)
+
+
+def apply_with_retries(executor, path: Path, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF) -> int:
+    """Apply one file, retrying transient failures with exponential backoff; returns the attempts used.
+
+    The raised ExecutorError records the attempts made in ``attempts``.
+    """
+    attempt = 1
+    while True:
+        try:
+            executor.apply(path)
+            return attempt
+        except ExecutorError as exc:
+            if attempt > retries or not exc.transient:
+                exc.attempts = attempt
+                raise
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random() * 0.25)
+            print(f"  {path.name}: attempt {attempt} failed ({exc}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def default_manifest_path(chunk_dir: Path, executor) -> Path:
+    # One manifest per target so applying locally does not mark chunks done remotely.
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "-", executor.target)
+    return chunk_dir / f".applied-{slug}.manifest.json"
+
+
+def report_promoted(chunk_dir: Path, executor, applied: Dict[str, str]) -> None:
+    # The exporters stage their manifest until the export is applied to the target they name.
+    for path in promote_manifests(chunk_dir, executor.target, applied):
+        print(f"Export manifest {path} now covers the applied chunks.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Apply exported SQL chunk files in name order with retries, resuming after the "
+            "chunks a previous run already applied."
+        )
+    )
+    parser.add_argument("chunk_dir", type=Path, help="Directory containing the chunk files.")
+    parser.add_argument("--pattern", default="*.sql", help="Glob for chunk files (default: *.sql).")
+    add_executor_arguments(parser)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help=(
+            "Chunks applied at the same time (default 1). Only raise it when chunks are independent, "
+            "i.e. no row is written by more than one chunk. After a failure, chunks that finished "
+            "past the failed one are not recorded and are applied again on resume."
+        ),
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=(
+            f"Retries per chunk after a transient failure such as a busy database or a network error "
+            f"(default {DEFAULT_RETRIES}). SQL errors are not retried."
+        ),
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=DEFAULT_BACKOFF,
+        help=f"Initial retry delay in seconds, doubled on each retry (default {DEFAULT_BACKOFF}).",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="Resume manifest (default: <chunk_dir>/.applied-<target>.manifest.json).",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore the resume manifest and apply every chunk.")
+    parser.add_argument("--dry-run", action="store_true", help="List the chunks that would be applied.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.chunk_dir.is_dir():
+        raise SystemExit(f"Chunk directory not found: {args.chunk_dir}")
+    executor = build_executor(args)
+    manifest_path = args.manifest or default_manifest_path(args.chunk_dir, executor)
+    applied: Dict[str, str] = {} if args.restart else load_manifest(manifest_path)
+
+    chunks = sorted(path for path in args.chunk_dir.glob(args.pattern) if path.is_file())
+    if not chunks:
+        raise SystemExit(f"No chunk files matching {args.pattern} in {args.chunk_dir}")
+    hashes = {path.name: file_sha256(path) for path in chunks}
+    # A chunk counts as applied only if its content is unchanged since then.
+    pending = [path for path in chunks if applied.get(path.name) != hashes[path.name]]
+    print(
+        f"{len(chunks)} chunk(s) in {args.chunk_dir}; {len(chunks) - len(pending)} already applied "
+        f"to {executor.target}, {len(pending)} to go."
+    )
+    if args.dry_run:
+        for path in pending:
+            print(f"  would apply {path.name}")
+        return
+    if not pending:
+        print("Nothing to apply.")
+        report_promoted(args.chunk_dir, executor, applied)
+        return
+
+    started = time.perf_counter()
+    failed: Optional[Path] = None
+    error: Optional[ExecutorError] = None
+    queue = iter(pending)
+    done_count = 0
+    # With several workers chunks finish out of order. The manifest only
+    # records the run of pending chunks that completed without a gap, so a
+    # resumed run never applies an earlier chunk after a later one.
+    completed: set = set()
+    recorded = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        running: Dict[Future, Path] = {}
+
+        def submit_next() -> None:
+            path = next(queue, None)
+            if path is not None:
+                running[pool.submit(apply_with_retries, executor, path, args.retries, args.backoff)] = path
+
+        for _ in range(max(1, args.concurrency)):
+            submit_next()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = running.pop(future)
+                try:
+                    attempts = future.result()
+                except ExecutorError as exc:
+                    if failed is None or path.name < failed.name:
+                        failed, error = path, exc
+                    continue
+                completed.add(path)
+                if pending[recorded] in completed:
+                    while recorded < len(pending) and pending[recorded] in completed:
+                        applied[pending[recorded].name] = hashes[pending[recorded].name]
+                        recorded += 1
+                    save_manifest(manifest_path, applied)
+                done_count += 1
+                note = f" after {attempts} attempts" if attempts > 1 else ""
+                print(f"Applied {path.name} ({done_count}/{len(pending)}){note}")
+                if failed is None:
+                    submit_next()
+
+    elapsed = time.perf_counter() - started
+    if failed is not None:
+        raise SystemExit(
+            f"Chunk {failed.name} failed after {error.attempts} attempt(s): {error}\n"
+            f"Applied {done_count} chunk(s) in {elapsed:.1f}s; rerun the same command to resume "
+            f"(progress saved in {manifest_path}"
+            + (
+                f"; {done_count - recorded} chunk(s) after {failed.name} will be applied again, in order)."
+                if done_count > recorded
+                else ")."
+            )
+        )
+    print(f"Applied {done_count} chunk(s) to {executor.target} in {elapsed:.1f}s; manifest {manifest_path}.")
+    report_promoted(args.chunk_dir, executor, applied)
+
+
+if __name__ == "__main__":
+    main()
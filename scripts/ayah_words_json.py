@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import json
+from json.encoder import encode_basestring
+from typing import Callable, Dict, Iterable, List, Sequence
+
+
+# Key order of one word object in ar_quran_ayah.words. Words without a
+# lemma/root match carry only the first 18 keys.
+WORD_KEYS = (
+    "id",
+    "aya",
+    "sura",
+    "position",
+    "verse_key",
+    "text",
+    "simple",
+    "juz",
+    "hezb",
+    "rub",
+    "page",
+    "class_name",
+    "line",
+    "code",
+    "code_v3",
+    "char_type",
+    "audio",
+    "translation",
+    "lemma",
+    "root",
+)
+BASE_WORD_KEYS = WORD_KEYS[:18]
+
+
+def compile_template(keys: Sequence[str]) -> str:
+    """Build a ``%``-template for one JSON object with ``keys`` in order, e.g. '{"id":%s,"aya":%s}'."""
+    return "{" + ",".join(f"{json.dumps(key)}:%s" for key in keys) + "}"
+
+
+_TEMPLATES: Dict[int, str] = {
+    len(WORD_KEYS): compile_template(WORD_KEYS),
+    len(BASE_WORD_KEYS): compile_template(BASE_WORD_KEYS),
+}
+
+
+def _encode_other(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+# SQLite hands back str, int and None for nearly every column; everything
+# else (floats, bools from Python callers) goes through json.dumps.
+_ENCODERS: Dict[type, Callable[[object], str]] = {
+    str: encode_basestring,
+    int: int.__repr__,
+    type(None): lambda value: "null",
+}
+
+
+def encode_word(row: Sequence[object]) -> str:
+    """Encode one word given its values in WORD_KEYS order (18 or 20 of them)."""
+    template = _TEMPLATES.get(len(row))
+    if template is None:
+        raise ValueError(f"Expected {len(BASE_WORD_KEYS)} or {len(WORD_KEYS)} word values, got {len(row)}")
+    get = _ENCODERS.get
+    return template % tuple([get(type(value), _encode_other)(value) for value in row])
+
+
+def encode_words(rows: Iterable[Sequence[object]]) -> str:
+    """Encode an ayah's words as a JSON array.
+
+    The result is byte-identical to ``json.dumps`` of the same words as
+    dicts with ``ensure_ascii=False, separators=(",", ":")``, without
+    building the dicts.
+    """
+    return "[" + ",".join([encode_word(row) for row in rows]) + "]"
+
+
+# Compact columnar form of an ayah's words, opted into by the exporters:
+#   {"v": 1, "n": <word count>, "c": [<one entry per WORD_KEYS column>], "b": [<word indexes>]}
+# A column entry is a list with one value per word, or a single value when
+# every word shares it (aya, sura, page, ...). "b" lists the words that carry
+# only BASE_WORD_KEYS (no lemma/root keys) and is left out when there are
+# none. Bump COMPACT_WORDS_VERSION whenever this layout or WORD_KEYS changes.
+COMPACT_WORDS_VERSION = 1
+
+
+def compact_words(rows: Sequence[Sequence[object]]) -> Dict[str, object]:
+    """Turn an ayah's words (value sequences in WORD_KEYS order) into the columnar form."""
+    base_only = [index for index, row in enumerate(rows) if len(row) == len(BASE_WORD_KEYS)]
+    for row in rows:
+        if len(row) not in _TEMPLATES:
+            raise ValueError(f"Expected {len(BASE_WORD_KEYS)} or {len(WORD_KEYS)} word values, got {len(row)}")
+    columns: List[object] = []
+    for index in range(len(WORD_KEYS)):
+        values = [row[index] if index < len(row) else None for row in rows]
+        first = values[0] if values else None
+        # 1 == 1.0 == True, so the types must match as well for the column to collapse.
+        if values and all(value == first and type(value) is type(first) for value in values):
+            columns.append(first)
+        else:
+            columns.append(values)
+    payload: Dict[str, object] = {"v": COMPACT_WORDS_VERSION, "n": len(rows), "c": columns}
+    if base_only:
+        payload["b"] = base_only
+    return payload
+
+
+def encode_compact_words(rows: Sequence[Sequence[object]]) -> str:
+    return json.dumps(compact_words(rows), ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_words(payload: object) -> List[Dict[str, object]]:
+    """Expand a words payload (compact object or plain word list, parsed or as JSON text) to word dicts."""
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if isinstance(payload, list):
+        return payload
+    version = payload.get("v") if isinstance(payload, dict) else None
+    if version != COMPACT_WORDS_VERSION:
+        raise ValueError(f"Unsupported words payload (version {version!r})")
+    count = payload["n"]
+    columns = [column if isinstance(column, list) else [column] * count for column in payload["c"]]
+    base_only = set(payload.get("b", ()))
+    words: List[Dict[str, object]] = []
+    for index in range(count):
+        keys = BASE_WORD_KEYS if index in base_only else WORD_KEYS
+        words.append({key: columns[column][index] for column, key in enumerate(keys)})
+    return words
+
+
+WordsEncoder = Callable[[Sequence[Sequence[object]]], str]
+
+WORDS_ENCODERS: Dict[str, WordsEncoder] = {
+    "full": encode_words,
+    "compact": encode_compact_words,
+}
+
+
+def add_words_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--words-format",
+        choices=sorted(WORDS_ENCODERS),
+        default="full",
+        help=(
+            "full: a JSON array of word objects (default); compact: per-ayah columnar arrays with a "
+            f"schema version (v{COMPACT_WORDS_VERSION}), expanded again by decode_words."
+        ),
+    )
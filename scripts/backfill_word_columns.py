@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Backfill quran_ayah_lemma_location.word_simple/word_diacritic from ar_occ_token with set-based UPDATEs."""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+
+# Quran token positions, first row per (unit_id, pos_index) in rowid order.
+CREATE_TOKENS_SQL = """
+    DROP TABLE IF EXISTS temp.quran_word_tokens;
+    CREATE TEMP TABLE quran_word_tokens (
+      unit_id TEXT NOT NULL,
+      pos_index INTEGER NOT NULL,
+      surface_ar TEXT,
+      norm_ar TEXT,
+      PRIMARY KEY (unit_id, pos_index)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO temp.quran_word_tokens (unit_id, pos_index, surface_ar, norm_ar)
+    SELECT unit_id, pos_index, surface_ar, norm_ar
+    FROM ar_occ_token
+    WHERE unit_id LIKE 'U:QURAN:%'
+    ORDER BY rowid;
+"""
+
+CANDIDATE_WHERE = "word_simple IS NULL OR word_diacritic IS NULL"
+DEFAULT_BATCH_SIZE = 2000
+
+# The token at token_index - 1 is preferred over token_index. word_simple
+# takes norm_ar, falling back to surface_ar when norm_ar is empty;
+# word_diacritic takes surface_ar. Each statement covers the candidate rows
+# with ids in [?, ?].
+BACKFILL_SQL = """
+    UPDATE quran_ayah_lemma_location AS l
+    SET word_simple = COALESCE(resolved.word_simple, {simple_default}),
+        word_diacritic = COALESCE(resolved.word_diacritic, {diacritic_default})
+    FROM (
+      SELECT
+        loc.id,
+        COALESCE(
+          CASE WHEN prev.norm_ar <> '' THEN prev.norm_ar ELSE prev.surface_ar END,
+          CASE WHEN cur.norm_ar <> '' THEN cur.norm_ar ELSE cur.surface_ar END
+        ) AS word_simple,
+        COALESCE(prev.surface_ar, cur.surface_ar) AS word_diacritic
+      FROM quran_ayah_lemma_location AS loc
+      LEFT JOIN temp.quran_word_tokens AS prev
+        ON prev.unit_id = 'U:QURAN:' || loc.surah || ':' || loc.ayah
+       AND prev.pos_index = loc.token_index - 1
+       AND loc.token_index >= 1
+      LEFT JOIN temp.quran_word_tokens AS cur
+        ON cur.unit_id = 'U:QURAN:' || loc.surah || ':' || loc.ayah
+       AND cur.pos_index = loc.token_index
+      WHERE (loc.word_simple IS NULL OR loc.word_diacritic IS NULL)
+        AND loc.id BETWEEN ? AND ?
+    ) AS resolved
+    WHERE l.id = resolved.id
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Backfill quran_ayah_lemma_location word columns from ar_occ_token."
+    )
+    parser.add_argument("--db", type=Path, default=Path("Database/d1.db"), help="Path to the D1 SQLite database.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows updated and committed per statement, with progress after each (default {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--mark-missing",
+        action="store_true",
+        help="Store '' when no token is found so the row is not picked up again (old fast script behaviour).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report counts and roll back.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.db.exists():
+        raise SystemExit(f"Database not found: {args.db}")
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.db)
+    cursor = conn.cursor()
+
+    if args.batch_size < 1:
+        raise SystemExit("--batch-size must be at least 1")
+    candidate_ids = [
+        row[0]
+        for row in cursor.execute(f"SELECT id FROM quran_ayah_lemma_location WHERE {CANDIDATE_WHERE} ORDER BY id")
+    ]
+    candidates = len(candidate_ids)
+    print(f"Rows missing word columns: {candidates}")
+    if not candidates:
+        conn.close()
+        print("done")
+        return
+
+    cursor.executescript(CREATE_TOKENS_SQL)
+    tokens = cursor.execute("SELECT COUNT(*) FROM temp.quran_word_tokens").fetchone()[0]
+    print(f"Loaded {tokens} Quran token positions ({time.perf_counter() - started:.2f}s).")
+
+    defaults = ("''", "''") if args.mark_missing else ("l.word_simple", "l.word_diacritic")
+    backfill_sql = BACKFILL_SQL.format(simple_default=defaults[0], diacritic_default=defaults[1])
+    updated = 0
+    for start in range(0, candidates, args.batch_size):
+        batch = candidate_ids[start : start + args.batch_size]
+        cursor.execute(backfill_sql, (batch[0], batch[-1]))
+        updated += cursor.rowcount
+        # A dry run keeps everything in one transaction so it can be rolled back.
+        if not args.dry_run:
+            conn.commit()
+        print(f"processed {start + len(batch)}/{candidates} ({time.perf_counter() - started:.2f}s)")
+    remaining = cursor.execute(
+        f"SELECT COUNT(*) FROM quran_ayah_lemma_location WHERE {CANDIDATE_WHERE}"
+    ).fetchone()[0]
+
+    if args.dry_run:
+        conn.rollback()
+        print(f"[dry-run] would update {updated} rows; {remaining} would still miss a token.")
+    else:
+        conn.commit()
+        print(f"Updated {updated} rows; {remaining} rows have no matching token.")
+    conn.close()
+    print(f"done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
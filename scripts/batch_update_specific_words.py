@@ -5,6 +5,7 @@ import sqlite3
 from pathlib import Path
 from typing import Iterable, List, Sequence
 
+from quran_word_index import QuranWordIndex
 from quran_words import load_salam_word_map
 
 
@@ -29,7 +30,7 @@ def gather_rows(cursor: sqlite3.Cursor, targets: List[str]) -> List[sqlite3.Row]
     return list(cursor.execute(query, targets))
 
 
-def build_updates(rows: List[sqlite3.Row], word_map: dict, targets: List[str]) -> List[tuple]:
+def build_updates(rows: List[sqlite3.Row], word_map: QuranWordIndex, targets: List[str]) -> List[tuple]:
     updates = []
     for row in rows:
         surah = row["surah"]
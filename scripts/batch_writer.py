@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from typing import List, Optional, Sequence
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_REPORT_EVERY = 10000
+
+
+def add_batch_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the shared --batch-size / --commit-every options."""
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows buffered per executemany call (default {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--commit-every",
+        type=int,
+        default=0,
+        help="Commit after this many written rows (default 0: one transaction for the whole run).",
+    )
+
+
+class BatchWriter:
+    """Buffer parameter rows for one statement and write them with executemany.
+
+    Rows are flushed every ``batch_size`` rows and the connection is committed
+    every ``commit_every`` written rows (0 keeps one transaction so the caller
+    decides when to commit or roll back). Writers in ``depends_on`` are
+    flushed first, so rows this statement references (by foreign key) are
+    written before it. With ``dry_run`` rows are counted but never executed.
+    Progress with rows/sec is printed every ``report_every`` rows.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        commit_every: int = 0,
+        label: str = "rows",
+        report_every: int = DEFAULT_REPORT_EVERY,
+        dry_run: bool = False,
+        depends_on: Sequence["BatchWriter"] = (),
+    ) -> None:
+        self.conn = conn
+        self.sql = sql
+        self.batch_size = max(1, batch_size)
+        # Dry runs roll back at the end, so they must never commit part way.
+        self.commit_every = 0 if dry_run else max(0, commit_every)
+        self.label = label
+        self.report_every = report_every
+        self.dry_run = dry_run
+        self.depends_on = tuple(depends_on)
+        self.written = 0
+        self._pending: List[Sequence[object]] = []
+        self._uncommitted = 0
+        self._next_report = report_every
+        self._started = time.perf_counter()
+
+    def add(self, params: Sequence[object]) -> None:
+        self._pending.append(params)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        for writer in self.depends_on:
+            writer.flush()
+        if not self.dry_run:
+            self.conn.executemany(self.sql, self._pending)
+        count = len(self._pending)
+        self._pending = []
+        self.written += count
+        self._uncommitted += count
+        if self.commit_every and self._uncommitted >= self.commit_every:
+            self.conn.commit()
+            self._uncommitted = 0
+        if self.report_every and self.written >= self._next_report:
+            self.report()
+            self._next_report = (self.written // self.report_every + 1) * self.report_every
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self._started
+        return self.written / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> None:
+        print(f"  {self.label}: {self.written} written ({self.rate():,.0f} rows/s)")
+
+    def close(self) -> int:
+        """Flush remaining rows (committing them when commit_every is set) and return the total written."""
+        self.flush()
+        if self.commit_every and self._uncommitted:
+            self.conn.commit()
+            self._uncommitted = 0
+        return self.written
+
+    def summary(self) -> str:
+        return f"{self.written} {self.label} at {self.rate():,.0f} rows/s"
+
+
+def open_writer(
+    conn: sqlite3.Connection,
+    sql: str,
+    args: Optional[argparse.Namespace],
+    label: str,
+    dry_run: bool = False,
+    depends_on: Sequence[BatchWriter] = (),
+) -> BatchWriter:
+    """Build a BatchWriter from the options added by add_batch_arguments."""
+    return BatchWriter(
+        conn,
+        sql,
+        batch_size=getattr(args, "batch_size", DEFAULT_BATCH_SIZE),
+        commit_every=getattr(args, "commit_every", 0),
+        label=label,
+        dry_run=dry_run,
+        depends_on=depends_on,
+    )
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Benchmark the ar_quran_ayah.words serializer against dicts + json.dumps."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+from ayah_words_json import WORD_KEYS, encode_words
+
+
+Ayah = List[Tuple[object, ...]]
+
+# Values the Salam text does not exercise but the encoder must still match.
+EDGE_WORDS: Ayah = [
+    (1, 2, 3, 4, "1:2", 'qu"ote\\back\\slash', "tab\tnew\nline\x01", None, -5, 0, 7, "it's", 12, " ", "", None, "ﷺ", "é", 1.5, True),
+    (None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None),
+]
+
+
+def dumps_words(ayahs: List[Ayah]) -> List[str]:
+    """The previous path: one OrderedDict per word, json.dumps per ayah."""
+    return [
+        json.dumps(
+            [OrderedDict(zip(WORD_KEYS, row)) for row in rows],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        for rows in ayahs
+    ]
+
+
+def encode_all(ayahs: List[Ayah]) -> List[str]:
+    return [encode_words(rows) for rows in ayahs]
+
+
+def load_ayahs(db_path: Path) -> List[Ayah]:
+    conn = sqlite3.connect(db_path)
+    ayahs: List[Ayah] = []
+    current = None
+    for row in conn.execute(
+        """
+        SELECT word_id, ayah, surah, position, verse_key, text, simple, juz, hezb, rub, page,
+               class_name, line, code, code_v3, char_type, audio, translation, lemma, root
+        FROM ar_u_quran_ayah_words
+        ORDER BY surah, ayah, position, word_id
+        """
+    ):
+        if (row[2], row[1]) != current:
+            current = (row[2], row[1])
+            ayahs.append([])
+        ayahs[-1].append(row)
+    conn.close()
+    return ayahs
+
+
+def time_encoder(encoder: Callable[[List[Ayah]], List[str]], ayahs: List[Ayah], repeat: int) -> Tuple[float, List[str]]:
+    best = float("inf")
+    results: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = encoder(ayahs)
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def count_mismatches(expected: Sequence[str], actual: Sequence[str]) -> int:
+    return sum(1 for left, right in zip(expected, actual) if left != right) + abs(len(expected) - len(actual))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the per-ayah words JSON serializer.")
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=Path("database/d1.db"),
+        help="SQLite database with ar_u_quran_ayah_words.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per serializer (best run is kept).")
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=None,
+        help="Exit non-zero when the serializer speedup falls below this multiple.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.db.exists():
+        raise SystemExit(f"Missing DB file: {args.db}")
+    ayahs = load_ayahs(args.db)
+    words = sum(len(rows) for rows in ayahs)
+
+    edge_mismatches = count_mismatches(dumps_words([EDGE_WORDS]), encode_all([EDGE_WORDS]))
+    dumps_time, dumps_payloads = time_encoder(dumps_words, ayahs, args.repeat)
+    fast_time, fast_payloads = time_encoder(encode_all, ayahs, args.repeat)
+
+    mismatches = count_mismatches(dumps_payloads, fast_payloads) + edge_mismatches
+    speedup = dumps_time / fast_time if fast_time else float("inf")
+    payload_bytes = sum(len(payload.encode("utf-8")) for payload in fast_payloads)
+
+    print(f"Ayahs: {len(ayahs)} ({words} words, {payload_bytes / 1e6:.1f} MB of JSON)")
+    print(f"json.dumps: {dumps_time:.3f}s ({words / dumps_time:,.0f} words/s)")
+    print(f"Templates:  {fast_time:.3f}s ({words / fast_time:,.0f} words/s)")
+    print(f"Speedup:    {speedup:.1f}x")
+    print(f"Mismatched payloads: {mismatches}")
+
+    if mismatches:
+        raise SystemExit("Serializer output differs from json.dumps.")
+    if args.min_speedup is not None and speedup < args.min_speedup:
+        raise SystemExit(f"Speedup {speedup:.1f}x is below the required {args.min_speedup:.1f}x.")
+
+
+if __name__ == "__main__":
+    main()
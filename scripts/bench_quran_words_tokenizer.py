@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Benchmark the Salam row tokenizer against the reference character scanner.
+
+With --fuzz N it also compares the two on N random rows built from quotes,
+backslashes, commas and spaces, the cases the csv fast path has to hand back
+to the scanner.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List
+
+from quran_words import _scan_word_row, iter_word_columns
+
+
+def iter_scanned_columns(lines: Iterable[str]) -> Iterator[List[str]]:
+    for line in lines:
+        columns = _scan_word_row(line)
+        if columns is not None:
+            yield columns
+
+
+FUZZ_ALPHABET = ["'", "''", "\\", "\\'", ",", " ", "a", "b", "1", "\u0628", "NULL"]
+
+
+def fuzz_lines(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        body = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 12)))
+        lines.append(f"({body}){rng.choice(['', ',', ';'])}\n")
+    return lines
+
+
+def count_mismatches(lines: List[str]) -> int:
+    scanned = list(iter_scanned_columns(lines))
+    tokenized = list(iter_word_columns(lines))
+    mismatches = sum(1 for legacy, fast in zip(scanned, tokenized) if legacy != fast)
+    return mismatches + abs(len(scanned) - len(tokenized))
+
+
+def time_parser(
+    parser: Callable[[Iterable[str]], Iterator[List[str]]],
+    lines: List[str],
+    repeat: int,
+) -> tuple[float, List[List[str]]]:
+    best = float("inf")
+    results: List[List[str]] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = list(parser(lines))
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Salam Quran words row tokenizer.")
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=Path("database/data/tarteel.ai/quran-meta/salamquran_quran_words.sql"),
+        help="Path to salamquran_quran_words.sql",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per tokenizer (best run is kept).")
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=None,
+        help="Exit non-zero when the tokenizer speedup falls below this multiple.",
+    )
+    parser.add_argument(
+        "--fuzz",
+        type=int,
+        default=0,
+        help="Also compare both tokenizers on this many random rows (exits non-zero on any difference).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --fuzz (default 0).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.input.exists():
+        raise SystemExit(f"Missing input file: {args.input}")
+    with args.input.open(encoding="utf-8") as fh:
+        lines = fh.readlines()
+
+    legacy_time, legacy_rows = time_parser(iter_scanned_columns, lines, args.repeat)
+    fast_time, fast_rows = time_parser(iter_word_columns, lines, args.repeat)
+
+    mismatches = sum(1 for legacy, fast in zip(legacy_rows, fast_rows) if legacy != fast)
+    mismatches += abs(len(legacy_rows) - len(fast_rows))
+    fuzz_mismatches = count_mismatches(fuzz_lines(args.fuzz, args.seed)) if args.fuzz else 0
+    speedup = legacy_time / fast_time if fast_time else float("inf")
+
+    print(f"Lines: {len(lines)} ({len(fast_rows)} value rows)")
+    print(f"Scanner:   {legacy_time:.3f}s ({len(lines) / legacy_time:,.0f} lines/s)")
+    print(f"Tokenizer: {fast_time:.3f}s ({len(lines) / fast_time:,.0f} lines/s)")
+    print(f"Speedup:   {speedup:.1f}x")
+    print(f"Mismatched rows: {mismatches}")
+    if args.fuzz:
+        print(f"Mismatched fuzz rows: {fuzz_mismatches} of {args.fuzz} (seed {args.seed})")
+
+    if mismatches or fuzz_mismatches:
+        raise SystemExit("Tokenizer output differs from the reference scanner.")
+    if args.min_speedup is not None and speedup < args.min_speedup:
+        raise SystemExit(f"Speedup {speedup:.1f}x is below the required {args.min_speedup:.1f}x.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import string
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Table IDs are the SHA-256 hex digest of a canonical input string such as
+# "ROOT|ktb" or "GRAMUNIT|<book>|chapter|01". Each namespace below keeps the
+# canonicalization its scripts have always used, so the IDs they produce
+# never change; only the hashing is shared and memoized.
+DEFAULT_MEMO_SIZE = 1 << 16
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def collapse_whitespace(value: Optional[str]) -> str:
+    """Turn runs of whitespace into single spaces and trim the ends (same as re.sub(r"\\s+", " ", ...).strip())."""
+    return " ".join((value or "").split())
+
+
+def canonicalize_ascii_lower(value: Optional[str]) -> str:
+    """Collapse whitespace and lowercase ASCII A-Z only, leaving Arabic and other letters untouched."""
+    return collapse_whitespace(value).translate(_ASCII_LOWER)
+
+
+def canonicalize_lower(value: Optional[str]) -> str:
+    """Collapse whitespace and lowercase with str.lower()."""
+    return collapse_whitespace(value).lower()
+
+
+def canonicalize_raw(value: str) -> str:
+    return value
+
+
+class IdNamespace:
+    """One ID scheme: a canonicalization plus SHA-256, memoized in a bounded LRU.
+
+    ``hash`` returns ``(digest, canonical_input)`` for tables that store the
+    canonical input next to the ID; ``digest`` returns the ID alone.
+    """
+
+    def __init__(self, name: str, canonicalize: Callable[[str], str], memo_size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.name = name
+        self.canonicalize = canonicalize
+        self._hash = lru_cache(maxsize=memo_size)(self._compute)
+
+    def _compute(self, value: str) -> Tuple[str, str]:
+        canonical = self.canonicalize(value)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), canonical
+
+    def hash(self, value: str) -> Tuple[str, str]:
+        return self._hash(value)
+
+    def digest(self, value: str) -> str:
+        return self._hash(value)[0]
+
+    def cache_info(self):
+        return self._hash.cache_info()
+
+    def __repr__(self) -> str:
+        return f"IdNamespace({self.name!r})"
+
+
+# ar_u_roots ("ROOT|<root_norm>"): regenerate_ar_u_roots_sql.py, import-tarteel-roots.py,
+# migrate_ar_roots_to_ar_u_roots.py and import-legacy-roots.py.
+ROOT_IDS = IdNamespace("roots", canonicalize_ascii_lower)
+# ar_grammar_units / ar_grammar_unit_items ("GRAMUNIT|...", "GRAMITEM|..."): extract-grammar-pdf.py.
+GRAMMAR_IDS = IdNamespace("grammar", canonicalize_lower)
+# Inputs hashed exactly as given: ar_u_tokens in import-qul-word-lemmas.py and
+# sources, lexicon and evidence rows in import_verbal_idioms_notes.py.
+RAW_IDS = IdNamespace("raw", canonicalize_raw)
+
+NAMESPACES: Dict[str, IdNamespace] = {ids.name: ids for ids in (ROOT_IDS, GRAMMAR_IDS, RAW_IDS)}
+
+
+def namespace(name: str) -> IdNamespace:
+    try:
+        return NAMESPACES[name]
+    except KeyError:
+        raise ValueError(f"Unknown ID namespace {name!r}; expected one of {', '.join(sorted(NAMESPACES))}") from None
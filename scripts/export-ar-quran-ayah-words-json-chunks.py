@@ -4,35 +4,12 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sqlite3
-from collections import OrderedDict
 from pathlib import Path
 from typing import Iterator, List, Tuple
 
-
-COLUMNS = [
-    "id",
-    "aya",
-    "sura",
-    "position",
-    "verse_key",
-    "text",
-    "simple",
-    "juz",
-    "hezb",
-    "rub",
-    "page",
-    "class_name",
-    "line",
-    "code",
-    "code_v3",
-    "char_type",
-    "audio",
-    "translation",
-    "lemma",
-    "root",
-]
+from ayah_words_json import WORDS_ENCODERS, WordsEncoder, add_words_format_argument, encode_words
+from sql_chunks import add_chunk_arguments, plan_chunks
 
 
 def escape_sql(value: str) -> str:
@@ -41,99 +18,63 @@ def escape_sql(value: str) -> str:
     return value.replace("'", "''")
 
 
-def chunked_iterator(iterator: Iterator[str], chunk_size: int) -> Iterator[Tuple[int, List[str]]]:
-    chunk: List[str] = []
-    index = 1
-    for stmt in iterator:
-        chunk.append(stmt)
-        if len(chunk) >= chunk_size:
-            yield index, chunk
-            index += 1
-            chunk = []
-    if chunk:
-        yield index, chunk
-
-
-def generate_updates(cursor: sqlite3.Cursor) -> Iterator[str]:
-    query = """
-        SELECT
-          word_id,
-          surah,
-          ayah,
-          position,
-          verse_key,
-          text,
-          simple,
-          juz,
-          hezb,
-          rub,
-          page,
-          class_name,
-          line,
-          code,
-          code_v3,
-          char_type,
-          audio,
-          translation,
-          lemma,
-          root
-        FROM ar_u_quran_ayah_words
-        ORDER BY surah, ayah, position, word_id
-    """
-    current_key: Tuple[int, int] | None = None
-    items: List[OrderedDict[str, object]] = []
-
-    for row in cursor.execute(query):
-        word_id, surah, ayah = row[0], row[1], row[2]
-        if current_key is None:
-            current_key = (surah, ayah)
-        elif current_key != (surah, ayah):
-            payload = json.dumps(items, ensure_ascii=False, separators=(",", ":"))
-            escaped = escape_sql(payload)
-            yield (
-                "UPDATE ar_quran_ayah SET words = '{payload}' "
-                "WHERE surah = {surah} AND ayah = {ayah};\n".format(
-                    payload=escaped, surah=current_key[0], ayah=current_key[1]
-                )
-            )
-            items = []
-            current_key = (surah, ayah)
-
-        item = OrderedDict(
-            (
-                ("id", word_id),
-                ("aya", ayah),
-                ("sura", surah),
-                ("position", row[3]),
-                ("verse_key", row[4]),
-                ("text", row[5]),
-                ("simple", row[6]),
-                ("juz", row[7]),
-                ("hezb", row[8]),
-                ("rub", row[9]),
-                ("page", row[10]),
-                ("class_name", row[11]),
-                ("line", row[12]),
-                ("code", row[13]),
-                ("code_v3", row[14]),
-                ("char_type", row[15]),
-                ("audio", row[16]),
-                ("translation", row[17]),
-                ("lemma", row[18]),
-                ("root", row[19]),
-            )
+# Columns are selected in WORD_KEYS order so cursor rows encode directly.
+WORDS_QUERY = """
+    SELECT
+      word_id,
+      ayah,
+      surah,
+      position,
+      verse_key,
+      text,
+      simple,
+      juz,
+      hezb,
+      rub,
+      page,
+      class_name,
+      line,
+      code,
+      code_v3,
+      char_type,
+      audio,
+      translation,
+      lemma,
+      root
+    FROM ar_u_quran_ayah_words
+    ORDER BY surah, ayah, position, word_id
+"""
+
+
+def render_update(
+    surah: int,
+    ayah: int,
+    rows: List[Tuple[object, ...]],
+    encode: WordsEncoder = encode_words,
+) -> str:
+    return (
+        "UPDATE ar_quran_ayah SET words = '{payload}' "
+        "WHERE surah = {surah} AND ayah = {ayah};\n".format(
+            payload=escape_sql(encode(rows)), surah=surah, ayah=ayah
         )
-        items.append(item)
+    )
+
+
+def generate_updates(cursor: sqlite3.Cursor, encode: WordsEncoder = encode_words) -> Iterator[str]:
+    current_key: Tuple[int, int] | None = None
+    rows: List[Tuple[object, ...]] = []
+
+    for row in cursor.execute(WORDS_QUERY):
+        key = (row[2], row[1])
+        if key != current_key:
+            if current_key is not None:
+                yield render_update(current_key[0], current_key[1], rows, encode)
+            rows = []
+            current_key = key
+        rows.append(row)
 
     if current_key is not None:
-        payload = json.dumps(items, ensure_ascii=False, separators=(",", ":"))
-        escaped = escape_sql(payload)
-        yield (
-            "UPDATE ar_quran_ayah SET words = '{payload}' "
-            "WHERE surah = {surah} AND ayah = {ayah};\n".format(
-                payload=escaped, surah=current_key[0], ayah=current_key[1]
-            )
-        )
+        yield render_update(current_key[0], current_key[1], rows, encode)
 
 
 def write_chunk(out_dir: Path, chunk_index: int, chunk: List[str]) -> Path:
@@ -152,12 +93,7 @@ def parse_args() -> argparse.Namespace:
         default=Path("database/d1.db"),
         help="Local D1 SQLite database containing ar_u_quran_ayah_words.",
     )
-    parser.add_argument(
-        "--chunk-size",
-        type=int,
-        default=100,
-        help="Number of UPDATE statements per chunk file.",
-    )
+    add_chunk_arguments(parser, 100, "UPDATE")
     parser.add_argument(
         "--out-dir",
         type=Path,
@@ -169,6 +105,7 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Delete existing chunk files before writing new ones.",
     )
+    add_words_format_argument(parser)
     return parser.parse_args()
 
 
@@ -183,14 +120,14 @@ def main() -> None:
 
     conn = sqlite3.connect(args.target_db)
     cursor = conn.cursor()
-    updates = generate_updates(cursor)
+    updates = generate_updates(cursor, WORDS_ENCODERS[args.words_format])
     written = 0
     paths: List[Path] = []
-    for chunk_index, chunk in chunked_iterator(updates, args.chunk_size):
+    for chunk_index, chunk, size in plan_chunks(updates, args.chunk_size, args.max_chunk_bytes):
         path = write_chunk(args.out_dir, chunk_index, chunk)
         paths.append(path)
         written += len(chunk)
-        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements) to {path}")
+        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements, {size} bytes) to {path}")
     conn.close()
 
     if written == 0:
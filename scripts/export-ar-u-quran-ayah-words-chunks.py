@@ -6,7 +6,9 @@ from __future__ import annotations
 import argparse
 import sqlite3
 from pathlib import Path
-from typing import Iterator, List, Sequence, Tuple, Union
+from typing import Iterator, List, Sequence, Union
+
+from sql_chunks import add_chunk_arguments, add_compact_argument, batch_values, plan_chunks
 
 
 COLUMNS: Sequence[str] = (
@@ -34,6 +36,8 @@ COLUMNS: Sequence[str] = (
     "meta_json",
 )
 
+CHUNK_HEADER = "PRAGMA foreign_keys=OFF;\n"
+
 
 def _escape_sql_value(value: Union[str, int, float, None]) -> str:
     if value is None:
@@ -44,20 +48,17 @@ def _escape_sql_value(value: Union[str, int, float, None]) -> str:
     return "'" + text.replace("\\", "\\\\").replace("'", "''") + "'"
 
 
-def chunked_iterator(iterator: Iterator[str], chunk_size: int) -> Iterator[Tuple[int, List[str]]]:
-    chunk: List[str] = []
-    index = 1
-    for stmt in iterator:
-        chunk.append(stmt)
-        if len(chunk) >= chunk_size:
-            yield index, chunk
-            index += 1
-            chunk = []
-    if chunk:
-        yield index, chunk
+INSERT_PREFIX = "INSERT INTO ar_u_quran_ayah_words (" + ", ".join(COLUMNS) + ") VALUES "
+UPSERT_CLAUSE = (
+    "ON CONFLICT(surah, ayah, position, word_id) DO UPDATE SET "
+    + "lemma = excluded.lemma, "
+    + "root = excluded.root, "
+    + "ar_u_root = excluded.ar_u_root, "
+    + "updated_at = datetime('now');\n"
+)
 
 
-def generate_inserts(cursor: sqlite3.Cursor) -> Iterator[str]:
+def iter_value_rows(cursor: sqlite3.Cursor) -> Iterator[List[str]]:
     select_sql = (
         "SELECT "
         + ", ".join(COLUMNS)
@@ -65,19 +66,17 @@ def generate_inserts(cursor: sqlite3.Cursor) -> Iterator[str]:
         + "ORDER BY surah, ayah, position, word_id"
     )
     for row in cursor.execute(select_sql):
-        values = ", ".join(_escape_sql_value(value) for value in row)
-        yield (
-            "INSERT INTO ar_u_quran_ayah_words ("
-            + ", ".join(COLUMNS)
-            + ") VALUES ("
-            + values
-            + ") "
-            + "ON CONFLICT(surah, ayah, position, word_id) DO UPDATE SET "
-            + "lemma = excluded.lemma, "
-            + "root = excluded.root, "
-            + "ar_u_root = excluded.ar_u_root, "
-            + "updated_at = datetime('now');\n"
-        )
+        yield [_escape_sql_value(value) for value in row]
+
+
+def generate_inserts(cursor: sqlite3.Cursor, rows_per_statement: int = 1) -> Iterator[str]:
+    """Yield upserts, one row each or compacted into multi-row VALUES lists."""
+    rows = iter_value_rows(cursor)
+    if rows_per_statement > 1:
+        yield from batch_values(rows, INSERT_PREFIX.rstrip() + "\n", "\n" + UPSERT_CLAUSE, rows_per_statement)
+        return
+    for values in rows:
+        yield INSERT_PREFIX + "(" + ", ".join(values) + ") " + UPSERT_CLAUSE
 
 
 def parse_args() -> argparse.Namespace:
@@ -88,12 +87,8 @@ def parse_args() -> argparse.Namespace:
         default=Path("database/d1.db"),
         help="Local D1 SQLite database containing ar_u_quran_ayah_words.",
     )
-    parser.add_argument(
-        "--chunk-size",
-        type=int,
-        default=250,
-        help="Number of INSERT statements per chunk file.",
-    )
+    add_chunk_arguments(parser, 250, "INSERT")
+    add_compact_argument(parser)
     parser.add_argument(
         "--out-dir",
         type=Path,
@@ -111,7 +106,7 @@ def parse_args() -> argparse.Namespace:
 def write_chunk(out_dir: Path, chunk_index: int, chunk: List[str]) -> Path:
     path = out_dir / f"ar-u-quran-ayah-words-{chunk_index:03}.sql"
     with path.open("w", encoding="utf-8") as fh:
-        fh.write("PRAGMA foreign_keys=OFF;\n")
+        fh.write(CHUNK_HEADER)
         for stmt in chunk:
             fh.write(stmt)
     return path
@@ -127,14 +122,14 @@ def main() -> None:
             existing.unlink()
     conn = sqlite3.connect(args.target_db)
     cursor = conn.cursor()
-    inserts = generate_inserts(cursor)
+    inserts = generate_inserts(cursor, args.rows_per_statement)
     written = 0
     paths: List[Path] = []
-    for chunk_index, chunk in chunked_iterator(inserts, args.chunk_size):
+    for chunk_index, chunk, size in plan_chunks(inserts, args.chunk_size, args.max_chunk_bytes, CHUNK_HEADER):
         path = write_chunk(args.out_dir, chunk_index, chunk)
         paths.append(path)
         written += len(chunk)
-        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements) to {path}")
+        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements, {size} bytes) to {path}")
     conn.close()
     if written == 0:
         print("No statements exported.")
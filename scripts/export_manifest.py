@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+
+# Manifests map a row key to the hash of the statements last exported for
+# it. Bump the version when statement text changes shape so every row is
+# exported again.
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+# A manifest waiting for its export to be applied (see stage_manifest).
+PENDING_SUFFIX = ".pending"
+# The apply_sql_chunks.py target (its executor's ``target``) the exports are
+# meant for: wrangler against the remote knowledgemap D1 database.
+DEFAULT_APPLY_TARGET = "d1-knowledgemap-remote"
+
+T = TypeVar("T")
+
+
+def default_manifest_path(out: Path) -> Path:
+    """Keep the manifest next to the export, e.g. word-updates.sql.manifest.json."""
+    return out.with_name(out.name + MANIFEST_SUFFIX)
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    rows = data.get("rows")
+    return rows if isinstance(rows, dict) else {}
+
+
+def save_manifest(path: Path, hashes: Dict[str, str]) -> None:
+    _write_json(path, {"version": MANIFEST_VERSION, "rows": hashes})
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def add_apply_target_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--apply-target",
+        default=DEFAULT_APPLY_TARGET,
+        help=(
+            "apply_sql_chunks.py target whose apply advances the manifest, as it prints it "
+            f"(default: {DEFAULT_APPLY_TARGET}; e.g. sqlite-d1 for --local-db database/d1.db). "
+            "Applying anywhere else leaves the manifest alone."
+        ),
+    )
+
+
+def pending_manifest_path(out_dir: Path, manifest_path: Path) -> Path:
+    return out_dir / (manifest_path.name + PENDING_SUFFIX)
+
+
+def stage_manifest(
+    manifest_path: Path,
+    hashes: Dict[str, str],
+    out_dir: Path,
+    outputs: Sequence[Path],
+    target: str = DEFAULT_APPLY_TARGET,
+) -> Optional[Path]:
+    """Save ``hashes`` as the manifest once ``outputs`` have been applied to ``target``.
+
+    Saving right after the export would skip the rows of an export that is
+    never applied, so the manifest is parked in ``out_dir`` together with the
+    hash of every output file, and apply_sql_chunks.py promotes it after
+    applying them to ``target`` (see promote_manifests); a trial apply to a
+    local copy must not hide the rows from the next export for the real
+    target. With no outputs there is nothing to wait for and the manifest is
+    saved at once. Returns the pending file, or None when the manifest was
+    saved.
+    """
+    pending_path = pending_manifest_path(out_dir, manifest_path)
+    if not outputs:
+        save_manifest(manifest_path, hashes)
+        pending_path.unlink(missing_ok=True)
+        return None
+    _write_json(
+        pending_path,
+        {
+            "version": MANIFEST_VERSION,
+            "manifest": str(manifest_path.resolve()),
+            "target": target,
+            "outputs": {path.name: file_sha256(path) for path in outputs},
+            "rows": hashes,
+        },
+    )
+    return pending_path
+
+
+def promote_manifests(directory: Path, target: str, applied: Dict[str, str]) -> List[Path]:
+    """Save the pending manifests in ``directory`` staged for ``target`` whose outputs are all applied.
+
+    ``applied`` maps file names to the hash of the content that was applied
+    to ``target``. Returns the manifests that were saved.
+    """
+    promoted = []
+    for pending_path in sorted(directory.glob("*" + MANIFEST_SUFFIX + PENDING_SUFFIX)):
+        try:
+            data = json.loads(pending_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            continue
+        if data.get("target") != target:
+            continue
+        outputs = data.get("outputs") or {}
+        if not outputs or any(applied.get(name) != digest for name, digest in outputs.items()):
+            continue
+        manifest_path = Path(data["manifest"])
+        save_manifest(manifest_path, data.get("rows") or {})
+        pending_path.unlink()
+        promoted.append(manifest_path)
+    return promoted
+
+
+class ChangedStatements(Generic[T]):
+    """Filter keyed statements down to rows whose content changed since the last export.
+
+    Items are fed as ``(key, item)`` pairs with equal keys next to each
+    other; the statement text of one key (``render(item)``, or the item
+    itself when it already is a statement) is hashed together. ``hashes``
+    collects the new manifest, which is only saved once the export has been
+    applied (see stage_manifest).
+    """
+
+    def __init__(self, previous: Dict[str, str]) -> None:
+        self.previous = previous
+        self.hashes: Dict[str, str] = {}
+        self.changed_keys = 0
+
+    def filter(
+        self,
+        keyed: Iterable[Tuple[str, T]],
+        render: Optional[Callable[[T], str]] = None,
+    ) -> Iterator[T]:
+        current_key = None
+        group: List[T] = []
+        for key, item in keyed:
+            if key != current_key and group:
+                yield from self._emit(current_key, group, render)
+                group = []
+            current_key = key
+            group.append(item)
+        if group:
+            yield from self._emit(current_key, group, render)
+
+    def _emit(self, key: str, group: List[T], render: Optional[Callable[[T], str]]) -> List[T]:
+        text = "".join(render(item) for item in group) if render else "".join(group)
+        digest = sha256_text(text)
+        self.hashes[key] = digest
+        if self.previous.get(key) == digest:
+            return []
+        self.changed_keys += 1
+        return group
+
+    @property
+    def removed_keys(self) -> int:
+        return sum(1 for key in self.previous if key not in self.hashes)
@@ -1,35 +1,20 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sqlite3
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
-from quran_words import _parse_word_row
+from ayah_words_json import BASE_WORD_KEYS, WORDS_ENCODERS, WordsEncoder, add_words_format_argument, encode_words
+from quran_words import iter_word_columns, load_word_columns
 
 
-COLUMNS = [
-    "id",
-    "aya",
-    "sura",
-    "position",
-    "verse_key",
-    "text",
-    "simple",
-    "juz",
-    "hezb",
-    "rub",
-    "page",
-    "class_name",
-    "line",
-    "code",
-    "code_v3",
-    "char_type",
-    "audio",
-    "translation",
-]
+# Dump columns, in the key order of the JSON word objects.
+COLUMNS = BASE_WORD_KEYS
+ID, AYA, SURA, POSITION, PAGE = (COLUMNS.index(name) for name in ("id", "aya", "sura", "position", "page"))
+
+Word = List[Any]
 
 INT_COLUMNS = {
     "id",
@@ -66,6 +51,15 @@ def parse_args() -> argparse.Namespace:
         default=Path("database/migrations/seed-ar_quran_ayah_words.sql"),
         help="Output SQL file with UPDATE statements.",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Group consecutive dump rows by ayah and merge them with the lemma/root rows read in ayah order, "
+            "holding one ayah in memory at a time (the dump must be ordered by ayah)."
+        ),
+    )
+    add_words_format_argument(parser)
     return parser.parse_args()
 
 
@@ -83,118 +77,207 @@ def coerce_value(column: str, raw: Optional[str]) -> Any:
     return value
 
 
-def parse_rows(path: Path) -> Dict[Tuple[int, int], List[Dict[str, Any]]]:
-    grouped: Dict[Tuple[int, int], List[Dict[str, Any]]] = defaultdict(list)
+def parse_row(columns: List[str]) -> Optional[Word]:
+    """Coerce one dump row to its word values in COLUMNS order; lemma/root get appended later."""
+    if len(columns) < len(COLUMNS):
+        return None
+    row = [coerce_value(name, columns[idx]) for idx, name in enumerate(COLUMNS)]
+    if not isinstance(row[SURA], int) or not isinstance(row[AYA], int):
+        return None
+    return row
+
+
+def parse_rows(path: Path) -> Dict[Tuple[int, int], List[Word]]:
+    grouped: Dict[Tuple[int, int], List[Word]] = defaultdict(list)
+    for columns in load_word_columns(path):
+        row = parse_row(columns)
+        if row is not None:
+            grouped[(row[SURA], row[AYA])].append(row)
+    return grouped
+
+
+def iter_ayah_groups(path: Path) -> Iterator[Tuple[Tuple[int, int], List[Word]]]:
+    """Stream the dump and yield the rows of each ayah as soon as the next ayah starts.
+
+    Only one ayah is held in memory, which relies on the dump being ordered by
+    (sura, aya); an ayah that starts again after a later one raises SystemExit.
+    """
+    current: Optional[Tuple[int, int]] = None
+    items: List[Word] = []
     with path.open(encoding="utf-8") as fh:
-        for line in fh:
-            columns = _parse_word_row(line)
-            if not columns or len(columns) < len(COLUMNS):
+        for columns in iter_word_columns(fh):
+            row = parse_row(columns)
+            if row is None:
                 continue
-            row: Dict[str, Any] = {}
-            for idx, name in enumerate(COLUMNS):
-                raw_value = columns[idx] if idx < len(columns) else None
-                row[name] = coerce_value(name, raw_value)
-            surah = row.get("sura")
-            ayah = row.get("aya")
-            if not isinstance(surah, int) or not isinstance(ayah, int):
-                continue
-            grouped[(surah, ayah)].append(row)
-    return grouped
+            key = (row[SURA], row[AYA])
+            if key != current:
+                if current is not None:
+                    if key < current:
+                        raise SystemExit(
+                            f"{path} is not ordered by ayah ({key[0]}:{key[1]} after {current[0]}:{current[1]}); "
+                            "rerun without --stream."
+                        )
+                    yield current, items
+                current = key
+                items = []
+            items.append(row)
+    if current is not None:
+        yield current, items
 
 
-def load_lemma_root_map(db_path: Path) -> Dict[Tuple[int, int, int], Dict[str, Optional[str]]]:
+LEMMA_ROOT_SQL = """
+    SELECT
+      q.surah,
+      q.ayah,
+      q.token_index,
+      l.lemma_text,
+      l.lemma_text_clean,
+      t.ar_u_root,
+      r.root,
+      r.root_norm
+    FROM quran_ayah_lemma_location q
+    LEFT JOIN quran_ayah_lemmas l ON l.lemma_id = q.lemma_id
+    LEFT JOIN ar_u_tokens t ON t.ar_u_token = q.ar_u_token
+    LEFT JOIN ar_u_roots r ON r.ar_u_root = t.ar_u_root
+"""
+
+# Same rows in ayah order for the streaming merge. Location ids break ties
+# so the first row per word is the one the full scan above keeps.
+LEMMA_ROOT_ORDERED_SQL = LEMMA_ROOT_SQL + """
+    WHERE typeof(q.surah) = 'integer'
+      AND typeof(q.ayah) = 'integer'
+      AND typeof(q.token_index) = 'integer'
+    ORDER BY q.surah, q.ayah, q.token_index, q.id
+"""
+
+
+def lemma_root_value(row: Tuple[Any, ...]) -> Dict[str, Optional[str]]:
+    _, _, _, lemma_text, lemma_clean, ar_u_root, root, root_norm = row
+    return {
+        "lemma": lemma_clean or lemma_text,
+        "root": root or root_norm or ar_u_root,
+    }
+
+
+def open_db(db_path: Path) -> sqlite3.Connection:
     if not db_path.exists():
         raise SystemExit(f"Missing DB file: {db_path}")
+    return sqlite3.connect(db_path)
 
-    conn = sqlite3.connect(db_path)
+
+def load_lemma_root_map(db_path: Path) -> Dict[Tuple[int, int, int], Dict[str, Optional[str]]]:
+    conn = open_db(db_path)
     cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT
-          q.surah,
-          q.ayah,
-          q.token_index,
-          l.lemma_text,
-          l.lemma_text_clean,
-          t.ar_u_root,
-          r.root,
-          r.root_norm
-        FROM quran_ayah_lemma_location q
-        LEFT JOIN quran_ayah_lemmas l ON l.lemma_id = q.lemma_id
-        LEFT JOIN ar_u_tokens t ON t.ar_u_token = q.ar_u_token
-        LEFT JOIN ar_u_roots r ON r.ar_u_root = t.ar_u_root
-        """
-    )
+    cursor.execute(LEMMA_ROOT_SQL)
 
     mapping: Dict[Tuple[int, int, int], Dict[str, Optional[str]]] = {}
     for row in cursor.fetchall():
-        surah, ayah, token_index, lemma_text, lemma_clean, ar_u_root, root, root_norm = row
+        surah, ayah, token_index = row[:3]
         if not isinstance(surah, int) or not isinstance(ayah, int) or not isinstance(token_index, int):
             continue
         key = (surah, ayah, token_index)
         if key in mapping:
             continue
-        lemma_value = lemma_clean or lemma_text
-        root_value = root or root_norm or ar_u_root
-        mapping[key] = {
-            "lemma": lemma_value,
-            "root": root_value,
-        }
+        mapping[key] = lemma_root_value(row)
 
     conn.close()
     return mapping
 
 
+def iter_ayah_lemma_roots(
+    cursor: sqlite3.Cursor,
+) -> Iterator[Tuple[Tuple[int, int], Dict[int, Dict[str, Optional[str]]]]]:
+    """Yield ``((surah, ayah), {token_index: lemma/root})`` per ayah, in ayah order."""
+    current: Optional[Tuple[int, int]] = None
+    words: Dict[int, Dict[str, Optional[str]]] = {}
+    for row in cursor.execute(LEMMA_ROOT_ORDERED_SQL):
+        key = (row[0], row[1])
+        if key != current:
+            if current is not None:
+                yield current, words
+            current = key
+            words = {}
+        if row[2] not in words:
+            words[row[2]] = lemma_root_value(row)
+    if current is not None:
+        yield current, words
+
+
+def iter_streamed_ayahs(
+    path: Path, cursor: sqlite3.Cursor
+) -> Iterator[Tuple[Tuple[int, int], List[Word], Dict[int, Dict[str, Optional[str]]]]]:
+    """Merge the ayah-ordered dump with the ayah-ordered lemma/root rows."""
+    lemma_roots = iter_ayah_lemma_roots(cursor)
+    pending = next(lemma_roots, None)
+    for key, items in iter_ayah_groups(path):
+        while pending is not None and pending[0] < key:
+            pending = next(lemma_roots, None)
+        if pending is not None and pending[0] == key:
+            yield key, items, pending[1]
+        else:
+            yield key, items, {}
+
+
+def write_ayah_update(
+    fh: TextIO,
+    surah: int,
+    ayah: int,
+    items: List[Word],
+    lemma_roots: Dict[int, Dict[str, Optional[str]]],
+    encode: WordsEncoder = encode_words,
+) -> None:
+    items.sort(key=lambda item: (item[POSITION] or 0, item[ID] or 0))
+    page_value = None
+    for item in items:
+        page = item[PAGE]
+        if isinstance(page, int):
+            page_value = page
+            break
+    for item in items:
+        position = item[POSITION]
+        if isinstance(position, int) and position in lemma_roots:
+            lemma_root = lemma_roots[position]
+            item.append(lemma_root.get("lemma"))
+            item.append(lemma_root.get("root"))
+    payload = encode(items)
+    escaped = payload.replace("'", "''")
+    if page_value is None:
+        fh.write(f"UPDATE ar_quran_ayah SET words = '{escaped}' WHERE surah = {surah} AND ayah = {ayah};\n")
+    else:
+        fh.write(
+            "UPDATE ar_quran_ayah SET words = '{words}', page = {page} "
+            "WHERE surah = {surah} AND ayah = {ayah};\n".format(
+                words=escaped, page=page_value, surah=surah, ayah=ayah
+            )
+        )
+
+
 def main() -> None:
     args = parse_args()
     if not args.input.exists():
         raise SystemExit(f"Missing input file: {args.input}")
 
-    grouped = parse_rows(args.input)
-    lemma_root_map = load_lemma_root_map(args.db)
-
     args.output.parent.mkdir(parents=True, exist_ok=True)
+    encode = WORDS_ENCODERS[args.words_format]
+    written = 0
     with args.output.open("w", encoding="utf-8") as fh:
         fh.write("-- Seed ar_quran_ayah.words using the Salam Quran words dump.\n")
-        for (surah, ayah) in sorted(grouped.keys()):
-            items = grouped[(surah, ayah)]
-            items.sort(key=lambda item: (item.get("position") or 0, item.get("id") or 0))
-            page_value = None
-            for item in items:
-                page = item.get("page")
-                if isinstance(page, int):
-                    page_value = page
-                    break
-            for item in items:
-                key = (
-                    item.get("sura"),
-                    item.get("aya"),
-                    item.get("position"),
-                )
-                if (
-                    isinstance(key[0], int)
-                    and isinstance(key[1], int)
-                    and isinstance(key[2], int)
-                    and key in lemma_root_map
-                ):
-                    lemma_root = lemma_root_map[key]
-                    item["lemma"] = lemma_root.get("lemma")
-                    item["root"] = lemma_root.get("root")
-            payload = json.dumps(items, ensure_ascii=False, separators=(",", ":"))
-            escaped = payload.replace("'", "''")
-            if page_value is None:
-                fh.write(
-                    f"UPDATE ar_quran_ayah SET words = '{escaped}' WHERE surah = {surah} AND ayah = {ayah};\n"
-                )
-            else:
-                fh.write(
-                    "UPDATE ar_quran_ayah SET words = '{words}', page = {page} "
-                    "WHERE surah = {surah} AND ayah = {ayah};\n".format(
-                        words=escaped, page=page_value, surah=surah, ayah=ayah
-                    )
-                )
-
-    print(f"Wrote {len(grouped)} ayah updates to {args.output}")
+        if args.stream:
+            conn = open_db(args.db)
+            for (surah, ayah), items, lemma_roots in iter_streamed_ayahs(args.input, conn.cursor()):
+                write_ayah_update(fh, surah, ayah, items, lemma_roots, encode)
+                written += 1
+            conn.close()
+        else:
+            grouped = parse_rows(args.input)
+            by_ayah: Dict[Tuple[int, int], Dict[int, Dict[str, Optional[str]]]] = defaultdict(dict)
+            for (surah, ayah, token_index), value in load_lemma_root_map(args.db).items():
+                by_ayah[(surah, ayah)][token_index] = value
+            for (surah, ayah) in sorted(grouped.keys()):
+                write_ayah_update(fh, surah, ayah, grouped[(surah, ayah)], by_ayah.get((surah, ayah), {}), encode)
+                written += 1
+
+    print(f"Wrote {written} ayah updates to {args.output}")
 
 
 if __name__ == "__main__":
@@ -4,7 +4,26 @@ import argparse
 import math
 import sqlite3
 from pathlib import Path
-from typing import Iterator, Tuple, Union
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from export_manifest import ChangedStatements, add_apply_target_argument, load_manifest, stage_manifest
+from sql_chunks import add_chunk_arguments, add_compact_argument, batch_values, plan_chunks
+
+
+LocationRow = Tuple[int, int, int, Optional[str], Optional[str]]
+
+# Multi-row form: one UPDATE ... FROM (VALUES ...) per batch of locations.
+COMPACT_UPDATE_PREFIX = (
+    "UPDATE quran_ayah_lemma_location\n"
+    "SET word_simple = v.column4, word_diacritic = v.column5\n"
+    "FROM (VALUES\n"
+)
+COMPACT_UPDATE_SUFFIX = (
+    "\n) AS v\n"
+    "WHERE quran_ayah_lemma_location.surah = v.column1\n"
+    "  AND quran_ayah_lemma_location.ayah = v.column2\n"
+    "  AND quran_ayah_lemma_location.token_index = v.column3;\n"
+)
 
 
 def _escape_sql_string(value: Union[str, None]) -> str:
@@ -13,39 +32,64 @@ def _escape_sql_string(value: Union[str, None]) -> str:
     return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
 
 
-def chunked_iterator(iterator: Iterator[str], chunk_size: int) -> Iterator[Tuple[int, list]]:
-    chunk: list[str] = []
-    index = 1
-    for stmt in iterator:
-        chunk.append(stmt)
-        if len(chunk) >= chunk_size:
-            yield index, chunk
-            index += 1
-            chunk = []
-    if chunk:
-        yield index, chunk
-
-
-def generate_updates(cursor: sqlite3.Cursor) -> Iterator[str]:
+def iter_locations(cursor: sqlite3.Cursor) -> Iterator[LocationRow]:
     query = """
         SELECT surah, ayah, token_index, word_simple, word_diacritic
         FROM quran_ayah_lemma_location
         WHERE word_simple IS NOT NULL OR word_diacritic IS NOT NULL
-        ORDER BY surah, ayah, token_index
+        ORDER BY surah, ayah, token_index, id
     """
-    for surah, ayah, token_index, word_simple, word_diacritic in cursor.execute(query):
-        yield (
-            "UPDATE quran_ayah_lemma_location\n"
-            "SET word_simple = %s, word_diacritic = %s\n"
-            "WHERE surah = %s AND ayah = %s AND token_index = %s;\n"
-            % (
-                _escape_sql_string(word_simple),
-                _escape_sql_string(word_diacritic),
-                surah,
-                ayah,
-                token_index,
-            )
+    return cursor.execute(query)
+
+
+def location_key(row: LocationRow) -> str:
+    return f"{row[0]}:{row[1]}:{row[2]}"
+
+
+def render_update(row: LocationRow) -> str:
+    surah, ayah, token_index, word_simple, word_diacritic = row
+    return (
+        "UPDATE quran_ayah_lemma_location\n"
+        "SET word_simple = %s, word_diacritic = %s\n"
+        "WHERE surah = %s AND ayah = %s AND token_index = %s;\n"
+        % (
+            _escape_sql_string(word_simple),
+            _escape_sql_string(word_diacritic),
+            surah,
+            ayah,
+            token_index,
         )
+    )
+
+
+def compact_updates(rows: Iterable[LocationRow], rows_per_statement: int) -> Iterator[str]:
+    """Batch location updates into UPDATE ... FROM (VALUES ...) statements.
+
+    Several lemma rows can share a location. Run one after another, the last
+    UPDATE wins, while UPDATE ... FROM picks an arbitrary matching VALUES row,
+    so only the last row of each location is kept.
+    """
+
+    def last_per_location() -> Iterator[List[str]]:
+        previous: Optional[LocationRow] = None
+        for row in rows:
+            if previous is not None and previous[:3] != row[:3]:
+                yield literals(previous)
+            previous = row
+        if previous is not None:
+            yield literals(previous)
+
+    def literals(row: LocationRow) -> List[str]:
+        surah, ayah, token_index, word_simple, word_diacritic = row
+        return [
+            str(surah),
+            str(ayah),
+            str(token_index),
+            _escape_sql_string(word_simple),
+            _escape_sql_string(word_diacritic),
+        ]
+
+    return batch_values(last_per_location(), COMPACT_UPDATE_PREFIX, COMPACT_UPDATE_SUFFIX, rows_per_statement)
 
 
 def parse_args() -> argparse.Namespace:
@@ -56,12 +100,8 @@ def parse_args() -> argparse.Namespace:
         default=Path("database/d1.db"),
         help="Local D1 SQLite database containing the updated surface words.",
     )
-    parser.add_argument(
-        "--chunk-size",
-        type=int,
-        default=500,
-        help="Number of UPDATE statements per chunk file.",
-    )
+    add_chunk_arguments(parser, 500, "UPDATE")
+    add_compact_argument(parser)
     parser.add_argument(
         "--out-dir",
         type=Path,
@@ -69,9 +109,19 @@ def parse_args() -> argparse.Namespace:
         help="Directory where chunk files will be written.",
     )
     parser.add_argument(
-        "--cleanup",
+        "--manifest",
+        type=Path,
+        default=None,
+        help=(
+            "Content-hash manifest of the last applied export (default: <out-dir>/word-updates.manifest.json). "
+            "apply_sql_chunks.py updates it once every chunk of this export is applied to --apply-target."
+        ),
+    )
+    add_apply_target_argument(parser)
+    parser.add_argument(
+        "--full",
         action="store_true",
-        help="Delete existing chunk files before writing new ones.",
+        help="Export every row regardless of the manifest (the manifest is still refreshed).",
     )
     return parser.parse_args()
 
@@ -89,20 +139,34 @@ def main() -> None:
     if not args.target_db.exists():
         raise SystemExit(f"Local D1 missing: {args.target_db}")
     args.out_dir.mkdir(exist_ok=True, parents=True)
-    if args.cleanup:
-        for existing in sorted(args.out_dir.glob("word-updates-*.sql")):
-            existing.unlink()
+    # Chunks of an earlier export would be applied around the new ones and
+    # could restore stale values. Whatever they held that was not applied is
+    # exported again, since the manifest only advances on apply.
+    for existing in sorted(args.out_dir.glob("word-updates-*.sql")):
+        existing.unlink()
+    manifest_path = args.manifest or args.out_dir / "word-updates.manifest.json"
+    changes = ChangedStatements({} if args.full else load_manifest(manifest_path))
     conn = sqlite3.connect(args.target_db)
     cursor = conn.cursor()
-    updates = generate_updates(cursor)
+    rows = changes.filter(((location_key(row), row) for row in iter_locations(cursor)), render_update)
+    if args.rows_per_statement > 1:
+        updates = compact_updates(rows, args.rows_per_statement)
+    else:
+        updates = (render_update(row) for row in rows)
     written = 0
     paths: list[Path] = []
-    for chunk_index, chunk in chunked_iterator(updates, args.chunk_size):
+    for chunk_index, chunk, size in plan_chunks(updates, args.chunk_size, args.max_chunk_bytes):
         path = write_chunk(args.out_dir, chunk_index, chunk)
         paths.append(path)
         written += len(chunk)
-        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements) to {path}")
+        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements, {size} bytes) to {path}")
     conn.close()
+    pending_path = stage_manifest(manifest_path, changes.hashes, args.out_dir, paths, args.apply_target)
+    print(
+        f"{changes.changed_keys} of {len(changes.hashes)} locations changed since the last applied export "
+        f"({changes.removed_keys} no longer present); "
+        + (f"manifest staged in {pending_path} until applied." if pending_path else f"manifest {manifest_path}.")
+    )
     total_chunks = len(paths)
     total_statements = written
     if total_statements == 0:
@@ -112,7 +176,7 @@ def main() -> None:
         f"Exported {total_statements} statements across {total_chunks} chunk(s); "
         f"chunks live under {args.out_dir}."
     )
-    print("Execute the chunks sequentially with `wrangler d1 execute knowledgemap --file <chunk>.sql --remote`.")
+    print(f"Apply them in order with `python3 scripts/apply_sql_chunks.py {args.out_dir} --remote`.")
 
 
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ import sqlite3
 from pathlib import Path
 from typing import Iterator, Tuple, Union
 
+from export_manifest import ChangedStatements, add_apply_target_argument, default_manifest_path, load_manifest, stage_manifest
+
 
 def _escape_sql_string(value: Union[str, None]) -> str:
     if value is None:
@@ -12,15 +14,16 @@ def _escape_sql_string(value: Union[str, None]) -> str:
     return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
 
 
-def generate_updates(cursor: sqlite3.Cursor) -> Iterator[str]:
+def generate_updates(cursor: sqlite3.Cursor) -> Iterator[Tuple[str, str]]:
+    """Yield (surah:ayah:token_index, UPDATE statement) pairs in location order."""
     query = """
         SELECT surah, ayah, token_index, word_simple, word_diacritic
         FROM quran_ayah_lemma_location
         WHERE word_simple IS NOT NULL OR word_diacritic IS NOT NULL
-        ORDER BY surah, ayah, token_index
+        ORDER BY surah, ayah, token_index, id
     """
     for surah, ayah, token_index, word_simple, word_diacritic in cursor.execute(query):
-        yield (
+        yield f"{surah}:{ayah}:{token_index}", (
             "UPDATE quran_ayah_lemma_location\n"
             "SET word_simple = %s, word_diacritic = %s\n"
             "WHERE surah = %s AND ayah = %s AND token_index = %s;\n"
@@ -53,6 +56,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Wrap the export in BEGIN/COMMIT (some targets require it). Cloudflare D1 rejects explicit transactions, so omit this flag there.",
     )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help=(
+            "Content-hash manifest of the last applied export (default: <out>.manifest.json). "
+            "apply_sql_chunks.py updates it once --out is applied to --apply-target."
+        ),
+    )
+    add_apply_target_argument(parser)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Export every row regardless of the manifest (the manifest is still refreshed).",
+    )
     return parser.parse_args()
 
 
@@ -60,17 +78,31 @@ def main() -> None:
     args = parse_args()
     if not args.target_db.exists():
         raise SystemExit(f"Local D1 database missing: {args.target_db}")
+    manifest_path = args.manifest or default_manifest_path(args.out)
+    changes = ChangedStatements({} if args.full else load_manifest(manifest_path))
     conn = sqlite3.connect(args.target_db)
     cursor = conn.cursor()
     with args.out.open("w", encoding="utf-8") as out:
         if args.transaction:
             out.write("BEGIN TRANSACTION;\n")
-        for stmt in generate_updates(cursor):
+        for stmt in changes.filter(generate_updates(cursor)):
             out.write(stmt)
         if args.transaction:
             out.write("COMMIT;\n")
     conn.close()
-    print(f"Wrote surface-word updates to {args.out} ({args.out.stat().st_size} bytes).")
+    # Overwriting --out is safe: rows of an export that was never applied
+    # are exported again, since the manifest only advances on apply.
+    outputs = [args.out] if changes.changed_keys else []
+    pending_path = stage_manifest(manifest_path, changes.hashes, args.out.parent, outputs, args.apply_target)
+    print(
+        f"Wrote surface-word updates for {changes.changed_keys} changed of {len(changes.hashes)} locations "
+        f"to {args.out} ({args.out.stat().st_size} bytes); "
+        + (f"manifest staged in {pending_path} until applied." if pending_path else f"manifest {manifest_path}.")
+    )
+    if pending_path:
+        print(
+            f"Apply it with `python3 scripts/apply_sql_chunks.py {args.out.parent} --pattern {args.out.name} --remote`."
+        )
 
 
 if __name__ == "__main__":
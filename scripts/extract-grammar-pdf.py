@@ -1,18 +1,26 @@
 import argparse
-import hashlib
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import fitz  # PyMuPDF
 
+from canonical_ids import GRAMMAR_IDS
+from export_manifest import add_apply_target_argument, default_manifest_path, file_sha256, load_manifest, sha256_text, stage_manifest
+from sql_chunks import add_chunk_arguments, plan_chunks
 
-def canonicalize(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip().lower()
 
+# More page ranges than workers keeps the pool busy when some pages (scans,
+# dense tables) take much longer to extract than others.
+PAGE_RANGES_PER_WORKER = 4
 
-def sha256_hex(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+# Stored with the PDF hash in the extraction manifest. Bump it whenever the
+# chapter/section detection or the generated SQL changes, so the next run
+# re-extracts an unchanged PDF instead of skipping it.
+EXTRACTION_VERSION = 1
+
+CHUNK_PREFIX = "grammar-units"
 
 
 def sql_escape(value):
@@ -34,13 +42,105 @@ def clean_lines(text: str):
     return cleaned
 
 
-def extract_toc_entries(doc, toc_page: int):
+def split_page_ranges(start: int, end: int, parts: int):
+    """Split pages start..end-1 into at most ``parts`` contiguous (start, end) ranges."""
+    count = end - start
+    parts = max(1, min(parts, count))
+    bounds = [start + count * index // parts for index in range(parts + 1)]
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def _extract_page_range(task):
+    pdf_path, start, end = task
+    # PyMuPDF documents cannot be shared across processes, so each task opens its own.
+    doc = fitz.open(pdf_path)
+    try:
+        return [doc.load_page(page_index).get_text("text") for page_index in range(start, end)]
+    finally:
+        doc.close()
+
+
+def extract_page_texts(pdf_path: Path, start: int, end: int, workers: int):
+    """Text of pages start..end-1, extracted in page ranges across a process pool and returned in page order."""
+    ranges = split_page_ranges(start, end, workers * PAGE_RANGES_PER_WORKER)
+    tasks = [(pdf_path, start, end) for start, end in ranges]
+    texts = []
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            texts.extend(_extract_page_range(task))
+        return texts
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(_extract_page_range, tasks):
+            texts.extend(chunk)
+    return texts
+
+
+class PageText:
+    """Text of each PDF page, extracted once and shared by every pass over the document.
+
+    ``text`` is the raw PyMuPDF text and ``lines`` its ``clean_lines``; both
+    are cached per page index (0-based) the first time they are asked for.
+    ``hash`` is the SHA-256 of a page's text and is kept after ``release``
+    drops the text of pages that are done with, which keeps the cache down
+    to one textbook at a time. With ``workers`` > 1, ``load_range`` extracts
+    a page range in parallel before it is scanned.
+    """
+
+    def __init__(self, doc, pdf_path=None, workers: int = 1):
+        self.doc = doc
+        self.pdf_path = pdf_path
+        self.workers = workers
+        self.page_count = doc.page_count
+        self._text = {}
+        self._lines = {}
+        self._hash = {}
+
+    def _load(self, page_index: int) -> str:
+        text = self.doc.load_page(page_index).get_text("text")
+        self._hash[page_index] = sha256_text(text)
+        return text
+
+    def text(self, page_index: int) -> str:
+        text = self._text.get(page_index)
+        if text is None:
+            text = self._text[page_index] = self._load(page_index)
+        return text
+
+    def lines(self, page_index: int):
+        lines = self._lines.get(page_index)
+        if lines is None:
+            lines = self._lines[page_index] = clean_lines(self.text(page_index))
+        return lines
+
+    def hash(self, page_index: int) -> str:
+        if page_index not in self._hash:
+            self._load(page_index)
+        return self._hash[page_index]
+
+    def load_range(self, start_page: int, end_page: int) -> None:
+        """Extract pages start_page..end_page (1-based, inclusive) across the worker pool."""
+        start, end = start_page - 1, min(end_page, self.page_count)
+        if self.workers <= 1 or self.pdf_path is None or end <= start:
+            return
+        for page_index, text in enumerate(extract_page_texts(self.pdf_path, start, end, self.workers), start):
+            if page_index not in self._text:
+                self._text[page_index] = text
+                self._hash[page_index] = sha256_text(text)
+
+    def release(self, start_page: int, end_page: int) -> None:
+        for page_index in range(start_page - 1, end_page):
+            self._text.pop(page_index, None)
+            self._lines.pop(page_index, None)
+
+
+def extract_toc_entries(pages: PageText, toc_page: int):
     lines = []
     started = False
-    for page_index in range(toc_page - 1, min(toc_page + 4, doc.page_count)):
-        text = doc.load_page(page_index).get_text("text")
+    for page_index in range(toc_page - 1, min(toc_page + 4, pages.page_count)):
+        text = pages.text(page_index)
         if not text:
             continue
+        # The TOC keeps page-number-only lines, so it reads the raw text rather than clean_lines.
         page_lines = [line.strip() for line in text.splitlines() if line.strip()]
         if not started and not any("TABLE OF CONTENTS" in ln.upper() for ln in page_lines):
             continue
@@ -99,14 +199,13 @@ def parse_toc_entries(entries):
     return chapters, sections
 
 
-def find_chapters(doc, start_page, end_page, toc_titles):
+def find_chapters(pages: PageText, start_page, end_page, toc_titles):
     chapters = []
     current = None
     for page_index in range(start_page - 1, end_page):
-        text = doc.load_page(page_index).get_text("text")
-        if not text:
+        if not pages.text(page_index):
             continue
-        lines = clean_lines(text)
+        lines = pages.lines(page_index)
         head = " ".join(lines[:12]).upper()
         if "CHAPTER" not in head:
             continue
@@ -137,32 +236,53 @@ def find_chapters(doc, start_page, end_page, toc_titles):
     return chapters
 
 
-def find_section_starts(doc, chapter, sections):
+def section_number_pattern(numbers):
+    """One regex finding every ``numbers`` entry at word boundaries, as ``\\b<number>\\b`` would.
+
+    The lookahead makes matches zero-width, so numbers sharing characters
+    (say "2.1" and "1.2" in "2.1.2") are all found. Longer numbers come first
+    in the alternation; TOC section numbers are "N.M", so at most one of
+    them can match at any position anyway.
+    """
+    alternation = "|".join(re.escape(number) for number in sorted(set(numbers), key=len, reverse=True))
+    return re.compile(rf"(?=\b({alternation})\b)")
+
+
+def find_section_starts(pages: PageText, chapter, sections):
     chapter_num = chapter["number"]
     chapter_start = chapter["start_page"]
     chapter_end = chapter["end_page"]
-    found = []
-    for section in sections:
-        if section["chapter_number"] != chapter_num:
-            continue
-        section_number = section["number"]
-        if not section_number:
+    chapter_sections = [
+        section for section in sections if section["chapter_number"] == chapter_num and section["number"]
+    ]
+    if not chapter_sections:
+        return []
+
+    # One pass over the chapter's page heads: each section starts on the first
+    # page whose head mentions its number.
+    pending = {section["number"] for section in chapter_sections}
+    pattern = section_number_pattern(pending)
+    start_pages = {}
+    for page_index in range(chapter_start - 1, chapter_end):
+        if not pending:
+            break
+        if not pages.text(page_index):
             continue
-        pattern = re.compile(rf"\b{re.escape(section_number)}\b")
-        start_page = None
-        for page_index in range(chapter_start - 1, chapter_end):
-            text = doc.load_page(page_index).get_text("text")
-            if not text:
-                continue
-            head = " ".join(clean_lines(text)[:8])
-            if pattern.search(head):
-                start_page = page_index + 1
-                break
+        head = " ".join(pages.lines(page_index)[:8])
+        for match in pattern.finditer(head):
+            number = match.group(1)
+            if number in pending:
+                pending.discard(number)
+                start_pages[number] = page_index + 1
+
+    found = []
+    for section in chapter_sections:
+        start_page = start_pages.get(section["number"])
         if start_page:
             found.append(
                 {
                     "chapter_number": chapter_num,
-                    "number": section_number,
+                    "number": section["number"],
                     "title": section["title"],
                     "start_page": start_page,
                 }
@@ -170,18 +290,128 @@ def find_section_starts(doc, chapter, sections):
     return found
 
 
-def extract_text_range(doc, start_page, end_page):
+def extract_text_range(pages: PageText, start_page, end_page):
     parts = []
     for page in range(start_page - 1, end_page):
-        text = doc.load_page(page).get_text("text")
-        if not text:
+        if not pages.text(page):
             continue
-        lines = clean_lines(text)
-        parts.append("\n".join(lines))
+        parts.append("\n".join(pages.lines(page)))
     return "\n".join(parts).strip()
 
 
-def build_units(doc, source_identifier):
+class ExtractionChanges:
+    """Compare one extraction with the manifest of the previous one.
+
+    The manifest (export_manifest format) maps "pdf" to the extraction
+    version and PDF hash and "page:<n>" to the hash of each page's text.
+    "content:<item id>" holds the inputs of a content item (title, page
+    range and the hashes of those pages), "item:<id>" marks the items the
+    last run wrote and "unit:<id>" holds the hash of the statements last
+    emitted for a unit. Items whose inputs are unchanged are not
+    re-extracted, and only changed rows are emitted. Rows are compared per
+    id, all occurrences together, because a chapter detected twice shares
+    its id and the last statement for it wins.
+    """
+
+    def __init__(self, previous, pdf_key: str, pages: PageText) -> None:
+        self.previous = previous
+        self.pages = pages
+        self.hashes = {"pdf": pdf_key}
+        self.changed_pages = 0
+        self.skipped_items = 0
+        self.total_units = 0
+        self.changed_rows = {"unit": 0, "item": 0}
+
+    def content_unchanged(self, item_id, specs) -> bool:
+        parts = []
+        for spec in specs:
+            end_page = min(spec["end_page"], self.pages.page_count)
+            page_hashes = [self.pages.hash(page_index) for page_index in range(spec["start_page"] - 1, end_page)]
+            pages_hash = sha256_text("|".join(page_hashes))
+            parts.append(f"{spec['title']}|{spec['start_page']}|{spec['end_page']}|{pages_hash}")
+        fingerprint = sha256_text("\n".join(parts))
+        self.hashes[f"content:{item_id}"] = fingerprint
+        if self.previous.get(f"content:{item_id}") != fingerprint:
+            return False
+        item_key = f"item:{item_id}"
+        if item_key in self.previous:
+            self.hashes[item_key] = fingerprint
+            self.skipped_items += 1
+        return True
+
+    def item_written(self, item_id) -> None:
+        self.hashes[f"item:{item_id}"] = self.hashes[f"content:{item_id}"]
+        self.changed_rows["item"] += 1
+
+    def unit_changed(self, unit_id, statements) -> bool:
+        self.total_units += len(statements)
+        digest = sha256_text("\n".join(statements))
+        self.hashes[f"unit:{unit_id}"] = digest
+        if self.previous.get(f"unit:{unit_id}") == digest:
+            return False
+        self.changed_rows["unit"] += len(statements)
+        return True
+
+    def removed(self, kind: str):
+        prefix = f"{kind}:"
+        return sorted(key[len(prefix) :] for key in self.previous if key.startswith(prefix) and key not in self.hashes)
+
+    def record_pages(self) -> None:
+        """Add every page's hash to the manifest (pages no unit covers are extracted here just to hash them)."""
+        for page_index in range(self.pages.page_count):
+            page_hash = self.pages.hash(page_index)
+            self.hashes[f"page:{page_index + 1}"] = page_hash
+            if self.previous.get(f"page:{page_index + 1}") != page_hash:
+                self.changed_pages += 1
+
+
+def content_spec(unit_id, title, start_page, end_page):
+    return {
+        "id": GRAMMAR_IDS.digest(f"GRAMITEM|{unit_id}|1"),
+        "unit_id": unit_id,
+        "title": title,
+        "start_page": start_page,
+        "end_page": end_page,
+    }
+
+
+def content_items(pages: PageText, specs, changes=None):
+    """Extract the content item of each spec, skipping empty ranges and, given ``changes``, unchanged items."""
+    unchanged = set()
+    if changes is not None:
+        by_id = {}
+        for spec in specs:
+            by_id.setdefault(spec["id"], []).append(spec)
+        unchanged = {item_id for item_id, group in by_id.items() if changes.content_unchanged(item_id, group)}
+    for spec in specs:
+        if spec["id"] in unchanged:
+            continue
+        content = extract_text_range(pages, spec["start_page"], spec["end_page"])
+        if not content:
+            continue
+        if changes is not None:
+            changes.item_written(spec["id"])
+        yield {
+            "id": spec["id"],
+            "unit_id": spec["unit_id"],
+            "item_type": "content",
+            "title": spec["title"],
+            "content": content,
+            "content_ar": None,
+            "order_index": 1,
+            "meta": None,
+        }
+
+
+def build_units(doc, source_identifier, pages=None):
+    """Detect the books, chapters and sections of the PDF, one textbook at a time.
+
+    Yields ``(units, specs)`` per book: its unit rows and one content spec
+    per unit that gets a content item (``content_items`` turns the specs
+    into items). When the caller asks for the next book, the page text of
+    the previous one is dropped from the cache.
+    """
+    pages = pages or PageText(doc)
     books = [
         {
             "key": "nahw_textbook",
@@ -216,7 +446,7 @@ def build_units(doc, source_identifier):
     for book in books:
         if not book["toc_page"]:
             continue
-        entries = extract_toc_entries(doc, book["toc_page"])
+        entries = extract_toc_entries(pages, book["toc_page"])
         chapters, sections = parse_toc_entries(entries)
         toc_titles[book["key"]] = {item["number"]: item["title"] for item in chapters}
         toc_sections[book["key"]] = sections
@@ -240,18 +470,18 @@ def build_units(doc, source_identifier):
         "sarf_textbook": start_pages["advanced_nahw"] - 1,
         "advanced_nahw": start_pages["advanced_structures"] - 1,
         "advanced_structures": start_pages["balagha"] - 1,
-        "balagha": doc.page_count,
+        "balagha": pages.page_count,
     }
 
-    units = []
-    items = []
-
     for book in books:
         book_key = book["key"]
         book_start = start_pages[book_key]
         book_end = end_pages[book_key]
+        pages.load_range(book_start, book_end)
+        units = []
+        items = []
 
-        book_unit_id = sha256_hex(canonicalize(f"GRAMUNIT|{book_key}|book"))
+        book_unit_id = GRAMMAR_IDS.digest(f"GRAMUNIT|{book_key}|book")
         units.append(
             {
                 "id": book_unit_id,
@@ -290,7 +520,7 @@ def build_units(doc, source_identifier):
                     if idx + 1 < len(balagha_chapters)
                     else book_end
                 )
-                chapter_id = sha256_hex(canonicalize(f"GRAMUNIT|{book_key}|chapter|{chapter['number']:02d}"))
+                chapter_id = GRAMMAR_IDS.digest(f"GRAMUNIT|{book_key}|chapter|{chapter['number']:02d}")
                 units.append(
                     {
                         "id": chapter_id,
@@ -305,25 +535,13 @@ def build_units(doc, source_identifier):
                         "meta": {"chapter_number": chapter["number"]},
                     }
                 )
-                content = extract_text_range(doc, chapter["start_page"], chapter_end)
-                if content:
-                    item_id = sha256_hex(canonicalize(f"GRAMITEM|{chapter_id}|1"))
-                    items.append(
-                        {
-                            "id": item_id,
-                            "unit_id": chapter_id,
-                            "item_type": "content",
-                            "title": chapter["title"],
-                            "content": content,
-                            "content_ar": None,
-                            "order_index": 1,
-                            "meta": None,
-                        }
-                    )
+                items.append(content_spec(chapter_id, chapter["title"], chapter["start_page"], chapter_end))
+            yield units, items
+            pages.release(book_start, book_end)
             continue
 
         # chapters for other books
-        chapters = find_chapters(doc, book_start, book_end, toc_titles.get(book_key, {}))
+        chapters = find_chapters(pages, book_start, book_end, toc_titles.get(book_key, {}))
         # set end pages
         for idx, chapter in enumerate(chapters):
             chapter_end = chapters[idx + 1]["start_page"] - 1 if idx + 1 < len(chapters) else book_end
@@ -332,9 +550,7 @@ def build_units(doc, source_identifier):
         sections_list = toc_sections.get(book_key, [])
 
         for chapter in chapters:
-            chapter_id = sha256_hex(
-                canonicalize(f"GRAMUNIT|{book_key}|chapter|{chapter['number']:02d}")
-            )
+            chapter_id = GRAMMAR_IDS.digest(f"GRAMUNIT|{book_key}|chapter|{chapter['number']:02d}")
             units.append(
                 {
                     "id": chapter_id,
@@ -350,7 +566,7 @@ def build_units(doc, source_identifier):
                 }
             )
 
-            section_starts = find_section_starts(doc, chapter, sections_list)
+            section_starts = find_section_starts(pages, chapter, sections_list)
             if section_starts:
                 # set end pages for sections
                 section_starts.sort(key=lambda s: s["start_page"])
@@ -360,11 +576,7 @@ def build_units(doc, source_identifier):
                         if idx + 1 < len(section_starts)
                         else chapter["end_page"]
                     )
-                    section_id = sha256_hex(
-                        canonicalize(
-                            f"GRAMUNIT|{book_key}|section|{section['number']}"
-                        )
-                    )
+                    section_id = GRAMMAR_IDS.digest(f"GRAMUNIT|{book_key}|section|{section['number']}")
                     units.append(
                         {
                             "id": section_id,
@@ -382,89 +594,204 @@ def build_units(doc, source_identifier):
                             },
                         }
                     )
-                    content = extract_text_range(doc, section["start_page"], section_end)
-                    if content:
-                        item_id = sha256_hex(canonicalize(f"GRAMITEM|{section_id}|1"))
-                        items.append(
-                            {
-                                "id": item_id,
-                                "unit_id": section_id,
-                                "item_type": "content",
-                                "title": section["title"],
-                                "content": content,
-                                "content_ar": None,
-                                "order_index": 1,
-                                "meta": None,
-                            }
-                        )
+                    items.append(content_spec(section_id, section["title"], section["start_page"], section_end))
             else:
-                content = extract_text_range(doc, chapter["start_page"], chapter["end_page"])
-                if content:
-                    item_id = sha256_hex(canonicalize(f"GRAMITEM|{chapter_id}|1"))
-                    items.append(
-                        {
-                            "id": item_id,
-                            "unit_id": chapter_id,
-                            "item_type": "content",
-                            "title": chapter["title"],
-                            "content": content,
-                            "content_ar": None,
-                            "order_index": 1,
-                            "meta": None,
-                        }
-                    )
+                items.append(
+                    content_spec(chapter_id, chapter["title"], chapter["start_page"], chapter["end_page"])
+                )
 
-    return units, items
+        yield units, items
+        pages.release(book_start, book_end)
+
+
+UNIT_UPSERT_CLAUSE = (
+    " ON CONFLICT(id) DO UPDATE SET parent_id = excluded.parent_id, unit_type = excluded.unit_type, "
+    "order_index = excluded.order_index, title = excluded.title, title_ar = excluded.title_ar, "
+    "source_id = excluded.source_id, start_page = excluded.start_page, end_page = excluded.end_page, "
+    "meta_json = excluded.meta_json, updated_at = datetime('now');"
+)
+ITEM_UPSERT_CLAUSE = (
+    " ON CONFLICT(id) DO UPDATE SET unit_id = excluded.unit_id, item_type = excluded.item_type, "
+    "title = excluded.title, content = excluded.content, content_ar = excluded.content_ar, "
+    "order_index = excluded.order_index, meta_json = excluded.meta_json, updated_at = datetime('now');"
+)
+
+
+# Upserts rather than INSERT OR REPLACE: replacing a unit row would cascade
+# (ON DELETE CASCADE) to child units and items that an incremental run does
+# not re-emit.
+def unit_statement(unit, source_identifier):
+    meta_json = json.dumps(unit["meta"]) if unit.get("meta") else None
+    return (
+        "INSERT INTO ar_grammar_units "
+        "(id, parent_id, unit_type, order_index, title, title_ar, source_id, start_page, end_page, meta_json) VALUES "
+        f"({sql_escape(unit['id'])}, {sql_escape(unit['parent_id'])}, {sql_escape(unit['unit_type'])}, "
+        f"{sql_escape(unit['order_index'])}, {sql_escape(unit['title'])}, {sql_escape(unit['title_ar'])}, "
+        f"(SELECT id FROM ar_sources WHERE identifier = {sql_escape(source_identifier)} ORDER BY id DESC LIMIT 1), "
+        f"{sql_escape(unit['start_page'])}, {sql_escape(unit['end_page'])}, {sql_escape(meta_json)})"
+        + UNIT_UPSERT_CLAUSE
+    )
 
 
-def generate_sql(units, items, source_identifier, source_title):
-    statements = []
-    statements.append(
-        "INSERT INTO ar_sources (source_type, title, identifier, notes) "
-        f"VALUES ('grammar_textbook', {sql_escape(source_title)}, {sql_escape(source_identifier)}, 'Imported from PDF') ;"
+def item_statement(item):
+    meta_json = json.dumps(item["meta"]) if item.get("meta") else None
+    return (
+        "INSERT INTO ar_grammar_unit_items "
+        "(id, unit_id, item_type, title, content, content_ar, order_index, meta_json) VALUES "
+        f"({sql_escape(item['id'])}, {sql_escape(item['unit_id'])}, {sql_escape(item['item_type'])}, "
+        f"{sql_escape(item['title'])}, {sql_escape(item['content'])}, {sql_escape(item['content_ar'])}, "
+        f"{sql_escape(item['order_index'])}, {sql_escape(meta_json)})"
+        + ITEM_UPSERT_CLAUSE
     )
 
-    for unit in units:
-        meta_json = json.dumps(unit["meta"]) if unit.get("meta") else None
-        statements.append(
-            "INSERT OR REPLACE INTO ar_grammar_units "
-            "(id, parent_id, unit_type, order_index, title, title_ar, source_id, start_page, end_page, meta_json) VALUES "
-            f"({sql_escape(unit['id'])}, {sql_escape(unit['parent_id'])}, {sql_escape(unit['unit_type'])}, "
-            f"{sql_escape(unit['order_index'])}, {sql_escape(unit['title'])}, {sql_escape(unit['title_ar'])}, "
-            f"(SELECT id FROM ar_sources WHERE identifier = {sql_escape(source_identifier)} ORDER BY id DESC LIMIT 1), "
-            f"{sql_escape(unit['start_page'])}, {sql_escape(unit['end_page'])}, {sql_escape(meta_json)});"
-        )
 
-    for item in items:
-        meta_json = json.dumps(item["meta"]) if item.get("meta") else None
-        statements.append(
-            "INSERT OR REPLACE INTO ar_grammar_unit_items "
-            "(id, unit_id, item_type, title, content, content_ar, order_index, meta_json) VALUES "
-            f"({sql_escape(item['id'])}, {sql_escape(item['unit_id'])}, {sql_escape(item['item_type'])}, "
-            f"{sql_escape(item['title'])}, {sql_escape(item['content'])}, {sql_escape(item['content_ar'])}, "
-            f"{sql_escape(item['order_index'])}, {sql_escape(meta_json)});"
+def grammar_statements(doc, pages: PageText, source_identifier, source_title, changes=None):
+    """Yield the SQL of an extraction as it is produced, one book's units and then its items at a time."""
+    # The source row is only created by a full extraction; incremental runs
+    # point changed units at the source row that is already there.
+    if changes is None or not changes.previous:
+        yield (
+            "INSERT INTO ar_sources (source_type, title, identifier, notes) "
+            f"VALUES ('grammar_textbook', {sql_escape(source_title)}, {sql_escape(source_identifier)}, 'Imported from PDF') ;"
         )
 
-    return "\n".join(statements)
+    for units, specs in build_units(doc, source_identifier, pages):
+        unit_statements = [(unit["id"], unit_statement(unit, source_identifier)) for unit in units]
+        changed_units = None
+        if changes is not None:
+            by_id = {}
+            for unit_id, statement in unit_statements:
+                by_id.setdefault(unit_id, []).append(statement)
+            changed_units = {unit_id for unit_id, group in by_id.items() if changes.unit_changed(unit_id, group)}
+        for unit_id, statement in unit_statements:
+            if changed_units is None or unit_id in changed_units:
+                yield statement
+        for item in content_items(pages, specs, changes):
+            yield item_statement(item)
+
+    if changes is not None:
+        # Rows that disappeared go last. Deleting a unit cascades to its items
+        # and child units, but children that still exist were re-parented and
+        # re-emitted above, so the cascade no longer reaches them.
+        for row_id in changes.removed("item"):
+            yield f"DELETE FROM ar_grammar_unit_items WHERE id = {sql_escape(row_id)};"
+        for row_id in changes.removed("unit"):
+            yield f"DELETE FROM ar_grammar_units WHERE id = {sql_escape(row_id)};"
+
+
+def write_sql_file(path: Path, statements) -> int:
+    count = 0
+    with path.open("w", encoding="utf-8") as fh:
+        for statement in statements:
+            if count:
+                fh.write("\n")
+            fh.write(statement)
+            count += 1
+    return count
+
+
+def write_sql_chunks(chunk_dir: Path, statements, max_statements: int, max_bytes: int):
+    """Stream statements into size-bounded <chunk_dir>/grammar-units-NNN.sql files.
+
+    Returns the statement count and the chunk paths.
+    """
+    count = 0
+    paths = []
+    lines = (statement + "\n" for statement in statements)
+    for chunk_index, chunk, size in plan_chunks(lines, max_statements, max_bytes):
+        path = chunk_dir / f"{CHUNK_PREFIX}-{chunk_index:03}.sql"
+        with path.open("w", encoding="utf-8") as fh:
+            fh.writelines(chunk)
+        count += len(chunk)
+        paths.append(path)
+        print(f"Wrote chunk {chunk_index} ({len(chunk)} statements, {size} bytes) to {path}")
+    return count, paths
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--pdf", required=True)
     parser.add_argument("--out", default="/tmp/grammar_textbook_import.sql")
+    parser.add_argument(
+        "--chunk-dir",
+        type=Path,
+        default=None,
+        help=f"Write size-bounded {CHUNK_PREFIX}-NNN.sql chunk files to this directory instead of --out.",
+    )
+    add_chunk_arguments(parser, 200, "unit/item")
     parser.add_argument("--source-title", default="Dream Textbook")
     parser.add_argument("--source-identifier", default="dream_textbook_pdf")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for extracting page text (default 1: extract pages as they are needed).",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help=(
+            "Extraction manifest of the last applied run "
+            f"(default: <out>.manifest.json, or <chunk-dir>/{CHUNK_PREFIX}.manifest.json). "
+            "apply_sql_chunks.py updates it once the output of this run is applied to --apply-target."
+        ),
+    )
+    add_apply_target_argument(parser)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Extract and emit every unit and item regardless of the manifest (the manifest is still refreshed).",
+    )
     args = parser.parse_args()
 
     pdf_path = Path(args.pdf)
     if not pdf_path.exists():
         raise SystemExit(f"PDF not found: {pdf_path}")
+    out_path = Path(args.out)
+    if args.chunk_dir is not None:
+        target = out_dir = args.chunk_dir
+        manifest_path = args.manifest or args.chunk_dir / f"{CHUNK_PREFIX}.manifest.json"
+    else:
+        target, out_dir = out_path, out_path.parent
+        manifest_path = args.manifest or default_manifest_path(out_path)
+    previous = {} if args.full else load_manifest(manifest_path)
+
+    pdf_key = f"{EXTRACTION_VERSION}:{file_sha256(pdf_path)}"
+    if previous.get("pdf") == pdf_key:
+        # Existing output (and its staged manifest) is left alone; it may
+        # still be waiting to be applied.
+        print(
+            f"{pdf_path} is unchanged since the last applied extraction ({manifest_path}); "
+            f"wrote no statements and left {target} as it was."
+        )
+        return
+
+    if args.chunk_dir is not None:
+        args.chunk_dir.mkdir(parents=True, exist_ok=True)
+        # Chunks from the last run would otherwise mix with (or outnumber) the
+        # new ones. Whatever they held that was not applied is emitted again,
+        # since the manifest only advances on apply.
+        for existing in sorted(args.chunk_dir.glob(f"{CHUNK_PREFIX}-*.sql")):
+            existing.unlink()
 
     doc = fitz.open(pdf_path)
-    units, items = build_units(doc, args.source_identifier)
-    sql = generate_sql(units, items, args.source_identifier, args.source_title)
-    Path(args.out).write_text(sql, encoding="utf-8")
-    print(f"Wrote {len(units)} units and {len(items)} items to {args.out}")
+    pages = PageText(doc, pdf_path, args.workers)
+    changes = ExtractionChanges(previous, pdf_key, pages)
+    statements = grammar_statements(doc, pages, args.source_identifier, args.source_title, changes)
+    if args.chunk_dir is not None:
+        written, outputs = write_sql_chunks(args.chunk_dir, statements, args.chunk_size, args.max_chunk_bytes)
+    else:
+        written = write_sql_file(out_path, statements)
+        outputs = [out_path] if written else []
+    changes.record_pages()
+    pending_path = stage_manifest(manifest_path, changes.hashes, out_dir, outputs, args.apply_target)
+    print(
+        f"Wrote {written} statements to {target}: {changes.changed_rows['unit']} of {changes.total_units} units and "
+        f"{changes.changed_rows['item']} items ({changes.skipped_items} unchanged items not re-extracted, "
+        f"{changes.changed_pages} changed pages); "
+        + (f"manifest staged in {pending_path} until applied." if pending_path else f"manifest {manifest_path}.")
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def add_fast_load_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fast-load",
+        action="store_true",
+        help=(
+            "Bulk-load mode: journal off, synchronous off, secondary indexes dropped during the "
+            "load and rebuilt afterwards, then verified and ANALYZEd. Ignored with --dry-run."
+        ),
+    )
+
+
+class FastLoad:
+    """Bulk-load settings for a local SQLite seed of the D1 database.
+
+    Use it as ``with FastLoad(conn, tables, enabled=...):`` around the load.
+    ``start`` (on entry) switches the journal and sync PRAGMAs off and drops
+    the non-unique indexes of ``tables`` (unique indexes stay because the
+    upserts' ON CONFLICT targets need them). ``finish`` (on a clean exit)
+    recreates the dropped indexes, runs ``PRAGMA quick_check``, ANALYZEs the
+    tables and restores the original PRAGMAs; ``abort`` (when the block
+    raises) puts the indexes and PRAGMAs back without the checks. All are
+    no-ops when the mode is disabled.
+
+    With the journal off a failed load cannot be rolled back, so callers
+    disable fast-load for dry runs.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, tables: Sequence[str], enabled: bool = True) -> None:
+        self.conn = conn
+        self.tables = list(tables)
+        self.enabled = enabled
+        self.dropped: List[Tuple[str, str]] = []
+        self._pragmas: Dict[str, object] = {}
+        self._started = 0.0
+
+    def __enter__(self) -> "FastLoad":
+        try:
+            self.start()
+        except BaseException:
+            self.abort()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        self.conn.commit()
+        self._started = time.perf_counter()
+        for pragma in ("journal_mode", "synchronous", "temp_store", "cache_size"):
+            self._pragmas[pragma] = self.conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("PRAGMA cache_size = -262144")
+
+        placeholders = ", ".join("?" for _ in self.tables)
+        rows = self.conn.execute(
+            f"""
+            SELECT m.name, m.sql
+            FROM sqlite_master AS m
+            WHERE m.type = 'index'
+              AND m.sql IS NOT NULL
+              AND m.tbl_name IN ({placeholders})
+              AND NOT EXISTS (
+                SELECT 1 FROM pragma_index_list(m.tbl_name) AS il
+                WHERE il.name = m.name AND il."unique"
+              )
+            ORDER BY m.name
+            """,
+            self.tables,
+        ).fetchall()
+        for name, sql in rows:
+            self.conn.execute(f'DROP INDEX "{name}"')
+            self.dropped.append((name, sql))
+        self.conn.commit()
+        if self.dropped:
+            print(f"Fast load: dropped {len(self.dropped)} secondary indexes.")
+
+    def finish(self) -> None:
+        """Rebuild dropped indexes, verify and ANALYZE; raises SystemExit if the check fails."""
+        if not self.enabled:
+            return
+        self.conn.commit()
+        rebuilt = time.perf_counter()
+        for _, sql in self.dropped:
+            self.conn.execute(sql)
+        self.conn.commit()
+        rebuilt = time.perf_counter() - rebuilt
+
+        missing = self._missing_indexes()
+        problems = [row[0] for row in self.conn.execute("PRAGMA quick_check")]
+        for table in self.tables:
+            self.conn.execute(f'ANALYZE "{table}"')
+        self.conn.commit()
+        self._restore_pragmas()
+
+        if missing:
+            raise SystemExit(f"Fast load: indexes missing after rebuild: {', '.join(missing)}")
+        if problems != ["ok"]:
+            raise SystemExit(f"Fast load: quick_check failed: {'; '.join(problems[:5])}")
+        elapsed = time.perf_counter() - self._started
+        print(
+            f"Fast load: rebuilt {len(self.dropped)} indexes in {rebuilt:.1f}s, "
+            f"quick_check ok, analyzed {len(self.tables)} tables ({elapsed:.1f}s total)."
+        )
+
+    def abort(self) -> None:
+        """Recreate dropped indexes and restore the PRAGMAs after a failed load.
+
+        The journal is off, so whatever the load wrote cannot be rolled back;
+        it is committed and indexed as it stands.
+        """
+        if not self.enabled or not self._pragmas:
+            return
+        try:
+            self.conn.commit()
+            for _, sql in self.dropped:
+                self.conn.execute(sql)
+            self.conn.commit()
+        finally:
+            self._restore_pragmas()
+        print(f"Fast load: load failed; recreated {len(self.dropped)} indexes and restored the PRAGMAs.")
+
+    def _missing_indexes(self) -> List[str]:
+        present = {
+            row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        return [name for name, _ in self.dropped if name not in present]
+
+    def _restore_pragmas(self) -> None:
+        journal_mode: Optional[object] = self._pragmas.get("journal_mode")
+        if journal_mode:
+            self.conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        for pragma in ("synchronous", "temp_store", "cache_size"):
+            if pragma in self._pragmas:
+                self.conn.execute(f"PRAGMA {pragma} = {int(self._pragmas[pragma])}")
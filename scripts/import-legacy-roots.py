@@ -4,26 +4,17 @@
 from __future__ import annotations
 
 import argparse
-import hashlib
 import json
-import re
 import sqlite3
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional
 
-CANONICAL_PREFIX = "ROOT|"
-
-
-def canonicalize(value: str) -> str:
-    normalized = re.sub(r"\s+", " ", value or "").strip()
-    return re.sub(r"[A-Z]", lambda match: match.group(0).lower(), normalized)
+from batch_writer import add_batch_arguments, open_writer
+from canonical_ids import ROOT_IDS
+from fast_load import FastLoad, add_fast_load_argument
 
-
-def sha256_hex(input_value: str) -> Tuple[str, str]:
-    canonical = canonicalize(input_value)
-    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
-    return digest, canonical
+CANONICAL_PREFIX = "ROOT|"
 
 
 def normalize_text(value: Any) -> Optional[str]:
@@ -70,7 +61,7 @@ def build_meta(row: sqlite3.Row) -> Optional[str]:
     return json.dumps(meta, ensure_ascii=False) if meta else None
 
 
-def migrate(db_path: Path, dry_run: bool) -> None:
+def migrate(db_path: Path, dry_run: bool, args: Optional[argparse.Namespace] = None) -> None:
     if not db_path.exists():
         raise SystemExit(f"Database not found at {db_path}")
 
@@ -125,60 +116,64 @@ def migrate(db_path: Path, dry_run: bool) -> None:
       updated_at = excluded.updated_at
   """
 
-    migrated = 0
-    for row in rows:
-        root = normalize_text(row["c3"])
-        if not root:
-            continue
-        root_norm = normalize_text(row["c17"]) or normalize_text(row["c5"])
-        if not root_norm:
-            continue
-
-        canonical_input = f"{CANONICAL_PREFIX}{root_norm}"
-        ar_u_root, canonical = sha256_hex(canonical_input)
-
-        payload = (
-            ar_u_root,
-            canonical,
-            root,
-            None,
-            None,
-            normalize_text(row["c5"]),
-            root_norm,
-            normalize_text(row["c7"]),
-            normalize_text(row["c10"]),
-            normalize_text(row["c11"]) or "active",
-            parse_int(normalize_text(row["c12"])),
-            normalize_text(row["c13"]),
-            normalize_text(row["c16"]),
-            build_meta(row),
-            normalize_text(row["c14"]),
-            normalize_text(row["c15"]),
-        )
+    with FastLoad(conn, ["ar_u_roots"], enabled=getattr(args, "fast_load", False) and not dry_run):
+        writer = open_writer(conn, insert_sql, args, "roots", dry_run=dry_run)
+        migrated = 0
+        for row in rows:
+            root = normalize_text(row["c3"])
+            if not root:
+                continue
+            root_norm = normalize_text(row["c17"]) or normalize_text(row["c5"])
+            if not root_norm:
+                continue
+
+            canonical_input = f"{CANONICAL_PREFIX}{root_norm}"
+            ar_u_root, canonical = ROOT_IDS.hash(canonical_input)
+
+            payload = (
+                ar_u_root,
+                canonical,
+                root,
+                None,
+                None,
+                normalize_text(row["c5"]),
+                root_norm,
+                normalize_text(row["c7"]),
+                normalize_text(row["c10"]),
+                normalize_text(row["c11"]) or "active",
+                parse_int(normalize_text(row["c12"])),
+                normalize_text(row["c13"]),
+                normalize_text(row["c16"]),
+                build_meta(row),
+                normalize_text(row["c14"]),
+                normalize_text(row["c15"]),
+            )
+
+            if dry_run:
+                print(f"Would migrate {root} ({root_norm}) → {ar_u_root}")
+            writer.add(payload)
+            migrated += 1
+        writer.close()
 
         if dry_run:
-            print(f"Would migrate {root} ({root_norm}) → {ar_u_root}")
+            print(f"Dry run: {migrated} rows would be touched.")
         else:
-            cursor.execute(insert_sql, payload)
-        migrated += 1
-
-    if dry_run:
-        print(f"Dry run: {migrated} rows would be touched.")
-    else:
-        conn.commit()
-        print(f"Migrated {migrated} legacy rows into ar_u_roots.")
+            conn.commit()
+            print(f"Migrated {migrated} legacy rows into ar_u_roots ({writer.rate():,.0f} rows/s).")
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Import tarteel.ai roots into ar_u_roots.")
     parser.add_argument("--db", type=Path, default=Path("database/d1.db"), help="Path to the SQLite database.")
     parser.add_argument("--dry-run", action="store_true", help="Show what would happen without modifying the database.")
+    add_batch_arguments(parser)
+    add_fast_load_argument(parser)
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
     try:
-        migrate(args.db, args.dry_run)
+        migrate(args.db, args.dry_run, args)
     except sqlite3.Error as exc:
         raise SystemExit(f"SQLite error: {exc}") from exc
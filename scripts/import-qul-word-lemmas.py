@@ -5,18 +5,26 @@ from __future__ import annotations
 
 import argparse
 import csv
-import hashlib
 import json
 import re
 import sqlite3
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
-
-DIACRITICS_RE = re.compile(
-    r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u08D3-\u08FF\u0591-\u05C7]+"
+from batch_writer import add_batch_arguments, open_writer
+from canonical_ids import RAW_IDS
+from fast_load import FastLoad, add_fast_load_argument
+from legacy_words import attach_database, choose_attached_table
+from root_keys import (
+    DIACRITICS_RE,
+    RootKeyIndex,
+    normalize_root_arabic,
+    refresh_root_keys,
+    register_root_key_functions,
+    root_key_sql,
 )
 
+
 POS_KEYWORDS: Dict[str, List[str]] = {
     "verb": ["verb", "v", "فعل", "fi", "fiʿl"],
     "noun": ["noun", "n", "ism", "اسم"],
@@ -37,14 +45,6 @@ def normalize_arabic(text: Optional[str]) -> str:
     return normalized
 
 
-def normalize_root_arabic(text: Optional[str]) -> str:
-    if not text:
-        return ""
-    cleaned = DIACRITICS_RE.sub("", text)
-    cleaned = "".join(cleaned.split())
-    return cleaned
-
-
 def canonical_pos(label: Optional[str]) -> Optional[str]:
     if not label or not label.strip():
         return None
@@ -82,21 +82,6 @@ def load_pos_mapping(path: Path) -> Dict[str, str]:
         return {row["word_location"]: row["pos"] for row in reader if row.get("pos")}
 
 
-def sha256_hex(value: str) -> str:
-    digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
-    return digest
-
-
-def build_root_lookup(target_conn: sqlite3.Connection) -> Dict[str, str]:
-    cursor = target_conn.execute("SELECT ar_u_root, root FROM ar_u_roots")
-    lookup: Dict[str, str] = {}
-    for row in cursor:
-        root_key = normalize_root_arabic(row[1])
-        if root_key:
-            lookup[root_key] = row[0]
-    return lookup
-
-
 def choose_table(conn: sqlite3.Connection, candidates: List[str]) -> Optional[str]:
     cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
     available = {row[0] for row in cursor}
@@ -141,64 +126,65 @@ def load_lemmas(lemmas_db: Path) -> Tuple[Dict[int, sqlite3.Row], List[Tuple[int
     return lemmas, word_rows
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Import QUL word lemma tokens.")
-    parser.add_argument("--lemmas-db", type=Path, required=True, help="Path to the Word Lemma SQLite file")
-    parser.add_argument("--roots-db", type=Path, required=True, help="Path to the Word Root SQLite file")
-    parser.add_argument("--target-db", type=Path, default=Path("database/d1.db"), help="Target D1 database")
-    parser.add_argument("--pos-file", type=Path, help="Optional word_location → POS mapping (CSV or JSON)")
-    parser.add_argument("--dry-run", action="store_true", help="Show what would be inserted without writing")
-    return parser.parse_args()
-
-
-def main() -> None:
-    args = parse_args()
-
-    if not args.lemmas_db.exists():
-        raise SystemExit(f"Word lemma database not found: {args.lemmas_db}")
-    if not args.roots_db.exists():
-        raise SystemExit(f"Word root database not found: {args.roots_db}")
-    if not args.target_db.exists():
-        raise SystemExit(f"Target database not found: {args.target_db}")
-
-    pos_map = load_pos_mapping(args.pos_file) if args.pos_file else {}
-
+def qul_root_norm(arabic_trilateral: Optional[str], english_trilateral: Optional[str]) -> Optional[str]:
+    english = (english_trilateral or "").replace(" ", "")
+    parts = [p for p in [english, normalize_root_arabic(arabic_trilateral)] if p]
+    return "|".join(parts) if parts else None
+
+
+def qul_root_fields(
+    root_keys: RootKeyIndex,
+    arabic_trilateral: Optional[str],
+    english_trilateral: Optional[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    # The last ar_u_roots row sharing a diacritic-free root wins.
+    ar_u_root_id = root_keys.resolve("ar", normalize_root_arabic(arabic_trilateral), True)
+    return qul_root_norm(arabic_trilateral, english_trilateral), ar_u_root_id
+
+
+def qul_token_meta(pos_label: Optional[str], location: Optional[str]) -> str:
+    meta: Dict[str, str] = {"source": "qul_word_lemma"}
+    if pos_label:
+        meta["pos_label"] = pos_label
+    if location:
+        meta["word_location"] = location
+    return json.dumps(meta, ensure_ascii=False)
+
+
+INSERT_STMT = """
+    INSERT INTO ar_u_tokens (
+        ar_u_token, canonical_input, lemma_ar, lemma_norm, pos,
+        root_norm, ar_u_root, features_json, meta_json
+    ) {source}
+    ON CONFLICT(ar_u_token) DO UPDATE SET
+        canonical_input = excluded.canonical_input,
+        lemma_ar = excluded.lemma_ar,
+        lemma_norm = excluded.lemma_norm,
+        pos = excluded.pos,
+        root_norm = excluded.root_norm,
+        ar_u_root = excluded.ar_u_root,
+        features_json = excluded.features_json,
+        meta_json = excluded.meta_json,
+        updated_at = datetime('now')
+"""
+
+
+def import_from_loaded(
+    args: argparse.Namespace,
+    target_conn: sqlite3.Connection,
+    pos_map: Dict[str, str],
+    stats: Dict[str, int],
+) -> None:
     lemmas, word_locations = load_lemmas(args.lemmas_db)
     word_roots = load_word_roots(args.roots_db)
-
-    target_conn = sqlite3.connect(args.target_db)
-    target_conn.row_factory = sqlite3.Row
-    root_lookup = build_root_lookup(target_conn)
+    root_keys = RootKeyIndex(target_conn)
 
     existing: set[Tuple[str, str]] = set()
     for row in target_conn.execute("SELECT lemma_norm, pos FROM ar_u_tokens"):
         existing.add((row["lemma_norm"], row["pos"]))
 
-    insert_stmt = """
-        INSERT INTO ar_u_tokens (
-            ar_u_token, canonical_input, lemma_ar, lemma_norm, pos,
-            root_norm, ar_u_root, features_json, meta_json
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(ar_u_token) DO UPDATE SET
-            canonical_input = excluded.canonical_input,
-            lemma_ar = excluded.lemma_ar,
-            lemma_norm = excluded.lemma_norm,
-            pos = excluded.pos,
-            root_norm = excluded.root_norm,
-            ar_u_root = excluded.ar_u_root,
-            features_json = excluded.features_json,
-            meta_json = excluded.meta_json,
-            updated_at = datetime('now')
-    """
-    cursor = target_conn.cursor()
-
-    stats = {
-        "processed": 0,
-        "inserted": 0,
-        "duplicates": 0,
-        "missing_root": 0,
-        "missing_lemma": 0,
-    }
+    insert_stmt = INSERT_STMT.format(source="VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    writer = open_writer(target_conn, insert_stmt, args, "tokens", dry_run=args.dry_run)
 
     for lemma_id, location in word_locations:
         stats["processed"] += 1
@@ -224,22 +210,15 @@ def main() -> None:
         root_norm = None
         ar_u_root_id = None
         if root_info:
-            normalized_root = normalize_root_arabic(root_info.get("arabic_trilateral"))
-            ar_u_root_id = root_lookup.get(normalized_root)
-            english = (root_info.get("english_trilateral") or "").replace(" ", "")
-            parts = [p for p in [english, normalized_root] if p]
-            if parts:
-                root_norm = "|".join(parts)
+            root_norm, ar_u_root_id = qul_root_fields(
+                root_keys,
+                root_info.get("arabic_trilateral"),
+                root_info.get("english_trilateral"),
+            )
         else:
             stats["missing_root"] += 1
 
-        meta: Dict[str, str] = {"source": "qul_word_lemma"}
-        if pos_label:
-            meta["pos_label"] = pos_label
-        if location:
-            meta["word_location"] = location
-
-        canonical_hash = sha256_hex(canonical_input)
+        canonical_hash = RAW_IDS.digest(canonical_input)
         params = (
             canonical_hash,
             canonical_input,
@@ -249,18 +228,225 @@ def main() -> None:
             root_norm,
             ar_u_root_id,
             None,
-            json.dumps(meta, ensure_ascii=False),
+            qul_token_meta(pos_label, location),
         )
 
         if args.dry_run:
             print("DRY", params)
-        else:
-            cursor.execute(insert_stmt, params)
+        writer.add(params)
         existing.add(key)
         stats["inserted"] += 1
 
+    writer.close()
     if not args.dry_run:
-        target_conn.commit()
+        print(f"Wrote {writer.summary()}")
+
+
+# Attached mode: every lemma word row is resolved in one INSERT ... SELECT
+# into qul_word_tokens, first occurrences of new (lemma_norm, pos) keys are
+# picked in SQL and written to ar_u_tokens with one more INSERT ... SELECT.
+ATTACHED_TEMP_TABLES_SQL = """
+    DROP TABLE IF EXISTS temp.qul_word_tokens;
+    DROP TABLE IF EXISTS temp.qul_existing_keys;
+    CREATE TEMP TABLE qul_word_tokens (
+      seq INTEGER PRIMARY KEY,
+      word_location TEXT,
+      lemma_found INTEGER NOT NULL,
+      lemma_ar TEXT,
+      lemma_norm TEXT,
+      pos TEXT,
+      pos_label TEXT,
+      root_found INTEGER NOT NULL,
+      arabic_trilateral TEXT,
+      english_trilateral TEXT
+    );
+    CREATE TEMP TABLE qul_existing_keys (
+      lemma_norm TEXT NOT NULL,
+      pos TEXT NOT NULL,
+      PRIMARY KEY (lemma_norm, pos)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO temp.qul_existing_keys (lemma_norm, pos)
+    SELECT lemma_norm, pos FROM ar_u_tokens
+    WHERE lemma_norm IS NOT NULL AND pos IS NOT NULL;
+"""
+
+ATTACHED_RESOLVE_SQL = """
+    INSERT INTO temp.qul_word_tokens (
+      word_location, lemma_found, lemma_ar, lemma_norm, pos, pos_label,
+      root_found, arabic_trilateral, english_trilateral
+    )
+    SELECT
+      lw.word_location,
+      l.id IS NOT NULL,
+      COALESCE(NULLIF(l.text, ''), NULLIF(l.text_clean, ''), ''),
+      normalize_arabic(COALESCE(NULLIF(l.text_clean, ''), NULLIF(l.text, ''), '')),
+      qul_canonical_pos(lw.word_location),
+      qul_pos_label(lw.word_location),
+      r.id IS NOT NULL,
+      r.arabic_trilateral,
+      r.english_trilateral
+    FROM legacy_lemma.{lemma_table} AS lw
+    LEFT JOIN legacy_lemma.lemmas AS l ON l.id = lw.lemma_id
+    LEFT JOIN (
+      SELECT word_location, root_id FROM legacy_root.{root_table}
+      WHERE rowid IN (
+        SELECT MAX(rowid) FROM legacy_root.{root_table} GROUP BY word_location
+      )
+    ) AS rw ON rw.word_location IS lw.word_location
+    LEFT JOIN legacy_root.roots AS r ON r.id = rw.root_id
+    ORDER BY lw.rowid
+"""
+
+ATTACHED_NEW_SEQS_SQL = """
+    DROP TABLE IF EXISTS temp.qul_new_seqs;
+    CREATE TEMP TABLE qul_new_seqs AS
+    SELECT t.seq
+    FROM temp.qul_word_tokens AS t
+    WHERE t.seq IN (
+      SELECT MIN(seq) FROM temp.qul_word_tokens
+      WHERE lemma_found AND lemma_norm <> ''
+      GROUP BY lemma_norm, pos
+    )
+      AND NOT EXISTS (
+        SELECT 1 FROM temp.qul_existing_keys AS e
+        WHERE e.lemma_norm = t.lemma_norm AND e.pos = t.pos
+      );
+"""
+
+ATTACHED_NEW_TOKENS_SQL = f"""
+    SELECT
+      sha256_hex(t.lemma_norm || '|' || t.pos),
+      t.lemma_norm || '|' || t.pos,
+      t.lemma_ar,
+      t.lemma_norm,
+      t.pos,
+      CASE WHEN t.root_found THEN qul_root_norm(t.arabic_trilateral, t.english_trilateral) END,
+      CASE WHEN t.root_found THEN
+        {root_key_sql("ar", "normalize_root_arabic(t.arabic_trilateral)", last_wins=True)}
+      END,
+      NULL,
+      qul_token_meta(t.pos_label, t.word_location)
+    FROM temp.qul_word_tokens AS t
+    WHERE t.seq IN (SELECT seq FROM temp.qul_new_seqs)
+    ORDER BY t.seq
+"""
+
+
+def import_from_attached(
+    args: argparse.Namespace,
+    target_conn: sqlite3.Connection,
+    pos_map: Dict[str, str],
+    stats: Dict[str, int],
+) -> None:
+    """Resolve lemma/root rows inside SQLite with the legacy databases ATTACHed."""
+    target_conn.create_function("normalize_arabic", 1, normalize_arabic, deterministic=True)
+    target_conn.create_function("sha256_hex", 1, RAW_IDS.digest, deterministic=True)
+    target_conn.create_function(
+        "qul_pos_label", 1, lambda location: pos_map.get(location), deterministic=True
+    )
+    target_conn.create_function(
+        "qul_canonical_pos",
+        1,
+        lambda location: canonical_pos(pos_map.get(location)) or "noun",
+        deterministic=True,
+    )
+    target_conn.create_function("qul_root_norm", 2, qul_root_norm, deterministic=True)
+    register_root_key_functions(target_conn)
+    target_conn.create_function("qul_token_meta", 2, qul_token_meta, deterministic=True)
+
+    attach_database(target_conn, args.lemmas_db, "legacy_lemma")
+    attach_database(target_conn, args.roots_db, "legacy_root")
+    lemma_table = choose_attached_table(target_conn, "legacy_lemma", ["word_lemmas", "lemma_words"])
+    if not lemma_table:
+        raise SystemExit("No lemma word table found in lemmas SQLite file.")
+    root_table = choose_attached_table(target_conn, "legacy_root", ["word_roots", "root_words"])
+    if not root_table:
+        raise SystemExit("No word_root table found in roots SQLite file.")
+
+    cursor = target_conn.cursor()
+    cursor.executescript(ATTACHED_TEMP_TABLES_SQL)
+    cursor.execute(ATTACHED_RESOLVE_SQL.format(lemma_table=lemma_table, root_table=root_table))
+
+    processed, missing_lemma, candidates = cursor.execute(
+        """
+        SELECT
+          COUNT(*),
+          COALESCE(SUM(NOT lemma_found), 0),
+          COALESCE(SUM(lemma_found AND lemma_norm <> ''), 0)
+        FROM temp.qul_word_tokens
+        """
+    ).fetchone()
+    cursor.executescript(ATTACHED_NEW_SEQS_SQL)
+    inserted, missing_root = cursor.execute(
+        """
+        SELECT COUNT(*), COALESCE(SUM(NOT root_found), 0)
+        FROM temp.qul_word_tokens
+        WHERE seq IN (SELECT seq FROM temp.qul_new_seqs)
+        """
+    ).fetchone()
+
+    if args.dry_run:
+        for params in cursor.execute(ATTACHED_NEW_TOKENS_SQL):
+            print("DRY", tuple(params))
+    else:
+        cursor.execute(INSERT_STMT.format(source=ATTACHED_NEW_TOKENS_SQL))
+
+    stats["processed"] += processed
+    stats["missing_lemma"] += missing_lemma
+    stats["duplicates"] += candidates - inserted
+    stats["missing_root"] += missing_root
+    stats["inserted"] += inserted
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import QUL word lemma tokens.")
+    parser.add_argument("--lemmas-db", type=Path, required=True, help="Path to the Word Lemma SQLite file")
+    parser.add_argument("--roots-db", type=Path, required=True, help="Path to the Word Root SQLite file")
+    parser.add_argument("--target-db", type=Path, default=Path("database/d1.db"), help="Target D1 database")
+    parser.add_argument("--pos-file", type=Path, help="Optional word_location → POS mapping (CSV or JSON)")
+    parser.add_argument(
+        "--attach-legacy",
+        action="store_true",
+        help="ATTACH the lemma/root SQLite files and resolve tokens in SQL instead of loading them into Python",
+    )
+    add_batch_arguments(parser)
+    add_fast_load_argument(parser)
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be inserted without writing")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if not args.lemmas_db.exists():
+        raise SystemExit(f"Word lemma database not found: {args.lemmas_db}")
+    if not args.roots_db.exists():
+        raise SystemExit(f"Word root database not found: {args.roots_db}")
+    if not args.target_db.exists():
+        raise SystemExit(f"Target database not found: {args.target_db}")
+
+    pos_map = load_pos_mapping(args.pos_file) if args.pos_file else {}
+
+    target_conn = sqlite3.connect(args.target_db)
+    target_conn.row_factory = sqlite3.Row
+    refresh_root_keys(target_conn, temporary=args.dry_run)
+
+    stats = {
+        "processed": 0,
+        "inserted": 0,
+        "duplicates": 0,
+        "missing_root": 0,
+        "missing_lemma": 0,
+    }
+
+    with FastLoad(target_conn, ["ar_u_tokens"], enabled=args.fast_load and not args.dry_run):
+        if args.attach_legacy:
+            import_from_attached(args, target_conn, pos_map, stats)
+        else:
+            import_from_loaded(args, target_conn, pos_map, stats)
+
+        if not args.dry_run:
+            target_conn.commit()
 
     target_conn.close()
 
@@ -4,12 +4,16 @@
 from __future__ import annotations
 
 import argparse
-import re
 import sqlite3
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
-from quran_words import _normalize_simple_spelling, _parse_word_row
+from batch_writer import add_batch_arguments, open_writer
+from fast_load import FastLoad, add_fast_load_argument
+from legacy_words import attach_database, parse_word_location, register_word_location_function
+from quran_word_index import QuranWordIndex, WordKey
+from quran_words import _normalize_simple_spelling, load_word_columns
+from root_keys import RootKeyIndex, normalize_root, refresh_root_keys, root_key_sql
 
 
 COLUMNS = [
@@ -46,32 +50,6 @@ INT_COLUMNS = {
 }
 
 
-def parse_word_location(location: str) -> Optional[Tuple[int, int, int]]:
-    """Parse word_location strings like 54:26:4 or DOC_QURAN_HAFS:12:23:TOK_05."""
-    if not location:
-        return None
-    parts = location.split(":")
-    if len(parts) < 3:
-        return None
-    try:
-        surah = int(parts[-3])
-        ayah = int(parts[-2])
-    except ValueError:
-        return None
-    token_part = parts[-1]
-    if token_part.upper().startswith("TOK_"):
-        try:
-            token_index = int(token_part.split("_")[-1])
-        except ValueError:
-            return None
-    else:
-        try:
-            token_index = int(token_part)
-        except ValueError:
-            return None
-    return surah, ayah, token_index
-
-
 def coerce_value(column: str, raw: Optional[str]) -> Optional[object]:
     if raw is None:
         return None
@@ -86,12 +64,6 @@ def coerce_value(column: str, raw: Optional[str]) -> Optional[object]:
     return value
 
 
-def normalize_root(value: Optional[str]) -> Optional[str]:
-    if not value:
-        return None
-    return re.sub(r"\s+", "", value.strip()) or None
-
-
 def ensure_table(cursor: sqlite3.Cursor) -> None:
     cursor.executescript(
         """
@@ -134,160 +106,128 @@ def ensure_table(cursor: sqlite3.Cursor) -> None:
     )
 
 
-def load_lemma_map(path: Path) -> Dict[Tuple[int, int, int], str]:
+def load_lemma_map(path: Path) -> QuranWordIndex:
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     lemmas = {
         row["id"]: row
         for row in conn.execute("SELECT id, text, text_clean FROM lemmas")
     }
-    mapping: Dict[Tuple[int, int, int], str] = {}
-    for row in conn.execute("SELECT lemma_id, word_location FROM lemma_words"):
-        key = parse_word_location(row["word_location"])
-        if not key or key in mapping:
-            continue
-        lemma_row = lemmas.get(row["lemma_id"])
-        if not lemma_row:
-            continue
-        lemma_text = lemma_row["text_clean"] or lemma_row["text"]
-        if lemma_text:
-            mapping[key] = lemma_text
+
+    def entries() -> Iterator[Tuple[WordKey, Tuple[Optional[str]]]]:
+        for row in conn.execute("SELECT lemma_id, word_location FROM lemma_words"):
+            key = parse_word_location(row["word_location"])
+            if not key:
+                continue
+            lemma_row = lemmas.get(row["lemma_id"])
+            if not lemma_row:
+                continue
+            lemma_text = lemma_row["text_clean"] or lemma_row["text"]
+            if lemma_text:
+                yield key, (lemma_text,)
+
+    index = QuranWordIndex.from_entries(entries(), ("lemma",), keep_first=True)
     conn.close()
-    return mapping
+    return index
 
 
-def load_root_map(path: Path) -> Dict[Tuple[int, int, int], Tuple[Optional[str], Optional[str]]]:
+def load_root_map(path: Path) -> QuranWordIndex:
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     roots = {
         row["id"]: row
         for row in conn.execute("SELECT id, arabic_trilateral, english_trilateral FROM roots")
     }
-    mapping: Dict[Tuple[int, int, int], Tuple[Optional[str], Optional[str]]] = {}
-    for row in conn.execute("SELECT root_id, word_location FROM root_words"):
-        key = parse_word_location(row["word_location"])
-        if not key or key in mapping:
-            continue
-        root_row = roots.get(row["root_id"])
-        if not root_row:
-            continue
-        root_text = normalize_root(root_row["arabic_trilateral"])
-        root_norm = (root_row["english_trilateral"] or "").strip() or None
-        if root_text or root_norm:
-            mapping[key] = (root_text, root_norm)
-    conn.close()
-    return mapping
-
-
-def build_root_lookup(
-    cursor: sqlite3.Cursor,
-) -> Tuple[Dict[str, str], Dict[str, str]]:
-    lookup: Dict[str, str] = {}
-    root_value_by_id: Dict[str, str] = {}
-    for row in cursor.execute(
-        "SELECT ar_u_root, root, root_norm, root_latn, arabic_trilateral FROM ar_u_roots"
-    ):
-        ar_u_root, root, root_norm, root_latn, arabic_trilateral = row
-        if ar_u_root and root:
-            root_value_by_id[ar_u_root] = root
-        candidates = [
-            root,
-            root_norm,
-            root_latn,
-            (root_latn or "").replace("-", "") if root_latn else None,
-            arabic_trilateral,
-            normalize_root(arabic_trilateral) if arabic_trilateral else None,
-            root.lower() if root else None,
-            root_norm.lower() if root_norm else None,
-            root_latn.lower() if root_latn else None,
-            (root_latn or "").replace("-", "").lower() if root_latn else None,
-        ]
-        for candidate in candidates:
-            if candidate and candidate not in lookup:
-                lookup[candidate] = ar_u_root
-    return lookup, root_value_by_id
-
-
-def iter_word_rows(path: Path) -> Iterable[Dict[str, object]]:
-    with path.open(encoding="utf-8") as fh:
-        for line in fh:
-            columns = _parse_word_row(line)
-            if not columns or len(columns) < len(COLUMNS):
-                continue
-            row: Dict[str, object] = {}
-            for idx, name in enumerate(COLUMNS):
-                raw_value = columns[idx] if idx < len(columns) else None
-                row[name] = coerce_value(name, raw_value)
-            simple = row.get("simple")
-            if isinstance(simple, str):
-                row["simple"] = _normalize_simple_spelling(simple)
-            yield row
 
+    def entries() -> Iterator[Tuple[WordKey, Tuple[Optional[str], Optional[str]]]]:
+        for row in conn.execute("SELECT root_id, word_location FROM root_words"):
+            key = parse_word_location(row["word_location"])
+            if not key:
+                continue
+            root_row = roots.get(row["root_id"])
+            if not root_row:
+                continue
+            root_text = normalize_root(root_row["arabic_trilateral"])
+            root_norm = (root_row["english_trilateral"] or "").strip() or None
+            if root_text or root_norm:
+                yield key, (root_text, root_norm)
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
-        description="Seed ar_u_quran_ayah_words and fix lemma/root."
-    )
-    parser.add_argument(
-        "--target-db",
-        type=Path,
-        default=Path("database/d1.db"),
-        help="Target SQLite database.",
-    )
-    parser.add_argument(
-        "--words-sql",
-        type=Path,
-        default=Path("database/salamquran_quran_words.sql"),
-        help="Path to salamquran_quran_words.sql",
-    )
-    parser.add_argument(
-        "--lemma-db",
-        type=Path,
-        default=Path("database/data/word-lemma.db"),
-        help="Path to word-lemma.db",
-    )
-    parser.add_argument(
-        "--root-db",
-        type=Path,
-        default=Path("database/data/word-root.db"),
-        help="Path to word-root.db",
-    )
-    parser.add_argument("--dry-run", action="store_true", help="Do not write changes.")
-    return parser.parse_args()
+    index = QuranWordIndex.from_entries(entries(), ("root", "root_norm"), keep_first=True)
+    conn.close()
+    return index
 
 
-def main() -> None:
-    args = parse_args()
-    if not args.target_db.exists():
-        raise SystemExit(f"Missing target DB: {args.target_db}")
-    if not args.words_sql.exists():
-        raise SystemExit(f"Missing words SQL: {args.words_sql}")
-    if not args.lemma_db.exists():
-        raise SystemExit(f"Missing lemma DB: {args.lemma_db}")
-    if not args.root_db.exists():
-        raise SystemExit(f"Missing root DB: {args.root_db}")
+def resolve_ar_u_root(
+    root_keys: RootKeyIndex, root_text: Optional[str], root_norm: Optional[str]
+) -> Optional[str]:
+    resolve = root_keys.resolve
+    ar_u_root = None
+    if root_text:
+        ar_u_root = resolve("spelling", root_text) or resolve("spelling", root_text.lower())
+    if not ar_u_root and root_norm:
+        ar_u_root = resolve("spelling", root_norm) or resolve("spelling", root_norm.lower())
+    return ar_u_root
 
-    lemma_map = load_lemma_map(args.lemma_db)
-    root_map = load_root_map(args.root_db)
 
-    conn = sqlite3.connect(args.target_db)
-    cursor = conn.cursor()
-    ensure_table(cursor)
-    cursor.execute(
-        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='ar_quran_ayah';"
+def iter_word_rows(path: Path, workers: int = 1) -> Iterable[Dict[str, object]]:
+    for columns in load_word_columns(path, workers=workers):
+        if len(columns) < len(COLUMNS):
+            continue
+        row: Dict[str, object] = {}
+        for idx, name in enumerate(COLUMNS):
+            raw_value = columns[idx] if idx < len(columns) else None
+            row[name] = coerce_value(name, raw_value)
+        simple = row.get("simple")
+        if isinstance(simple, str):
+            row["simple"] = _normalize_simple_spelling(simple)
+        yield row
+
+
+def iter_ayah_words(path: Path, workers: int = 1) -> Iterable[Tuple[WordKey, Dict[str, object]]]:
+    """Yield word rows keyed by (surah, ayah, word_index), numbering only char_type=word rows."""
+    current_key: Optional[Tuple[int, int]] = None
+    word_index = 0
+    for row in iter_word_rows(path, workers):
+        surah = row.get("sura")
+        ayah = row.get("aya")
+        position = row.get("position")
+        char_type = row.get("char_type")
+        if not isinstance(surah, int) or not isinstance(ayah, int) or not isinstance(position, int):
+            continue
+        if char_type != "word":
+            continue
+        if current_key != (surah, ayah):
+            current_key = (surah, ayah)
+            word_index = 0
+        word_index += 1
+        yield (surah, ayah, word_index), row
+
+
+def word_values(key: WordKey, row: Dict[str, object]) -> Tuple[object, ...]:
+    surah, ayah, word_index = key
+    return (
+        row.get("id"),
+        surah,
+        ayah,
+        word_index,
+        row.get("verse_key"),
+        row.get("text"),
+        row.get("simple"),
+        row.get("juz"),
+        row.get("hezb"),
+        row.get("rub"),
+        row.get("page"),
+        row.get("class_name"),
+        row.get("line"),
+        row.get("code"),
+        row.get("code_v3"),
+        row.get("char_type"),
+        row.get("audio"),
+        row.get("translation"),
     )
-    has_ayah_table = cursor.fetchone()[0] == 1
-    ayah_count = 0
-    if has_ayah_table:
-        ayah_count = cursor.execute("SELECT COUNT(*) FROM ar_quran_ayah;").fetchone()[0]
-    if has_ayah_table and ayah_count == 0:
-        cursor.execute("PRAGMA foreign_keys = OFF;")
-    else:
-        cursor.execute("PRAGMA foreign_keys = ON;")
-    root_lookup, root_value_by_id = build_root_lookup(cursor)
 
-    insert_sql = """
-        INSERT INTO ar_u_quran_ayah_words (
+
+WORD_COLUMNS = """
             word_id,
             surah,
             ayah,
@@ -305,13 +245,17 @@ def main() -> None:
             code_v3,
             char_type,
             audio,
-            translation,
+            translation"""
+
+INSERT_PREFIX = f"""
+        INSERT INTO ar_u_quran_ayah_words ({WORD_COLUMNS},
             lemma,
             root,
             ar_u_root,
             meta_json
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        )"""
+
+UPSERT_CLAUSE = """
         ON CONFLICT(surah, ayah, position, word_id) DO UPDATE SET
             verse_key = excluded.verse_key,
             text = excluded.text,
@@ -334,38 +278,151 @@ def main() -> None:
             updated_at = datetime('now');
     """
 
+INSERT_SQL = INSERT_PREFIX + """
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""" + UPSERT_CLAUSE
+
+# Attached-legacy mode: lemma/root rows are resolved inside SQLite into
+# these temp tables, joined against the staged Salam words and written with
+# one INSERT ... SELECT.
+LEGACY_TEMP_TABLES_SQL = f"""
+    DROP TABLE IF EXISTS temp.legacy_word_lemmas;
+    DROP TABLE IF EXISTS temp.legacy_word_roots;
+    DROP TABLE IF EXISTS temp.salam_words;
+    CREATE TEMP TABLE legacy_word_lemmas (
+      surah INTEGER NOT NULL,
+      ayah INTEGER NOT NULL,
+      position INTEGER NOT NULL,
+      lemma TEXT NOT NULL,
+      PRIMARY KEY (surah, ayah, position)
+    ) WITHOUT ROWID;
+    CREATE TEMP TABLE legacy_word_roots (
+      surah INTEGER NOT NULL,
+      ayah INTEGER NOT NULL,
+      position INTEGER NOT NULL,
+      root TEXT,
+      root_norm TEXT,
+      ar_u_root TEXT,
+      PRIMARY KEY (surah, ayah, position)
+    ) WITHOUT ROWID;
+    CREATE TEMP TABLE salam_words ({WORD_COLUMNS}
+    );
+"""
+
+LEGACY_LEMMAS_SQL = """
+    INSERT OR IGNORE INTO temp.legacy_word_lemmas (surah, ayah, position, lemma)
+    SELECT
+      word_location_part(lw.word_location, 0),
+      word_location_part(lw.word_location, 1),
+      word_location_part(lw.word_location, 2),
+      COALESCE(NULLIF(l.text_clean, ''), NULLIF(l.text, ''))
+    FROM legacy_lemma.lemma_words AS lw
+    JOIN legacy_lemma.lemmas AS l ON l.id = lw.lemma_id
+    WHERE word_location_part(lw.word_location, 2) IS NOT NULL
+      AND COALESCE(NULLIF(l.text_clean, ''), NULLIF(l.text, '')) IS NOT NULL
+    ORDER BY lw.rowid
+"""
+
+# Same order as resolve_ar_u_root: root as is, lowercased, then root_norm.
+LEGACY_ROOTS_SQL = f"""
+    INSERT OR IGNORE INTO temp.legacy_word_roots (surah, ayah, position, root, root_norm, ar_u_root)
+    SELECT
+      surah, ayah, position, root, root_norm,
+      COALESCE(
+        {root_key_sql("spelling", "root")},
+        {root_key_sql("spelling", "lower_key(root)")},
+        {root_key_sql("spelling", "root_norm")},
+        {root_key_sql("spelling", "lower_key(root_norm)")}
+      )
+    FROM (
+      SELECT
+        word_location_part(rw.word_location, 0) AS surah,
+        word_location_part(rw.word_location, 1) AS ayah,
+        word_location_part(rw.word_location, 2) AS position,
+        normalize_root(r.arabic_trilateral) AS root,
+        strip_or_null(r.english_trilateral) AS root_norm,
+        rw.rowid AS source_order
+      FROM legacy_root.root_words AS rw
+      JOIN legacy_root.roots AS r ON r.id = rw.root_id
+    )
+    WHERE position IS NOT NULL AND (root IS NOT NULL OR root_norm IS NOT NULL)
+    ORDER BY source_order
+"""
+
+RESOLVED_WORDS_SQL = """
+    SELECT
+      w.*,
+      l.lemma,
+      COALESCE(NULLIF(u.root, ''), r.root) AS root,
+      r.ar_u_root,
+      NULL AS meta_json
+    FROM temp.salam_words AS w
+    LEFT JOIN temp.legacy_word_lemmas AS l
+      ON l.surah = w.surah AND l.ayah = w.ayah AND l.position = w.position
+    LEFT JOIN temp.legacy_word_roots AS r
+      ON r.surah = w.surah AND r.ayah = w.ayah AND r.position = w.position
+    LEFT JOIN ar_u_roots AS u ON u.ar_u_root = r.ar_u_root
+    WHERE true
+    ORDER BY w.rowid
+"""
+
+
+def _strip_or_null(value: Optional[str]) -> Optional[str]:
+    return (value or "").strip() or None
+
+
+def seed_from_attached_legacy(
+    conn: sqlite3.Connection,
+    args: argparse.Namespace,
+) -> Tuple[int, int, int, int]:
+    """Resolve lemma/root inside SQLite from the ATTACHed legacy databases and upsert every word."""
+    register_word_location_function(conn)
+    conn.create_function("normalize_root", 1, normalize_root, deterministic=True)
+    conn.create_function("strip_or_null", 1, _strip_or_null, deterministic=True)
+    # Python's lower(), not SQLite's ASCII-only one, as the key index was built with it.
+    conn.create_function("lower_key", 1, lambda value: value.lower() if value else value, deterministic=True)
+    attach_database(conn, args.lemma_db, "legacy_lemma")
+    attach_database(conn, args.root_db, "legacy_root")
+
+    cursor = conn.cursor()
+    cursor.executescript(LEGACY_TEMP_TABLES_SQL)
+    cursor.execute(LEGACY_LEMMAS_SQL)
+    cursor.execute(LEGACY_ROOTS_SQL)
+    placeholders = ", ".join("?" for _ in range(18))
+    cursor.executemany(
+        f"INSERT INTO temp.salam_words VALUES ({placeholders})",
+        (word_values(key, row) for key, row in iter_ayah_words(args.words_sql, args.workers)),
+    )
+    total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots = cursor.execute(
+        f"SELECT COUNT(*), COUNT(lemma), COUNT(root), COUNT(ar_u_root) FROM ({RESOLVED_WORDS_SQL})"
+    ).fetchone()
+    if not args.dry_run:
+        cursor.execute(INSERT_PREFIX + RESOLVED_WORDS_SQL + UPSERT_CLAUSE)
+    return total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
+
+
+def seed_from_legacy_maps(
+    conn: sqlite3.Connection,
+    args: argparse.Namespace,
+    root_keys: RootKeyIndex,
+) -> Tuple[int, int, int, int]:
+    lemma_map = load_lemma_map(args.lemma_db)
+    root_map = load_root_map(args.root_db)
+    writer = open_writer(conn, INSERT_SQL, args, "words", dry_run=args.dry_run)
+
     total_rows = 0
     fixed_lemmas = 0
     fixed_roots = 0
     matched_ar_u_roots = 0
-    current_key: Optional[Tuple[int, int]] = None
-    word_index = 0
-    for row in iter_word_rows(args.words_sql):
-        surah = row.get("sura")
-        ayah = row.get("aya")
-        position = row.get("position")
-        char_type = row.get("char_type")
-        if not isinstance(surah, int) or not isinstance(ayah, int) or not isinstance(position, int):
-            continue
-        if char_type != "word":
-            continue
-        if current_key != (surah, ayah):
-            current_key = (surah, ayah)
-            word_index = 0
-        word_index += 1
-        key = (surah, ayah, word_index)
-        lemma = lemma_map.get(key)
+    for key, row in iter_ayah_words(args.words_sql, args.workers):
+        lemma = lemma_map.value(key, "lemma")
         root_text = None
         root_norm = None
         if key in root_map:
             root_text, root_norm = root_map[key]
-        ar_u_root = None
-        if root_text:
-            ar_u_root = root_lookup.get(root_text) or root_lookup.get(root_text.lower())
-        if not ar_u_root and root_norm:
-            ar_u_root = root_lookup.get(root_norm) or root_lookup.get(root_norm.lower())
-        if ar_u_root and ar_u_root in root_value_by_id:
-            root_text = root_value_by_id[ar_u_root]
+        ar_u_root = resolve_ar_u_root(root_keys, root_text, root_norm)
+        root_value = root_keys.root_value(ar_u_root)
+        if root_value:
+            root_text = root_value
 
         if lemma:
             fixed_lemmas += 1
@@ -374,48 +431,107 @@ def main() -> None:
         if ar_u_root:
             matched_ar_u_roots += 1
 
-        payload = (
-            row.get("id"),
-            surah,
-            ayah,
-            word_index,
-            row.get("verse_key"),
-            row.get("text"),
-            row.get("simple"),
-            row.get("juz"),
-            row.get("hezb"),
-            row.get("rub"),
-            row.get("page"),
-            row.get("class_name"),
-            row.get("line"),
-            row.get("code"),
-            row.get("code_v3"),
-            row.get("char_type"),
-            row.get("audio"),
-            row.get("translation"),
-            lemma,
-            root_text,
-            ar_u_root,
-            None,
-        )
-        if not args.dry_run:
-            cursor.execute(insert_sql, payload)
+        writer.add(word_values(key, row) + (lemma, root_text, ar_u_root, None))
         total_rows += 1
+    writer.close()
+    if not args.dry_run:
+        print(f"Wrote {writer.summary()}")
+    return total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
 
-    if args.dry_run:
-        conn.rollback()
-        print(
-            "[dry-run] parsed {} rows; lemma={} root={} ar_u_root={}".format(
-                total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
-            )
-        )
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Seed ar_u_quran_ayah_words and fix lemma/root."
+    )
+    parser.add_argument(
+        "--target-db",
+        type=Path,
+        default=Path("database/d1.db"),
+        help="Target SQLite database.",
+    )
+    parser.add_argument(
+        "--words-sql",
+        type=Path,
+        default=Path("database/salamquran_quran_words.sql"),
+        help="Path to salamquran_quran_words.sql",
+    )
+    parser.add_argument(
+        "--lemma-db",
+        type=Path,
+        default=Path("database/data/word-lemma.db"),
+        help="Path to word-lemma.db",
+    )
+    parser.add_argument(
+        "--root-db",
+        type=Path,
+        default=Path("database/data/word-root.db"),
+        help="Path to word-root.db",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for parsing the words SQL dump.",
+    )
+    parser.add_argument(
+        "--attach-legacy",
+        action="store_true",
+        help="ATTACH the legacy lemma/root DBs and resolve them in SQL instead of loading them into Python.",
+    )
+    add_batch_arguments(parser)
+    add_fast_load_argument(parser)
+    parser.add_argument("--dry-run", action="store_true", help="Do not write changes.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.target_db.exists():
+        raise SystemExit(f"Missing target DB: {args.target_db}")
+    if not args.words_sql.exists():
+        raise SystemExit(f"Missing words SQL: {args.words_sql}")
+    if not args.lemma_db.exists():
+        raise SystemExit(f"Missing lemma DB: {args.lemma_db}")
+    if not args.root_db.exists():
+        raise SystemExit(f"Missing root DB: {args.root_db}")
+
+    conn = sqlite3.connect(args.target_db)
+    cursor = conn.cursor()
+    ensure_table(cursor)
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='ar_quran_ayah';"
+    )
+    has_ayah_table = cursor.fetchone()[0] == 1
+    ayah_count = 0
+    if has_ayah_table:
+        ayah_count = cursor.execute("SELECT COUNT(*) FROM ar_quran_ayah;").fetchone()[0]
+    if has_ayah_table and ayah_count == 0:
+        cursor.execute("PRAGMA foreign_keys = OFF;")
     else:
-        conn.commit()
-        print(
-            "Seeded {} rows; lemma={} root={} ar_u_root={}".format(
-                total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
+        cursor.execute("PRAGMA foreign_keys = ON;")
+    refresh_root_keys(conn, temporary=args.dry_run)
+
+    with FastLoad(conn, ["ar_u_quran_ayah_words"], enabled=args.fast_load and not args.dry_run):
+        if args.attach_legacy:
+            counts = seed_from_attached_legacy(conn, args)
+        else:
+            counts = seed_from_legacy_maps(conn, args, RootKeyIndex(conn))
+        total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots = counts
+
+        if args.dry_run:
+            conn.rollback()
+            print(
+                "[dry-run] parsed {} rows; lemma={} root={} ar_u_root={}".format(
+                    total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
+                )
+            )
+        else:
+            conn.commit()
+            print(
+                "Seeded {} rows; lemma={} root={} ar_u_root={}".format(
+                    total_rows, fixed_lemmas, fixed_roots, matched_ar_u_roots
+                )
             )
-        )
 
     conn.close()
 
@@ -5,9 +5,12 @@ from __future__ import annotations
 
 import argparse
 import sqlite3
+import time
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
+from batch_writer import add_batch_arguments, open_writer
+from fast_load import FastLoad, add_fast_load_argument
 from quran_words import load_salam_word_map
 
 
@@ -83,24 +86,47 @@ def load_lemmas(lemmas_conn: sqlite3.Connection) -> Tuple[Dict[int, sqlite3.Row]
     return lemmas, word_rows
 
 
+TokenInfo = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+QURAN_UNIT_PREFIX = "U:QURAN:"
+
+
+def load_quran_tokens(cursor: sqlite3.Cursor) -> Dict[Tuple[str, int], TokenInfo]:
+    """Preload ar_occ_token rows of Quran units keyed by (unit_id, pos_index).
+
+    Rows are read in rowid order and the first row per key is kept, which is
+    the row the old per-location ``LIMIT 1`` query returned.
+    """
+    tokens: Dict[Tuple[str, int], TokenInfo] = {}
+    for unit_id, pos_index, token_occ_id, ar_u_token, surface_ar, norm_ar in cursor.execute(
+        """
+        SELECT unit_id, pos_index, ar_token_occ_id, ar_u_token, surface_ar, norm_ar
+        FROM ar_occ_token
+        WHERE unit_id LIKE ?
+        ORDER BY rowid
+        """,
+        (QURAN_UNIT_PREFIX + "%",),
+    ):
+        key = (unit_id, pos_index)
+        if key not in tokens:
+            tokens[key] = (token_occ_id, ar_u_token, surface_ar, norm_ar)
+    return tokens
+
+
 def find_token(
-    cursor: sqlite3.Cursor,
+    tokens: Dict[Tuple[str, int], TokenInfo],
     surah: int,
     ayah: int,
     token_index: int,
-) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
-  unit_id = f"U:QURAN:{surah}:{ayah}"
-  pos_candidates = [token_index - 1, token_index]
-  for pos in pos_candidates:
-    if pos < 0:
-      continue
-    row = cursor.execute(
-      "SELECT ar_token_occ_id, ar_u_token, surface_ar, norm_ar FROM ar_occ_token WHERE unit_id = ? AND pos_index = ? LIMIT 1",
-      (unit_id, pos),
-    ).fetchone()
-    if row:
-      return row[0], row[1], row[2], row[3]
-  return None, None, None, None
+) -> TokenInfo:
+    unit_id = f"{QURAN_UNIT_PREFIX}{surah}:{ayah}"
+    for pos in (token_index - 1, token_index):
+        if pos < 0:
+            continue
+        token = tokens.get((unit_id, pos))
+        if token:
+            return token
+    return None, None, None, None
 
 
 def group_locations(locations: Iterable[Tuple[int, str]]) -> Dict[int, List[str]]:
@@ -121,6 +147,8 @@ def parse_args() -> argparse.Namespace:
         help="Path to the Salam Quran words SQL dump for actual word surface forms.",
     )
     parser.add_argument("--dry-run", action="store_true", help="Print actions without writing to target.")
+    add_batch_arguments(parser)
+    add_fast_load_argument(parser)
     return parser.parse_args()
 
 
@@ -140,15 +168,23 @@ def main() -> None:
     total_locations = 0
     missing_tokens = 0
     word_map = load_salam_word_map(args.quran_words)
+    started = time.perf_counter()
+    quran_tokens = load_quran_tokens(target_cursor)
+    print(f"Preloaded {len(quran_tokens)} Quran token positions in {time.perf_counter() - started:.2f}s.")
 
+    # primary_ar_u_token is only filled while it is still NULL, matching the
+    # first located token of the lemma.
     insert_lemma_sql = """
-        INSERT INTO quran_ayah_lemmas (lemma_id, lemma_text, lemma_text_clean, words_count, uniq_words_count)
-        VALUES (?, ?, ?, ?, ?)
+        INSERT INTO quran_ayah_lemmas (
+            lemma_id, lemma_text, lemma_text_clean, words_count, uniq_words_count, primary_ar_u_token
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(lemma_id) DO UPDATE SET
             lemma_text = excluded.lemma_text,
             lemma_text_clean = excluded.lemma_text_clean,
             words_count = excluded.words_count,
-            uniq_words_count = excluded.uniq_words_count;
+            uniq_words_count = excluded.uniq_words_count,
+            primary_ar_u_token = COALESCE(quran_ayah_lemmas.primary_ar_u_token, excluded.primary_ar_u_token);
     """
     insert_location_sql = """
         INSERT INTO quran_ayah_lemma_location (
@@ -170,63 +206,83 @@ def main() -> None:
             word_diacritic = excluded.word_diacritic;
     """
 
-    for lemma_row in lemmas_conn.execute("SELECT id, text, text_clean, words_count, uniq_words_count FROM lemmas"):
-        lemma_id = lemma_row["id"]
-        target_cursor.execute(
-            insert_lemma_sql,
-            (
-                lemma_id,
-                lemma_row["text"],
-                lemma_row["text_clean"],
-                lemma_row["words_count"],
-                lemma_row["uniq_words_count"],
-            ),
+    with FastLoad(
+        target_conn,
+        ["quran_ayah_lemmas", "quran_ayah_lemma_location"],
+        enabled=args.fast_load and not args.dry_run,
+    ):
+        resolve_started = time.perf_counter()
+        lemma_writer = open_writer(target_conn, insert_lemma_sql, args, "lemmas", dry_run=args.dry_run)
+        # Locations reference their lemma, so pending lemma rows are flushed first.
+        location_writer = open_writer(
+            target_conn,
+            insert_location_sql,
+            args,
+            "lemma locations",
+            dry_run=args.dry_run,
+            depends_on=[lemma_writer],
         )
-        primary_set = False
-        for location in grouped_locations.get(lemma_id, []):
-            parsed = parse_word_location(location)
-            if not parsed:
-                continue
-            surah, ayah, token_index = parsed
-            token_occ_id, ar_u_token, surface_ar, norm_ar = find_token(
-                target_cursor, surah, ayah, token_index
-            )
-            if not token_occ_id and not ar_u_token:
-                missing_tokens += 1
-            else:
-                if not primary_set and ar_u_token:
-                    target_cursor.execute(
-                        "UPDATE quran_ayah_lemmas SET primary_ar_u_token = ? WHERE lemma_id = ? AND primary_ar_u_token IS NULL",
-                        (ar_u_token, lemma_id),
+
+        for lemma_row in lemmas_conn.execute("SELECT id, text, text_clean, words_count, uniq_words_count FROM lemmas"):
+            lemma_id = lemma_row["id"]
+            primary_token: Optional[str] = None
+            locations: List[Tuple[object, ...]] = []
+            for location in grouped_locations.get(lemma_id, []):
+                parsed = parse_word_location(location)
+                if not parsed:
+                    continue
+                surah, ayah, token_index = parsed
+                token_occ_id, ar_u_token, surface_ar, norm_ar = find_token(
+                    quran_tokens, surah, ayah, token_index
+                )
+                if not token_occ_id and not ar_u_token:
+                    missing_tokens += 1
+                elif primary_token is None and ar_u_token:
+                    primary_token = ar_u_token
+                word_simple, word_diacritic = word_map.get((surah, ayah, token_index), (None, None))
+                if word_simple is None:
+                    word_simple = norm_ar or surface_ar
+                if word_diacritic is None:
+                    word_diacritic = surface_ar
+                locations.append(
+                    (
+                        lemma_id,
+                        location,
+                        surah,
+                        ayah,
+                        token_index,
+                        token_occ_id,
+                        ar_u_token,
+                        word_simple,
+                        word_diacritic,
                     )
-                    primary_set = True
-            word_simple, word_diacritic = word_map.get((surah, ayah, token_index), (None, None))
-            if word_simple is None:
-                word_simple = norm_ar or surface_ar
-            if word_diacritic is None:
-                word_diacritic = surface_ar
-            target_cursor.execute(
-                insert_location_sql,
+                )
+            # The lemma row goes in before its locations; primary_token needs them resolved first.
+            lemma_writer.add(
                 (
                     lemma_id,
-                    location,
-                    surah,
-                    ayah,
-                    token_index,
-                    token_occ_id,
-                    ar_u_token,
-                    word_simple,
-                    word_diacritic,
-                ),
+                    lemma_row["text"],
+                    lemma_row["text_clean"],
+                    lemma_row["words_count"],
+                    lemma_row["uniq_words_count"],
+                    primary_token,
+                )
             )
-            total_locations += 1
+            for params in locations:
+                location_writer.add(params)
+            total_locations += len(locations)
 
-    if args.dry_run:
-        target_conn.rollback()
-        print(f"[dry-run] would have added {total_locations} lemma locations, {missing_tokens} without tokens.")
-    else:
-        target_conn.commit()
-        print(f"Imported {total_locations} lemma locations ({missing_tokens} without known tokens).")
+        lemma_writer.close()
+        location_writer.close()
+        print(f"Wrote {lemma_writer.summary()}, {location_writer.summary()}.")
+        print(f"Resolved lemma locations in {time.perf_counter() - resolve_started:.2f}s.")
+
+        if args.dry_run:
+            target_conn.rollback()
+            print(f"[dry-run] would have added {total_locations} lemma locations, {missing_tokens} without tokens.")
+        else:
+            target_conn.commit()
+            print(f"Imported {total_locations} lemma locations ({missing_tokens} without known tokens).")
 
     lemmas_conn.close()
     target_conn.close()
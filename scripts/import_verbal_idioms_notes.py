@@ -16,15 +16,12 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import hashlib
 import json
-import subprocess
 from pathlib import Path
 from typing import Any
 
-
-def sha256_hex(value: str) -> str:
-    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+from apply_sql_chunks import ExecutorError, add_executor_arguments, apply_with_retries, build_executor
+from canonical_ids import RAW_IDS
 
 
 def sql_quote(value: Any) -> str:
@@ -150,7 +147,7 @@ def build_sql(
         raise ValueError("Input JSON has no items.")
 
     source_canonical = f"source|{source_code}"
-    ar_u_source = sha256_hex(source_canonical)
+    ar_u_source = RAW_IDS.digest(source_canonical)
 
     page_items: dict[int, list[dict[str, Any]]] = {}
     for item in items:
@@ -236,7 +233,7 @@ def build_sql(
         if not canonical_input:
             raise ValueError("Item missing canonical_input.")
 
-        lexicon_id = sha256_hex(canonical_input)
+        lexicon_id = RAW_IDS.digest(canonical_input)
         g = item.get("gloss_secondary_json")
         if not isinstance(g, dict):
             g = {}
@@ -326,7 +323,7 @@ def build_sql(
 
         link_role = "usage"
         evidence_canonical = f"lexicon_evidence|{lexicon_id}|chunk|{ar_u_source}|{chunk_id}|{link_role}"
-        evidence_id = sha256_hex(evidence_canonical)
+        evidence_id = RAW_IDS.digest(evidence_canonical)
         evidence_meta = {
             "canonical_input": canonical_input,
             "sense_key": sense_key,
@@ -393,10 +390,13 @@ def run() -> None:
         choices=["grammar", "literature", "lexicon", "reference", "other"],
         help="Chunk classification for ar_source_chunks.chunk_type",
     )
-    parser.add_argument("--database", default="knowledgemap")
     parser.add_argument("--sql-out", default="/tmp/import_verbal_idioms_notes.sql")
-    parser.add_argument("--apply", action="store_true", help="Execute generated SQL with wrangler")
-    parser.add_argument("--remote", action="store_true", help="Use --remote for wrangler execution")
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Execute generated SQL with wrangler (or against --local-db), retrying on failure",
+    )
+    add_executor_arguments(parser)
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -422,12 +422,12 @@ def run() -> None:
     print(f"Evidence rows: {evidence_count}")
 
     if args.apply:
-        cmd = ["wrangler", "d1", "execute", args.database]
-        if args.remote:
-            cmd.append("--remote")
-        cmd.extend(["--file", str(out_path)])
-        print("Running:", " ".join(cmd))
-        subprocess.run(cmd, check=True)
+        executor = build_executor(args)
+        print(f"Applying {out_path} to {executor.target}")
+        try:
+            apply_with_retries(executor, out_path)
+        except ExecutorError as exc:
+            raise SystemExit(f"Apply failed: {exc}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+ALIAS_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def parse_word_location(location: str) -> Optional[Tuple[int, int, int]]:
+    """Parse word_location strings like 54:26:4 or DOC_QURAN_HAFS:12:23:TOK_05."""
+    if not location:
+        return None
+    parts = location.split(":")
+    if len(parts) < 3:
+        return None
+    try:
+        surah = int(parts[-3])
+        ayah = int(parts[-2])
+    except ValueError:
+        return None
+    token_part = parts[-1]
+    if token_part.upper().startswith("TOK_"):
+        try:
+            token_index = int(token_part.split("_")[-1])
+        except ValueError:
+            return None
+    else:
+        try:
+            token_index = int(token_part)
+        except ValueError:
+            return None
+    return surah, ayah, token_index
+
+
+# SQLite asks for each part of the same location back to back, so remember
+# the last parse instead of splitting the string once per part.
+_last_location: List[object] = [None, None]
+
+
+def _word_location_part(location: Optional[str], part: int) -> Optional[int]:
+    if not isinstance(location, str):
+        return None
+    if _last_location[0] != location:
+        _last_location[0] = location
+        _last_location[1] = parse_word_location(location)
+    parsed = _last_location[1]
+    if parsed is None or not 0 <= part < 3:
+        return None
+    return parsed[part]
+
+
+def register_word_location_function(conn: sqlite3.Connection) -> None:
+    """Expose ``word_location_part(location, n)`` (0 = surah, 1 = ayah, 2 = position) to SQL."""
+    conn.create_function("word_location_part", 2, _word_location_part, deterministic=True)
+
+
+def attach_database(conn: sqlite3.Connection, path: Path, alias: str) -> None:
+    """ATTACH a legacy SQLite file to ``conn`` under ``alias``; callers only read from it."""
+    if not ALIAS_RE.match(alias):
+        raise ValueError(f"Invalid database alias: {alias}")
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+
+
+def detach_database(conn: sqlite3.Connection, alias: str) -> None:
+    if not ALIAS_RE.match(alias):
+        raise ValueError(f"Invalid database alias: {alias}")
+    conn.execute(f"DETACH DATABASE {alias}")
+
+
+def choose_attached_table(conn: sqlite3.Connection, alias: str, candidates: List[str]) -> Optional[str]:
+    if not ALIAS_RE.match(alias):
+        raise ValueError(f"Invalid database alias: {alias}")
+    available = {
+        row[0] for row in conn.execute(f"SELECT name FROM {alias}.sqlite_master WHERE type='table'")
+    }
+    for candidate in candidates:
+        if candidate in available:
+            return candidate
+    return None
@@ -3,21 +3,39 @@
 
 from __future__ import annotations
 
-import re
 import sqlite3
 from pathlib import Path
 
-DIACRITICS_RE = re.compile(
-    r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u08D3-\u08FF\u0591-\u05C7]+"
-)
+from root_keys import normalize_root_arabic, refresh_root_keys, root_key_sql
 
 
-def normalize_root_arabic(text: str | None) -> str:
-    if not text:
-        return ""
-    cleaned = DIACRITICS_RE.sub("", text)
-    cleaned = "".join(cleaned.split())
-    return cleaned
+def token_arabic_key(root_norm: str | None) -> str:
+    parts = (root_norm or "").split("|")
+    return normalize_root_arabic(parts[-1].strip())
+
+
+def token_english_key(root_norm: str | None) -> str:
+    parts = (root_norm or "").split("|")
+    return parts[0].strip().lower()
+
+
+# The Arabic part (last | segment) wins; the English part (first segment)
+# is the fallback.
+LINK_SQL = f"""
+    UPDATE ar_u_tokens
+    SET ar_u_root = resolved.ar_u_root
+    FROM (
+      SELECT
+        t.rowid AS token_rowid,
+        COALESCE(
+          {root_key_sql("ar", "token_arabic_key(t.root_norm)")},
+          {root_key_sql("en", "token_english_key(t.root_norm)")}
+        ) AS ar_u_root
+      FROM ar_u_tokens AS t
+      WHERE t.ar_u_root IS NULL AND t.root_norm IS NOT NULL AND t.root_norm != ''
+    ) AS resolved
+    WHERE ar_u_tokens.rowid = resolved.token_rowid AND resolved.ar_u_root IS NOT NULL
+"""
 
 
 def main() -> None:
@@ -26,47 +44,14 @@ def main() -> None:
         raise SystemExit(f"Database not found at {db_path}")
 
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
-    root_lookup: dict[str, str] = {}
-    english_lookup: dict[str, str] = {}
-
-    for row in conn.execute("SELECT ar_u_root, root, english_trilateral FROM ar_u_roots"):
-        root_norm = normalize_root_arabic(row["root"])
-        if root_norm:
-            root_lookup.setdefault(root_norm, row["ar_u_root"])
-        english = (row["english_trilateral"] or "").replace(" ", "")
-        if english:
-            english_lookup.setdefault(english.lower(), row["ar_u_root"])
+    conn.create_function("token_arabic_key", 1, token_arabic_key, deterministic=True)
+    conn.create_function("token_english_key", 1, token_english_key, deterministic=True)
 
-    rows = conn.execute(
-        "SELECT rowid, root_norm FROM ar_u_tokens WHERE ar_u_root IS NULL AND root_norm IS NOT NULL AND root_norm != ''"
-    ).fetchall()
+    refresh_root_keys(conn)
 
-    updated = 0
     cursor = conn.cursor()
-
-    for item in rows:
-        rowid = item["rowid"]
-        root_norm = item["root_norm"] or ""
-        parts = root_norm.split("|")
-        arabic = parts[-1].strip() if parts else ""
-        normalized_arabic = normalize_root_arabic(arabic)
-
-        ar_u_root = root_lookup.get(normalized_arabic)
-
-        if not ar_u_root:
-            english = parts[0].strip().lower() if parts else ""
-            ar_u_root = english_lookup.get(english)
-
-        if not ar_u_root:
-            continue
-
-        cursor.execute(
-            "UPDATE ar_u_tokens SET ar_u_root = ? WHERE rowid = ?",
-            (ar_u_root, rowid),
-        )
-        updated += 1
+    cursor.execute(LINK_SQL)
+    updated = cursor.rowcount
 
     conn.commit()
 
@@ -4,27 +4,15 @@
 from __future__ import annotations
 
 import argparse
-import hashlib
 import json
-import re
 import sqlite3
 import sys
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
-CANONICAL_PREFIX = "ROOT|"
-
-
-def canonicalize(value: str) -> str:
-    """Collapse whitespace and lowercase ASCII letters only."""
-    normalized = re.sub(r"\s+", " ", value or "").strip()
-    return re.sub(r"[A-Z]", lambda match: match.group(0).lower(), normalized)
+from canonical_ids import ROOT_IDS
 
-
-def sha256_hex(input_value: str) -> Tuple[str, str]:
-    canonical = canonicalize(input_value)
-    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
-    return digest, canonical
+CANONICAL_PREFIX = "ROOT|"
 
 
 def build_meta(row: sqlite3.Row) -> Optional[str]:
@@ -53,7 +41,7 @@ def build_insert_payload(row: sqlite3.Row) -> Tuple[str, str, Tuple]:
     if not root_norm:
         root_norm = row["root"] or ""
     canonical_input = f"{CANONICAL_PREFIX}{root_norm}"
-    ar_u_root, canonical = sha256_hex(canonical_input)
+    ar_u_root, canonical = ROOT_IDS.hash(canonical_input)
 
     status_raw = row["status"] or "active"
     status = status_raw.strip().lower()
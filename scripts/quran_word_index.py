@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+WordKey = Tuple[int, int, int]
+WordEntry = Tuple[Optional[str], ...]
+
+
+class QuranWordIndex:
+    """Per-word columns addressed by a dense global word ordinal.
+
+    ``(surah, ayah, position)`` maps to an ordinal through two prefix-offset
+    arrays: ``_surah_base[surah]`` is the first ayah slot of the surah and
+    ``_ayah_base[slot]`` is the first word ordinal of the ayah. Each column is
+    one list indexed by ordinal holding interned strings, so there is no
+    per-word key tuple or dict entry. A word whose columns are all ``None`` is
+    treated as missing, like a key absent from the dicts this replaces.
+    """
+
+    __slots__ = ("columns", "_surah_base", "_ayah_base", "_values", "_count")
+
+    def __init__(self, keys: Iterable[WordKey], columns: Sequence[str]) -> None:
+        max_ayah: List[int] = []
+        max_position = {}
+        for surah, ayah, position in keys:
+            if surah < 1 or ayah < 1 or position < 1:
+                continue
+            if surah >= len(max_ayah):
+                max_ayah.extend([0] * (surah + 1 - len(max_ayah)))
+            if ayah > max_ayah[surah]:
+                max_ayah[surah] = ayah
+            ayah_key = (surah, ayah)
+            if position > max_position.get(ayah_key, 0):
+                max_position[ayah_key] = position
+
+        surah_base = array("i", [0])
+        ayah_base = array("i", [0])
+        for surah in range(1, len(max_ayah)):
+            surah_base.append(len(ayah_base) - 1)
+            for ayah in range(1, max_ayah[surah] + 1):
+                ayah_base.append(ayah_base[-1] + max_position.get((surah, ayah), 0))
+        surah_base.append(len(ayah_base) - 1)
+
+        self.columns = tuple(columns)
+        self._surah_base = surah_base
+        self._ayah_base = ayah_base
+        self._values: List[List[Optional[str]]] = [[None] * ayah_base[-1] for _ in self.columns]
+        self._count = 0
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: Iterable[Tuple[WordKey, WordEntry]],
+        columns: Sequence[str],
+        keep_first: bool = False,
+    ) -> "QuranWordIndex":
+        """Build an index from ``(key, values)`` pairs; later duplicates win unless ``keep_first``.
+
+        ``entries`` is read once. Keys go into int arrays and values into one
+        list of interned strings per column until the layout is known, so no
+        per-entry tuples are held while the offsets are built.
+        """
+        surahs = array("i")
+        ayahs = array("i")
+        positions = array("i")
+        pending: List[List[Optional[str]]] = [[] for _ in columns]
+        intern = sys.intern
+        for (surah, ayah, position), values in entries:
+            surahs.append(surah)
+            ayahs.append(ayah)
+            positions.append(position)
+            for column_index, column in enumerate(pending):
+                value = values[column_index] if column_index < len(values) else None
+                column.append(intern(value) if value is not None else None)
+
+        index = cls(zip(surahs, ayahs, positions), columns)
+        for entry_index, key in enumerate(zip(surahs, ayahs, positions)):
+            # Already interned above.
+            index._put(key, [column[entry_index] for column in pending], not keep_first)
+        return index
+
+    def ordinal(self, surah: int, ayah: int, position: int) -> int:
+        """Return the global word ordinal for a reference, or -1 when it is outside the index."""
+        if surah < 1 or ayah < 1 or position < 1 or surah + 1 >= len(self._surah_base):
+            return -1
+        slot = self._surah_base[surah] + ayah - 1
+        if slot >= self._surah_base[surah + 1]:
+            return -1
+        ordinal = self._ayah_base[slot] + position - 1
+        if ordinal >= self._ayah_base[slot + 1]:
+            return -1
+        return ordinal
+
+    def _present(self, ordinal: int) -> bool:
+        return any(column[ordinal] is not None for column in self._values)
+
+    def set(self, key: WordKey, values: WordEntry, overwrite: bool = True) -> bool:
+        """Store the column values of a word; returns False when the key is outside the layout."""
+        return self._put(key, [sys.intern(value) if value is not None else None for value in values], overwrite)
+
+    def _put(self, key: WordKey, values: Sequence[Optional[str]], overwrite: bool) -> bool:
+        ordinal = self.ordinal(*key)
+        if ordinal < 0:
+            return False
+        present = self._present(ordinal)
+        if present and not overwrite:
+            return True
+        for column, value in zip(self._values, values):
+            column[ordinal] = value
+        now_present = self._present(ordinal)
+        self._count += int(now_present) - int(present)
+        return True
+
+    def get(self, key: WordKey, default: Optional[WordEntry] = None) -> Optional[WordEntry]:
+        ordinal = self.ordinal(*key)
+        if ordinal < 0 or not self._present(ordinal):
+            return default
+        return tuple(column[ordinal] for column in self._values)
+
+    def value(self, key: WordKey, column: str) -> Optional[str]:
+        """Return one column of a word, or None when the word is missing."""
+        ordinal = self.ordinal(*key)
+        if ordinal < 0:
+            return None
+        return self._values[self.columns.index(column)][ordinal]
+
+    def __getitem__(self, key: WordKey) -> WordEntry:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, tuple) or len(key) != 3:
+            return False
+        ordinal = self.ordinal(*key)
+        return ordinal >= 0 and self._present(ordinal)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Iterator[Tuple[WordKey, WordEntry]]:
+        """Yield present words in (surah, ayah, position) order.
+
+        The dicts this replaces yielded words in dump order instead; no caller
+        depends on either order (update_word_columns_from_quran_words.py only
+        numbers its progress lines by it).
+        """
+        surah_base = self._surah_base
+        ayah_base = self._ayah_base
+        for surah in range(1, len(surah_base) - 1):
+            for slot in range(surah_base[surah], surah_base[surah + 1]):
+                ayah = slot - surah_base[surah] + 1
+                for ordinal in range(ayah_base[slot], ayah_base[slot + 1]):
+                    if self._present(ordinal):
+                        position = ordinal - ayah_base[slot] + 1
+                        yield (surah, ayah, position), tuple(column[ordinal] for column in self._values)
+
+    def keys(self) -> Iterator[WordKey]:
+        for key, _ in self.items():
+            yield key
+
+    def __iter__(self) -> Iterator[WordKey]:
+        return self.keys()
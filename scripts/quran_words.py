@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import os
+import pickle
+import re
+from itertools import compress
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from quran_word_index import QuranWordIndex, WordKey
+from sql_dump import parse_line_ranges
 
 
-WordKey = Tuple[int, int, int]
 WordValue = Tuple[Optional[str], Optional[str]]
+SALAM_WORD_COLUMNS = ("simple", "text")
 
 # Normalize a few orthographic variants from the Salam dump to the app's
 # expected "simple" spelling.
@@ -19,17 +28,40 @@ SIMPLE_SPELLING_OVERRIDES = {
 }
 
 
-def _parse_word_row(line: str) -> Optional[List[str]]:
-    """Split a single INSERT row into individual column strings."""
+# Parsed rows are cached next to the dump as "<dump>.rows.cache". Bump the
+# version whenever the tokenizer output changes so old caches are rebuilt.
+WORD_CACHE_SUFFIX = ".rows.cache"
+WORD_CACHE_VERSION = 1
+
+# iter_word_columns hands rows to csv.reader in batches. On rows matching
+# _CSV_ROW_RE (quoted values with '' or backslash escapes, unquoted values
+# without quotes or backslashes) its output equals _scan_row; every other row
+# goes to _scan_row itself.
+_CSV_DIALECT = {
+    "quotechar": "'",
+    "escapechar": "\\",
+    "doublequote": True,
+    "skipinitialspace": True,
+    "strict": True,
+}
+_CSV_BATCH_ROWS = 2048
+_QUOTED_VALUE = r" *'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'"
+_UNQUOTED_VALUE = r"[^',\\]*"
+_CSV_ROW_RE = re.compile(
+    rf"(?:{_QUOTED_VALUE}|{_UNQUOTED_VALUE})(?:,(?:{_QUOTED_VALUE}|{_UNQUOTED_VALUE}))*", re.S
+)
+
+
+def _strip_row(line: str) -> Optional[str]:
     row = line.strip()
-    if not row or not row.startswith("("):
+    if not row.startswith("("):
         return None
-    row = row.rstrip(",;")
-    if row.startswith("("):
-        row = row[1:]
-    if row.endswith(")"):
-        row = row[:-1]
+    row = row.rstrip(",;")[1:]
+    return row[:-1] if row.endswith(")") else row
 
+
+def _scan_row(row: str, backslash_escapes: bool = True) -> List[str]:
+    """Reference character scanner for a row already stripped of its parentheses."""
     columns: List[str] = []
     buffer: List[str] = []
     in_quote = False
@@ -37,7 +69,7 @@ def _parse_word_row(line: str) -> Optional[List[str]]:
     while i < len(row):
         ch = row[i]
         if in_quote:
-            if ch == "\\" and i + 1 < len(row):
+            if backslash_escapes and ch == "\\" and i + 1 < len(row):
                 buffer.append(row[i + 1])
                 i += 2
                 continue
@@ -69,6 +101,119 @@ def _parse_word_row(line: str) -> Optional[List[str]]:
     return columns
 
 
+def _csv_safe(row: str) -> bool:
+    # The scanner drops a final column it collected no characters for, so
+    # rows ending in an empty value are left to it.
+    return bool(row) and not row.endswith((",", "''")) and _CSV_ROW_RE.fullmatch(row) is not None
+
+
+def _split_rows(rows: List[str]) -> List[List[str]]:
+    """Tokenize a batch of stripped rows: csv.reader where _csv_safe allows it, _scan_row elsewhere."""
+    safe = [_csv_safe(row) for row in rows]
+    try:
+        parsed = iter([list(map(str.strip, fields)) for fields in csv.reader(compress(rows, safe), **_CSV_DIALECT)])
+    except csv.Error:
+        return [_scan_row(row) for row in rows]
+    return [next(parsed) if is_safe else _scan_row(row) for row, is_safe in zip(rows, safe)]
+
+
+def _scan_word_row(line: str) -> Optional[List[str]]:
+    """Split a single INSERT row with the reference character scanner."""
+    row = _strip_row(line)
+    if row is None:
+        return None
+    return _scan_row(row)
+
+
+def _parse_word_row(line: str) -> Optional[List[str]]:
+    """Split a single INSERT row into individual column strings."""
+    row = _strip_row(line)
+    if row is None:
+        return None
+    return _split_rows([row])[0]
+
+
+def iter_word_columns(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Yield the column strings of every INSERT row in ``lines``, skipping other lines."""
+    batch: List[str] = []
+    for line in lines:
+        row = _strip_row(line)
+        if row is not None:
+            batch.append(row)
+            if len(batch) == _CSV_BATCH_ROWS:
+                yield from _split_rows(batch)
+                batch = []
+    if batch:
+        yield from _split_rows(batch)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def word_cache_path(path: Path) -> Path:
+    return path.with_name(path.name + WORD_CACHE_SUFFIX)
+
+
+def _read_word_cache(cache_path: Path, digest: str) -> Optional[List[List[str]]]:
+    try:
+        with cache_path.open("rb") as fh:
+            header = pickle.load(fh)
+            if header != (WORD_CACHE_VERSION, digest):
+                return None
+            return pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _write_word_cache(cache_path: Path, digest: str, rows: List[List[str]]) -> None:
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with tmp_path.open("wb") as fh:
+            pickle.dump((WORD_CACHE_VERSION, digest), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(rows, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only data directory just means every run parses the dump.
+        tmp_path.unlink(missing_ok=True)
+
+
+def _parse_word_lines(lines: List[str]) -> List[List[str]]:
+    return list(iter_word_columns(lines))
+
+
+def _read_word_columns(path: Path, workers: int) -> List[List[str]]:
+    if workers > 1:
+        return parse_line_ranges(path, _parse_word_lines, workers)
+    with path.open(encoding="utf-8") as fh:
+        return list(iter_word_columns(fh))
+
+
+def load_word_columns(path: Path, use_cache: bool = True, workers: int = 1) -> List[List[str]]:
+    """Return the tokenized rows of a Salam dump, reusing the cache while its content hash matches.
+
+    With ``workers > 1`` a cache miss is parsed in parallel byte ranges; rows
+    still come back in file order, which is (surah, ayah, position) order for
+    the Salam dump, so per-ayah word numbering is unchanged.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Quran words dump missing: {path}")
+    if not use_cache:
+        return _read_word_columns(path, workers)
+
+    digest = _file_digest(path)
+    cache_path = word_cache_path(path)
+    rows = _read_word_cache(cache_path, digest)
+    if rows is None:
+        rows = _read_word_columns(path, workers)
+        _write_word_cache(cache_path, digest, rows)
+    return rows
+
+
 def _normalize_value(value: str) -> Optional[str]:
     normalized = value.strip()
     if not normalized or normalized.upper() == "NULL":
@@ -82,25 +227,23 @@ def _normalize_simple_spelling(value: Optional[str]) -> Optional[str]:
     return SIMPLE_SPELLING_OVERRIDES.get(value, value)
 
 
-def load_salam_word_map(path: Path) -> Dict[WordKey, WordValue]:
-    """Load the salamquran_quran_words dataset and return (surah, ayah, position) -> (simple, text)."""
-    if not path.exists():
-        raise FileNotFoundError(f"Quran words dump missing: {path}")
-    mapping: Dict[WordKey, WordValue] = {}
-    with path.open(encoding="utf-8") as fh:
-        for line in fh:
-            columns = _parse_word_row(line)
-            if not columns or len(columns) < 7:
-                continue
-            try:
-                aya = int(columns[1])
-                surah = int(columns[2])
-                position = int(columns[3])
-            except ValueError:
-                continue
-            text = _normalize_value(columns[5])
-            simple = _normalize_simple_spelling(_normalize_value(columns[6]))
-            if text is None and simple is None:
-                continue
-            mapping[(surah, aya, position)] = (simple, text)
-    return mapping
+def _salam_word_entries(path: Path, workers: int) -> Iterator[Tuple[WordKey, WordValue]]:
+    for columns in load_word_columns(path, workers=workers):
+        if len(columns) < 7:
+            continue
+        try:
+            aya = int(columns[1])
+            surah = int(columns[2])
+            position = int(columns[3])
+        except ValueError:
+            continue
+        text = _normalize_value(columns[5])
+        simple = _normalize_simple_spelling(_normalize_value(columns[6]))
+        if text is None and simple is None:
+            continue
+        yield (surah, aya, position), (simple, text)
+
+
+def load_salam_word_map(path: Path, workers: int = 1) -> QuranWordIndex:
+    """Load the salamquran_quran_words dataset as a (surah, ayah, position) -> (simple, text) index."""
+    return QuranWordIndex.from_entries(_salam_word_entries(path, workers), SALAM_WORD_COLUMNS)
@@ -3,29 +3,20 @@
 
 from __future__ import annotations
 
-import hashlib
+import argparse
 import json
 import os
 import re
-import sqlite3
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from canonical_ids import ROOT_IDS
+from tarteel_roots import RootRow, load_roots
 
 ROOTS_SQL = Path("database/data/roots/tarteel.ai/allroots.sql")
 TARGET_SQL = Path("database/data/roots/tarteel.ai/roots-only.sql")
 
 
-def canonicalize(value: str) -> str:
-    normalized = re.sub(r"\s+", " ", value or "").strip()
-    return re.sub(r"[A-Z]", lambda match: match.group(0).lower(), normalized)
-
-
-def sha256_hex(input_value: str) -> Tuple[str, str]:
-    canonical = canonicalize(input_value)
-    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
-    return digest, canonical
-
-
 def normalize_text(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -77,37 +68,37 @@ def collect_search_keys(values: list[tuple[Any, bool]]) -> Optional[str]:
     return " ".join(tokens) if tokens else None
 
 
-def build_meta(row: sqlite3.Row) -> Optional[Dict[str, Any]]:
+def build_meta(row: RootRow) -> Optional[Dict[str, Any]]:
     meta: Dict[str, Any] = {}
 
 
-    root_copy = normalize_text(row["c6"])
+    root_copy = normalize_text(row.c6)
     if root_copy:
         meta["root_copy"] = root_copy
 
-    letter_breakdown = normalize_text(row["c18"])
+    letter_breakdown = normalize_text(row.c18)
     if letter_breakdown:
         meta["letter_breakdown"] = letter_breakdown
 
-    word_count = parse_int(row["c19"])
+    word_count = parse_int(row.c19)
     if word_count is not None:
         meta["legacy_word_count"] = word_count
 
-    occurrence_count = parse_int(row["c20"])
+    occurrence_count = parse_int(row.c20)
     if occurrence_count is not None:
         meta["legacy_occurrence_count"] = occurrence_count
 
-    legacy_id = parse_int(row["c1"])
+    legacy_id = parse_int(row.c1)
     if legacy_id is not None:
         meta["legacy_row_id"] = legacy_id
 
-    roman_sources = parse_json_value(row["c8"])
+    roman_sources = parse_json_value(row.c8)
     if isinstance(roman_sources, dict):
         meta["romanization_sources"] = roman_sources
     elif isinstance(roman_sources, str):
         meta["romanization_sources_raw"] = roman_sources
 
-    extra_note = normalize_text(row["c21"])
+    extra_note = normalize_text(row.c21)
     if extra_note:
         meta["legacy_note"] = extra_note
 
@@ -133,31 +124,30 @@ def extract_first_string(value: Any) -> Optional[str]:
     return None
 
 
-def dump_rows(rows: Iterable[sqlite3.Row]) -> tuple[str, int]:
-    lines = []
+def dump_rows(rows: Iterable[RootRow]) -> Iterator[str]:
     seen_canonical: set[str] = set()
     for row in rows:
-        root_norm = normalize_text(row["c17"]) or normalize_text(row["c5"]) or ""
+        root_norm = normalize_text(row.c17) or normalize_text(row.c5) or ""
         canonical_template = f"ROOT|{root_norm}"
-        ar_u_root, canonical_input = sha256_hex(canonical_template)
+        ar_u_root, canonical_input = ROOT_IDS.hash(canonical_template)
         if canonical_input in seen_canonical:
             continue
         seen_canonical.add(canonical_input)
-        status = normalize_text(row["c11"]) or "active"
-        difficulty = parse_int(row["c12"])
-        frequency = normalize_text(row["c13"])
-        created_at = normalize_text(row["c14"])
-        updated_at = normalize_text(row["c15"])
-        extracted_at = normalize_text(row["c16"])
+        status = normalize_text(row.c11) or "active"
+        difficulty = parse_int(row.c12)
+        frequency = normalize_text(row.c13)
+        created_at = normalize_text(row.c14)
+        updated_at = normalize_text(row.c15)
+        extracted_at = normalize_text(row.c16)
 
         meta = build_meta(row)
         meta_json = json.dumps(meta, ensure_ascii=False, separators=(",", ":")) if meta else None
 
-        arabic_trilateral = normalize_text(row["c18"])
-        english_trilateral = extract_first_string(row["c7"]) or normalize_text(row["c5"])
+        arabic_trilateral = normalize_text(row.c18)
+        english_trilateral = extract_first_string(row.c7) or normalize_text(row.c5)
         search_keys_norm = collect_search_keys(
             [
-                (row["c10"], True),
+                (row.c10, True),
                 (arabic_trilateral, False),
                 (english_trilateral, False),
             ]
@@ -166,12 +156,12 @@ def dump_rows(rows: Iterable[sqlite3.Row]) -> tuple[str, int]:
         values = [
             ar_u_root,
             canonical_input,
-            normalize_text(row["c3"]) or "",
+            normalize_text(row.c3) or "",
             root_norm,
             arabic_trilateral,
             english_trilateral,
-            normalize_text(row["c5"]),
-            normalize_text(row["c7"]),
+            normalize_text(row.c5),
+            normalize_text(row.c7),
             search_keys_norm,
             status,
             difficulty,
@@ -182,27 +172,26 @@ def dump_rows(rows: Iterable[sqlite3.Row]) -> tuple[str, int]:
             meta_json,
         ]
 
-        lines.append(f"INSERT INTO ar_u_roots VALUES({', '.join(sql_literal(v) for v in values)});")
-    return "\n".join(lines), len(lines)
+        yield f"INSERT INTO ar_u_roots VALUES({', '.join(sql_literal(v) for v in values)});"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuild roots-only.sql from the tarteel.ai roots export.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to parse allroots.sql.",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = parse_args()
     if not ROOTS_SQL.exists():
         raise SystemExit(f"Missing {ROOTS_SQL}")
 
-    script = f"CREATE TABLE roots ({', '.join(f'c{i} TEXT' for i in range(1, 22))});\n"
-    relevant_lines = [
-        line
-        for line in ROOTS_SQL.read_text().splitlines()
-        if line.strip().startswith("INSERT INTO roots")
-    ]
-    script += "\n".join(relevant_lines) + "\n"
-
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    conn.executescript(script)
-
-    rows = sorted(conn.execute("SELECT * FROM roots"), key=lambda r: int(r["c1"]))
+    rows = load_roots(ROOTS_SQL, args.workers)
 
     header = """-- Tarteel.ai root export aligned with ar_u_roots
 DROP TABLE IF EXISTS ar_u_roots;
@@ -231,8 +220,12 @@ CREATE TABLE ar_u_roots (
 );
 
 """
-    body, exported = dump_rows(rows)
-    TARGET_SQL.write_text(header + body + ("\n" if body else ""))
+    exported = 0
+    with TARGET_SQL.open("w") as fh:
+        fh.write(header)
+        for statement in dump_rows(rows):
+            fh.write(statement + "\n")
+            exported += 1
     print(f"Wrote {exported} rows → {TARGET_SQL}")
 
 
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Maintain ar_u_root_keys, the lookup index from root spellings to ar_u_roots."""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DIACRITICS_RE = re.compile(
+    r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u08D3-\u08FF\u0591-\u05C7]+"
+)
+
+# Key kinds stored in ar_u_root_keys:
+#   spelling  the ten candidate spellings import-quran-ayah-words.py matches
+#             legacy roots against (root, root_norm, root_latn, ... and their
+#             lowercase forms)
+#   ar        the diacritic-free Arabic root (import-qul-word-lemmas.py,
+#             link_tokens_to_roots.py)
+#   en        the compact lowercase english_trilateral (link_tokens_to_roots.py)
+#
+# rank = ar_u_roots.rowid * RANK_STRIDE + candidate index, so ORDER BY rank
+# gives the first root (in ar_u_roots order) holding a key and ORDER BY rank
+# DESC the last one, the same winners the per-script dicts used to pick.
+# Bump ROOT_KEYS_VERSION whenever the keys derived from a root change; every
+# root is then re-keyed on the next refresh.
+ROOT_KEYS_VERSION = 1
+RANK_STRIDE = 16
+
+# {temp} is "TEMP " for the dry-run copy (see refresh_root_keys), {schema} its "temp." prefix.
+ROOT_KEYS_SCHEMA_SQL = """
+    CREATE {temp}TABLE IF NOT EXISTS ar_u_root_keys (
+      kind       TEXT NOT NULL,
+      key        TEXT NOT NULL,
+      rank       INTEGER NOT NULL,
+      ar_u_root  TEXT NOT NULL,
+      PRIMARY KEY (kind, key, rank)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS {schema}idx_ar_u_root_keys_root ON ar_u_root_keys(ar_u_root);
+    CREATE {temp}TABLE IF NOT EXISTS ar_u_root_keys_state (
+      ar_u_root    TEXT PRIMARY KEY,
+      fingerprint  TEXT NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+# Everything the keys of a root depend on, rowid included because it sets the rank.
+FINGERPRINT_SQL = f"""
+    '{ROOT_KEYS_VERSION}|' || r.rowid || '|' || quote(r.root) || '|' || quote(r.root_norm) || '|' ||
+    quote(r.root_latn) || '|' || quote(r.arabic_trilateral) || '|' || quote(r.english_trilateral)
+"""
+
+CHANGED_ROOTS_SQL = f"""
+    SELECT r.rowid, r.ar_u_root, r.root, r.root_norm, r.root_latn, r.arabic_trilateral,
+           r.english_trilateral, {FINGERPRINT_SQL}
+    FROM ar_u_roots AS r
+    LEFT JOIN ar_u_root_keys_state AS s ON s.ar_u_root = r.ar_u_root
+    WHERE r.ar_u_root IS NOT NULL AND s.fingerprint IS NOT {FINGERPRINT_SQL}
+"""
+
+REMOVED_ROOTS_SQL = """
+    SELECT s.ar_u_root
+    FROM ar_u_root_keys_state AS s
+    WHERE NOT EXISTS (SELECT 1 FROM ar_u_roots AS r WHERE r.ar_u_root = s.ar_u_root)
+"""
+
+
+def normalize_root(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return re.sub(r"\s+", "", value.strip()) or None
+
+
+def normalize_root_arabic(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    cleaned = DIACRITICS_RE.sub("", text)
+    cleaned = "".join(cleaned.split())
+    return cleaned
+
+
+def english_root_key(english_trilateral: Optional[str]) -> str:
+    return (english_trilateral or "").replace(" ", "").lower()
+
+
+def spelling_keys(
+    root: Optional[str],
+    root_norm: Optional[str],
+    root_latn: Optional[str],
+    arabic_trilateral: Optional[str],
+) -> List[Optional[str]]:
+    latn_compact = root_latn.replace("-", "") if root_latn else None
+    return [
+        root,
+        root_norm,
+        root_latn,
+        latn_compact,
+        arabic_trilateral,
+        normalize_root(arabic_trilateral),
+        root.lower() if root else None,
+        root_norm.lower() if root_norm else None,
+        root_latn.lower() if root_latn else None,
+        latn_compact.lower() if latn_compact else None,
+    ]
+
+
+def root_key_rows(
+    rowid: int,
+    ar_u_root: str,
+    root: Optional[str],
+    root_norm: Optional[str],
+    root_latn: Optional[str],
+    arabic_trilateral: Optional[str],
+    english_trilateral: Optional[str],
+) -> List[Tuple[str, str, int, str]]:
+    """The (kind, key, rank, ar_u_root) rows of one ar_u_roots row; empty keys are skipped."""
+    rows: List[Tuple[str, str, int, str]] = []
+    kinds = (
+        ("spelling", spelling_keys(root, root_norm, root_latn, arabic_trilateral)),
+        ("ar", [normalize_root_arabic(root)]),
+        ("en", [english_root_key(english_trilateral)]),
+    )
+    for kind, keys in kinds:
+        seen = set()
+        for index, key in enumerate(keys):
+            if key and key not in seen:
+                seen.add(key)
+                rows.append((kind, key, rowid * RANK_STRIDE + index, ar_u_root))
+    return rows
+
+
+def _chunks(values: List[str], size: int = 500) -> Iterable[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _delete_roots(cursor: sqlite3.Cursor, ar_u_roots: List[str]) -> None:
+    for chunk in _chunks(ar_u_roots):
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(f"DELETE FROM ar_u_root_keys WHERE ar_u_root IN ({placeholders})", chunk)
+        cursor.execute(f"DELETE FROM ar_u_root_keys_state WHERE ar_u_root IN ({placeholders})", chunk)
+
+
+def refresh_root_keys(conn: sqlite3.Connection, verbose: bool = True, temporary: bool = False) -> Dict[str, int]:
+    """Bring ar_u_root_keys up to date with ar_u_roots and commit.
+
+    Only roots that were added, removed or edited since the last refresh
+    (or whose rowid moved) are re-keyed; an unchanged table costs one scan.
+    With ``temporary`` (dry runs) the index is refreshed in TEMP tables,
+    seeded from the stored index, which shadow the stored tables for this
+    connection, so lookups work but the database file is left alone.
+    """
+    cursor = conn.cursor()
+    if temporary:
+        cursor.executescript(ROOT_KEYS_SCHEMA_SQL.format(temp="TEMP ", schema="temp."))
+        stored = {
+            row[0]
+            for row in cursor.execute(
+                "SELECT name FROM main.sqlite_master WHERE type = 'table' "
+                "AND name IN ('ar_u_root_keys', 'ar_u_root_keys_state')"
+            )
+        }
+        if len(stored) == 2 and not cursor.execute("SELECT 1 FROM temp.ar_u_root_keys_state LIMIT 1").fetchone():
+            cursor.execute("INSERT INTO temp.ar_u_root_keys SELECT * FROM main.ar_u_root_keys")
+            cursor.execute("INSERT INTO temp.ar_u_root_keys_state SELECT * FROM main.ar_u_root_keys_state")
+    else:
+        cursor.executescript(ROOT_KEYS_SCHEMA_SQL.format(temp="", schema=""))
+    changed = cursor.execute(CHANGED_ROOTS_SQL).fetchall()
+    removed = [row[0] for row in cursor.execute(REMOVED_ROOTS_SQL)]
+
+    _delete_roots(cursor, removed + [row[1] for row in changed])
+    cursor.executemany(
+        "INSERT OR REPLACE INTO ar_u_root_keys (kind, key, rank, ar_u_root) VALUES (?, ?, ?, ?)",
+        (key_row for row in changed for key_row in root_key_rows(*row[:7])),
+    )
+    cursor.executemany(
+        "INSERT INTO ar_u_root_keys_state (ar_u_root, fingerprint) VALUES (?, ?)",
+        ((row[1], row[7]) for row in changed),
+    )
+    conn.commit()
+
+    stats = {
+        "roots": cursor.execute("SELECT COUNT(*) FROM ar_u_root_keys_state").fetchone()[0],
+        "changed": len(changed),
+        "removed": len(removed),
+    }
+    if verbose and (changed or removed):
+        print(f"Refreshed ar_u_root_keys: {stats['changed']} root(s) re-keyed, {stats['removed']} removed.")
+    return stats
+
+
+def root_key_sql(kind: str, key_sql: str, last_wins: bool = False) -> str:
+    """A scalar subquery resolving ``key_sql`` (an SQL expression) to an ar_u_root, or NULL."""
+    order = "DESC" if last_wins else "ASC"
+    return (
+        f"(SELECT k.ar_u_root FROM ar_u_root_keys AS k WHERE k.kind = '{kind}' "
+        f"AND k.key = {key_sql} ORDER BY k.rank {order} LIMIT 1)"
+    )
+
+
+class RootKeyIndex:
+    """Row-at-a-time lookups against ar_u_root_keys for the Python import paths.
+
+    Each lookup is one primary-key seek; results are memoized because the
+    same few thousand roots come up for every word.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, memo_size: int = 1 << 16) -> None:
+        self.conn = conn
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+        self.root_value = lru_cache(maxsize=memo_size)(self._root_value)
+
+    def _resolve(self, kind: str, key: Optional[str], last_wins: bool = False) -> Optional[str]:
+        if not key:
+            return None
+        row = self.conn.execute(
+            f"SELECT ar_u_root FROM ar_u_root_keys WHERE kind = ? AND key = ? "
+            f"ORDER BY rank {'DESC' if last_wins else 'ASC'} LIMIT 1",
+            (kind, key),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _root_value(self, ar_u_root: Optional[str]) -> Optional[str]:
+        """ar_u_roots.root of a resolved root, or None when it is missing or empty."""
+        if not ar_u_root:
+            return None
+        row = self.conn.execute("SELECT root FROM ar_u_roots WHERE ar_u_root = ?", (ar_u_root,)).fetchone()
+        return (row[0] or None) if row else None
+
+
+def register_root_key_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function("normalize_root", 1, normalize_root, deterministic=True)
+    conn.create_function("normalize_root_arabic", 1, normalize_root_arabic, deterministic=True)
+    conn.create_function("english_root_key", 1, english_root_key, deterministic=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refresh the ar_u_root_keys lookup index from ar_u_roots.")
+    parser.add_argument("--db", type=Path, default=Path("database/d1.db"), help="SQLite database with ar_u_roots.")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the index and re-key every root.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.db.exists():
+        raise SystemExit(f"Database not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    if args.rebuild:
+        conn.executescript("DROP TABLE IF EXISTS ar_u_root_keys; DROP TABLE IF EXISTS ar_u_root_keys_state;")
+    stats = refresh_root_keys(conn, verbose=False)
+    keys = conn.execute("SELECT kind, COUNT(*) FROM ar_u_root_keys GROUP BY kind ORDER BY kind").fetchall()
+    conn.close()
+    print(
+        f"ar_u_root_keys: {stats['roots']} roots, {stats['changed']} re-keyed, {stats['removed']} removed; "
+        + ", ".join(f"{kind}={count}" for kind, count in keys)
+    )
+
+
+if __name__ == "__main__":
+    main()
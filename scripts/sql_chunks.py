@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+
+# Remote D1 rejects single statements above 100 KB, and large files make
+# `wrangler d1 execute --file` uploads slow or fail. Chunks are packed up
+# to both a statement count and a byte budget.
+D1_MAX_STATEMENT_BYTES = 100_000
+DEFAULT_MAX_CHUNK_BYTES = 1_000_000
+
+
+def add_chunk_arguments(parser: argparse.ArgumentParser, default_chunk_size: int, noun: str) -> None:
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=default_chunk_size,
+        help=f"Maximum number of {noun} statements per chunk file.",
+    )
+    parser.add_argument(
+        "--max-chunk-bytes",
+        type=int,
+        default=DEFAULT_MAX_CHUNK_BYTES,
+        help=f"Maximum size of one chunk file in bytes (default {DEFAULT_MAX_CHUNK_BYTES}).",
+    )
+
+
+def add_compact_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rows-per-statement",
+        type=int,
+        default=1,
+        help=(
+            "Compact up to this many rows into one multi-row statement (default 1: one statement per row). "
+            "Statements also stay under the D1 statement size limit."
+        ),
+    )
+
+
+def batch_values(
+    rows: Iterable[Sequence[str]],
+    prefix: str,
+    suffix: str,
+    max_rows: int,
+    max_bytes: int = D1_MAX_STATEMENT_BYTES,
+) -> Iterator[str]:
+    """Join rows of SQL literals into ``prefix (..),\n(..) suffix`` statements.
+
+    Each statement holds at most ``max_rows`` rows and, where possible,
+    stays within ``max_bytes``; a single row that is larger on its own still
+    gets a statement of its own.
+    """
+    max_rows = max(1, max_rows)
+    fixed_bytes = len(prefix.encode("utf-8")) + len(suffix.encode("utf-8"))
+    tuples: List[str] = []
+    size = fixed_bytes
+    for row in rows:
+        value = "(" + ", ".join(row) + ")"
+        value_bytes = len(value.encode("utf-8")) + 2
+        if tuples and (len(tuples) >= max_rows or size + value_bytes > max_bytes):
+            yield prefix + ",\n".join(tuples) + suffix
+            tuples = []
+            size = fixed_bytes
+        tuples.append(value)
+        size += value_bytes
+    if tuples:
+        yield prefix + ",\n".join(tuples) + suffix
+
+
+def plan_chunks(
+    statements: Iterable[str],
+    max_statements: int,
+    max_bytes: int,
+    header: str = "",
+) -> Iterator[Tuple[int, List[str], int]]:
+    """Pack statements, in order, into ``(index, statements, size_in_bytes)`` chunks within both budgets.
+
+    ``header`` is written at the top of every chunk file and counts against
+    ``max_bytes``. Filling each chunk until the next statement would break a
+    budget gives the fewest chunks for an ordered split. A statement that
+    cannot fit even in an empty chunk raises SystemExit instead of producing
+    an oversized file.
+    """
+    max_statements = max(1, max_statements)
+    header_bytes = len(header.encode("utf-8"))
+    chunk: List[str] = []
+    chunk_bytes = header_bytes
+    index = 1
+    for stmt in statements:
+        stmt_bytes = len(stmt.encode("utf-8"))
+        if header_bytes + stmt_bytes > max_bytes:
+            raise SystemExit(
+                f"Statement of {stmt_bytes} bytes does not fit the {max_bytes}-byte chunk budget: {stmt[:80]}..."
+            )
+        if stmt_bytes > D1_MAX_STATEMENT_BYTES:
+            print(f"Warning: {stmt_bytes}-byte statement exceeds the D1 statement limit: {stmt[:80]}...")
+        if chunk and (len(chunk) >= max_statements or chunk_bytes + stmt_bytes > max_bytes):
+            yield index, chunk, chunk_bytes
+            index += 1
+            chunk = []
+            chunk_bytes = header_bytes
+        chunk.append(stmt)
+        chunk_bytes += stmt_bytes
+    if chunk:
+        yield index, chunk, chunk_bytes
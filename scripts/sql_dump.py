@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+LineParser = Callable[[List[str]], List[T]]
+
+# More ranges than workers keeps the pool busy when row density varies across
+# the file (long translation rows, header comments, ...).
+RANGES_PER_WORKER = 4
+
+
+def split_line_ranges(path: Path, parts: int) -> List[Tuple[int, int]]:
+    """Split ``path`` into at most ``parts`` byte ranges that each start at a line boundary."""
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    parts = max(1, min(parts, size))
+    boundaries = [0]
+    with path.open("rb") as fh:
+        for index in range(1, parts):
+            fh.seek(max(size * index // parts, boundaries[-1]))
+            fh.readline()
+            offset = fh.tell()
+            if offset >= size:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def read_range_lines(path: Path, start: int, end: int) -> List[str]:
+    """Decode one byte range into lines, translating newlines like text-mode ``open``."""
+    with path.open("rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+    text = data.decode("utf-8")
+    return text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+
+def _parse_range(task: Tuple[Path, int, int, LineParser]) -> List[T]:
+    path, start, end, parse_lines = task
+    return parse_lines(read_range_lines(path, start, end))
+
+
+def parse_line_ranges(path: Path, parse_lines: LineParser, workers: int | None = None) -> List[T]:
+    """Parse a line-oriented dump in newline-aligned byte ranges across a process pool.
+
+    ``parse_lines`` receives the lines of one range and must be a module-level
+    function so it can be sent to worker processes. Range results are joined in
+    file order, so the output is the same as one ``parse_lines`` call over the
+    whole file.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_line_ranges(path, workers * RANGES_PER_WORKER)
+    tasks = [(path, start, end, parse_lines) for start, end in ranges]
+    merged: List[T] = []
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            merged.extend(_parse_range(task))
+        return merged
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in pool.map(_parse_range, tasks):
+            merged.extend(rows)
+    return merged
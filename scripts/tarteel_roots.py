@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from sql_dump import parse_line_ranges
+
+
+# allroots.sql is a SQLite dump of a 21-column table; columns keep their
+# positional names (c1 = legacy id, c3 = root, c5 = latin root, ...).
+ROOT_COLUMNS = tuple(f"c{i}" for i in range(1, 22))
+ROOTS_INSERT_PREFIX = "INSERT INTO roots"
+ROOTS_INSERT_PREFIX_BYTES = ROOTS_INSERT_PREFIX.encode("ascii")
+
+# Rows are plain tuples with the column names as attributes (row.c3).
+RootRow = namedtuple("RootRow", ROOT_COLUMNS)
+
+# The literals a SQLite dump writes for TEXT columns: quoted strings with
+# doubled quotes, NULL and integers (without leading zeros, so their text
+# form is the literal itself). Anything else (reals, blobs, expressions such
+# as replace(...,char(10)), a column list) is left to SQLite.
+_VALUES_RE = re.compile(r"VALUES\s*\(", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"\s*(?:'((?:[^']|'')*)'|((?i:NULL))|(-?(?:0|[1-9][0-9]{0,17})))\s*(?:(,)|\)\s*;?\s*\Z)")
+
+_sqlite_conn: Optional[sqlite3.Connection] = None
+
+
+def _parse_literals(statement: str, values_at: int) -> Optional[List[Optional[str]]]:
+    """Values of a ``VALUES(...)`` list of plain literals, or None when SQLite must evaluate it."""
+    values: List[Optional[str]] = []
+    pos = values_at
+    while True:
+        match = _LITERAL_RE.match(statement, pos)
+        if match is None:
+            return None
+        text, null, integer, comma = match.groups()
+        if text is not None:
+            values.append(text.replace("''", "'"))
+        elif null is not None:
+            values.append(None)
+        else:
+            values.append(str(int(integer)))
+        if comma is None:
+            return values
+        pos = match.end()
+
+
+def _evaluate_statement(statement: str) -> List[Optional[str]]:
+    """Run the INSERT against an in-memory copy of the roots table, as the dump would be loaded."""
+    global _sqlite_conn
+    if _sqlite_conn is None:
+        _sqlite_conn = sqlite3.connect(":memory:")
+        _sqlite_conn.execute(f"CREATE TABLE roots ({', '.join(f'{name} TEXT' for name in ROOT_COLUMNS)})")
+    _sqlite_conn.execute("DELETE FROM roots")
+    try:
+        _sqlite_conn.execute(statement)
+    except sqlite3.Error as exc:
+        raise ValueError(f"Cannot load allroots statement {statement[:120]!r}: {exc}") from exc
+    rows = _sqlite_conn.execute("SELECT * FROM roots").fetchall()
+    if len(rows) != 1:
+        raise ValueError(f"Expected one row from allroots statement {statement[:120]!r}, got {len(rows)}")
+    return list(rows[0])
+
+
+def parse_root_statement(statement: str) -> Optional[RootRow]:
+    """Parse one ``INSERT INTO roots VALUES(...);`` statement into a c1..c21 row.
+
+    Values come out as SQLite stores them in TEXT columns: strings as
+    written, a bare NULL as None and numbers as their text. Statements the
+    literal parser does not cover are evaluated by SQLite; statements SQLite
+    rejects raise ValueError.
+    """
+    statement = statement.strip()
+    if not statement.startswith(ROOTS_INSERT_PREFIX):
+        return None
+    values = None
+    if statement[len(ROOTS_INSERT_PREFIX) : len(ROOTS_INSERT_PREFIX) + 1].isspace():
+        match = _VALUES_RE.match(statement, len(ROOTS_INSERT_PREFIX) + 1)
+        if match is not None:
+            values = _parse_literals(statement, match.end())
+    if values is None or len(values) != len(ROOT_COLUMNS):
+        values = _evaluate_statement(statement)
+    return RootRow._make(values)
+
+
+def iter_statements(lines: Iterable[str]) -> Iterator[str]:
+    """Join the lines of each ``INSERT INTO roots`` statement; values may hold raw newlines.
+
+    An unfinished statement at the end is yielded as it is, so parsing it
+    fails loudly rather than dropping the row.
+    """
+    parts: List[str] = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not parts and not line.lstrip().startswith(ROOTS_INSERT_PREFIX):
+            continue
+        parts.append(line)
+        statement = "\n".join(parts)
+        if sqlite3.complete_statement(statement):
+            yield statement
+            parts = []
+    if parts:
+        yield "\n".join(parts)
+
+
+def _parse_root_lines(lines: Iterable[str]) -> List[RootRow]:
+    return list(iter_roots(lines))
+
+
+def root_id(row: RootRow) -> int:
+    return int(row.c1 or 0)
+
+
+def iter_roots(lines: Iterable[str]) -> Iterator[RootRow]:
+    """Yield the parsed rows of ``lines`` in file order."""
+    for statement in iter_statements(lines):
+        row = parse_root_statement(statement)
+        if row is not None:
+            yield row
+
+
+def _read_statement(fh: BinaryIO) -> str:
+    """Read the statement starting at the current offset, following it over line breaks."""
+    lines = iter(lambda: fh.readline().decode("utf-8"), "")
+    return next(iter_statements(lines), "")
+
+
+def _leading_id(line: bytes) -> Optional[int]:
+    """Read just the legacy id (c1) of a raw INSERT line, or None for other lines."""
+    statement = line.lstrip()
+    if not statement.startswith(ROOTS_INSERT_PREFIX_BYTES):
+        return None
+    values_at = statement.find(b"(", len(ROOTS_INSERT_PREFIX_BYTES))
+    if values_at < 0:
+        return None
+    end = statement.find(b",", values_at)
+    first = statement[values_at + 1 : end if end >= 0 else None].strip().rstrip(b");").strip(b"'")
+    return 0 if not first or first.upper() == b"NULL" else int(first)
+
+
+def _index_root_ids(path: Path) -> Tuple[List[Tuple[int, int]], bool]:
+    """Return ``(legacy_id, byte_offset)`` per INSERT line and whether the ids already ascend."""
+    index: List[Tuple[int, int]] = []
+    ordered = True
+    previous = None
+    offset = 0
+    with path.open("rb") as fh:
+        for line in fh:
+            legacy_id = _leading_id(line)
+            if legacy_id is not None:
+                if previous is not None and legacy_id < previous:
+                    ordered = False
+                previous = legacy_id
+                index.append((legacy_id, offset))
+            offset += len(line)
+    return index, ordered
+
+
+def iter_roots_by_id(path: Path) -> Iterator[RootRow]:
+    """Stream allroots.sql rows ordered by legacy id without holding the dump in memory.
+
+    A first pass reads only each statement's leading id. When the dump is
+    already in id order (SQLite writes its dumps in rowid order) the rows are
+    parsed straight from the file; otherwise they are read back by offset in
+    id order, so only the ``(id, offset)`` pairs are kept.
+    """
+    index, ordered = _index_root_ids(path)
+    if ordered:
+        with path.open(encoding="utf-8") as fh:
+            yield from iter_roots(fh)
+        return
+    # sort() is stable, so rows sharing an id keep their file order like load_roots.
+    index.sort(key=lambda entry: entry[0])
+    with path.open("rb") as fh:
+        for _, offset in index:
+            fh.seek(offset)
+            row = parse_root_statement(_read_statement(fh))
+            if row is not None:
+                yield row
+
+
+def load_roots(path: Path, workers: int = 1) -> Iterator[RootRow]:
+    """Iterate over the rows of allroots.sql ordered by legacy id.
+
+    With one worker the rows are streamed by iter_roots_by_id; more workers
+    parse byte ranges in parallel and the sorted rows are held in memory.
+    Statements spanning lines need one worker, as a range may cut them.
+    """
+    if workers <= 1:
+        return iter_roots_by_id(path)
+    rows = parse_line_ranges(path, _parse_root_lines, workers)
+    return iter(sorted(rows, key=root_id))